@@ -0,0 +1,230 @@
+"""
+WebSocket endpoint for streaming live pose frames of one session.
+
+    ws://<host>/ws/pose-session/<session_id>/stream/?token=<access token>
+
+The socket is authenticated once (JWT access token in the query string or an
+"Authorization: Bearer" header). After that the client sends JSON text
+messages, either a single frame or {"frames": [...]}, with the same frame
+fields as the batch endpoint. Frames are buffered in memory and written with
+PoseFeedback.ingest_frames once FLUSH_FRAMES are buffered or every
+FLUSH_INTERVAL seconds, and every flush is acknowledged with
+{"type": "ack", ...}.
+
+Backpressure: at most MAX_PENDING_BATCHES flushes wait for the database.
+When that queue is full the server stops reading from the socket until a
+write completes, so a client that outruns the database is slowed down by
+the transport instead of growing server memory.
+
+Send {"type": "end"} (or simply close the socket) to flush what is left.
+"""
+import asyncio
+import json
+import logging
+import re
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken, TokenError
+
+from FitHub.models import PoseEstimationSession, PoseFeedback
+
+logger = logging.getLogger(__name__)
+
+STREAM_PATH = re.compile(r'^/ws/pose-session/(?P<session_id>\d+)/stream/?$')
+
+DEFAULT_STREAM_SETTINGS = {
+    'FLUSH_FRAMES': 120,          # about 4 seconds of camera frames at 30 fps
+    'FLUSH_INTERVAL': 1.0,        # seconds
+    'MAX_PENDING_BATCHES': 4,
+}
+
+CLOSE_NOT_FOUND = 4404
+CLOSE_FORBIDDEN = 4403
+
+
+def stream_settings():
+    return {**DEFAULT_STREAM_SETTINGS, **getattr(settings, 'POSE_STREAM', {})}
+
+
+def database_sync_to_async(func):
+    """Run ORM code in the sync thread, dropping stale connections around it."""
+    def wrapper(*args, **kwargs):
+        close_old_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+    return sync_to_async(wrapper, thread_sensitive=True)
+
+
+@database_sync_to_async
+def open_session(token, session_id):
+    """Return the caller's open session for a valid access token, else None."""
+    auth = JWTAuthentication()
+    try:
+        user = auth.get_user(auth.get_validated_token(token))
+    except (AuthenticationFailed, InvalidToken, TokenError):
+        return None
+    return PoseEstimationSession.objects.filter(id=session_id, user=user, completed=False).first()
+
+
+@database_sync_to_async
+def store_frames(session, frames):
+    return PoseFeedback.ingest_frames(session, frames)
+
+
+def get_token(scope):
+    query = parse_qs(scope.get('query_string', b'').decode())
+    if query.get('token'):
+        return query['token'][0]
+    for name, value in scope.get('headers', []):
+        if name == b'authorization':
+            parts = value.decode().split()
+            if len(parts) == 2 and parts[0].lower() == 'bearer':
+                return parts[1]
+    return None
+
+
+def parse_frame(data):
+    """Decode one frame message into the dict shape ingest_frames expects."""
+    if not isinstance(data, dict) or not isinstance(data.get('keypoints_json'), dict):
+        raise ValueError('Each frame needs a keypoints_json object.')
+    try:
+        frame = {
+            'frame_id': int(data['frame_id']),
+            'keypoints_json': data['keypoints_json'],
+            'feedback_notes': data.get('feedback_notes'),
+            'confidence_score': float(data['confidence_score']),
+        }
+    except (KeyError, TypeError, ValueError):
+        raise ValueError('Each frame needs an integer frame_id and a numeric confidence_score.')
+    if not 0 <= frame['frame_id'] <= PoseFeedback.MAX_FRAME_ID:
+        raise ValueError(f'frame_id must be between 0 and {PoseFeedback.MAX_FRAME_ID}.')
+    return frame
+
+
+class PoseFrameStream:
+    """Buffers the frames of one connected socket and writes them in batches."""
+
+    def __init__(self, session, receive, send, config):
+        self.session = session
+        self.receive = receive
+        self.send = send
+        self.config = config
+        self.buffer = []
+        self.pending = asyncio.Queue(maxsize=config['MAX_PENDING_BATCHES'])
+        self.flush_lock = asyncio.Lock()
+        self.connected = True
+
+    async def run(self):
+        writer = asyncio.create_task(self.write_batches())
+        ticker = asyncio.create_task(self.flush_periodically())
+        try:
+            await self.read_frames()
+        finally:
+            ticker.cancel()
+            await self.flush()
+            await self.pending.put(None)
+            await writer
+
+    async def read_frames(self):
+        while True:
+            event = await self.receive()
+            if event['type'] == 'websocket.disconnect':
+                self.connected = False
+                return
+            if event['type'] != 'websocket.receive':
+                continue
+
+            try:
+                message = json.loads(event.get('text') or event.get('bytes') or b'')
+            except ValueError:
+                await self.reply({'type': 'error', 'detail': 'Messages must be JSON.'})
+                continue
+
+            if isinstance(message, dict) and message.get('type') == 'end':
+                await self.flush()
+                await self.pending.join()
+                await self.reply({'type': 'closed', 'session': self.session.id})
+                await self.send({'type': 'websocket.close', 'code': 1000})
+                self.connected = False
+                return
+
+            try:
+                items = message['frames'] if isinstance(message, dict) and 'frames' in message else [message]
+                frames = [parse_frame(item) for item in items]
+            except (TypeError, ValueError) as e:
+                await self.reply({'type': 'error', 'detail': str(e)})
+                continue
+
+            self.buffer.extend(frames)
+            if len(self.buffer) >= self.config['FLUSH_FRAMES']:
+                await self.flush()
+
+    async def flush_periodically(self):
+        while True:
+            await asyncio.sleep(self.config['FLUSH_INTERVAL'])
+            await self.flush()
+
+    async def flush(self):
+        async with self.flush_lock:
+            if not self.buffer:
+                return
+            # Blocks while MAX_PENDING_BATCHES writes are outstanding. The
+            # buffer is only swapped once queued, so a cancelled flush loses nothing.
+            await self.pending.put(self.buffer)
+            self.buffer = []
+
+    async def write_batches(self):
+        while True:
+            batch = await self.pending.get()
+            try:
+                if batch is None:
+                    return
+                result = await store_frames(self.session, batch)
+                await self.reply({
+                    'type': 'ack',
+                    'received': len(batch),
+                    **result._asdict(),
+                    'last_frame_id': max(frame['frame_id'] for frame in batch),
+                })
+            except Exception:
+                logger.exception("Failed to store streamed frames for session %s", self.session.id)
+                await self.reply({'type': 'error', 'detail': 'Failed to store frames.'})
+            finally:
+                self.pending.task_done()
+
+    async def reply(self, payload):
+        if self.connected:
+            await self.send({'type': 'websocket.send', 'text': json.dumps(payload)})
+
+
+async def pose_stream_application(scope, receive, send):
+    """ASGI application for websocket connections."""
+    event = await receive()
+    if event['type'] != 'websocket.connect':
+        return
+
+    match = STREAM_PATH.match(scope['path'])
+    if not match:
+        await send({'type': 'websocket.close', 'code': CLOSE_NOT_FOUND})
+        return
+
+    token = get_token(scope)
+    session = await open_session(token, int(match['session_id'])) if token else None
+    if session is None:
+        await send({'type': 'websocket.close', 'code': CLOSE_FORBIDDEN})
+        return
+
+    config = stream_settings()
+    await send({'type': 'websocket.accept'})
+    await send({'type': 'websocket.send', 'text': json.dumps({
+        'type': 'ready',
+        'session': session.id,
+        'flush_frames': config['FLUSH_FRAMES'],
+    })})
+    await PoseFrameStream(session, receive, send, config).run()
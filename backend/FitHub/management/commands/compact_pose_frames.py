@@ -0,0 +1,47 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from FitHub.models import PoseEstimationSession, PoseFeedback, PoseKeypointChunk, PoseSessionJob
+
+
+class Command(BaseCommand):
+    help = "Compact pose frames older than a given age into per-rep summaries and delete the raw frames."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-days', type=int, default=getattr(settings, 'POSE_FRAME_MAX_AGE_DAYS', 30))
+        parser.add_argument('--batch-size', type=int, default=5000, help="Frame rows deleted per statement.")
+        parser.add_argument('--max-sessions', type=int, default=None, help="Stop after this many sessions.")
+        parser.add_argument('--pause', type=float, default=0.0, help="Seconds to sleep between sessions.")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['older_than_days'])
+        unfinished_job = PoseSessionJob.objects.filter(
+            session=OuterRef('pk'),
+            status__in=[PoseSessionJob.STATUS_PENDING, PoseSessionJob.STATUS_RUNNING],
+        )
+        sessions = (
+            PoseEstimationSession.objects
+            .filter(started_at__lt=cutoff)
+            .filter(
+                Q(Exists(PoseFeedback.objects.filter(session=OuterRef('pk'))))
+                | Q(Exists(PoseKeypointChunk.objects.filter(session=OuterRef('pk'))))
+            )
+            .exclude(Exists(unfinished_job))
+            .order_by('id')
+        )
+        if options['max_sessions']:
+            sessions = sessions[:options['max_sessions']]
+
+        compacted = deleted = 0
+        for session in sessions.iterator(chunk_size=100):
+            deleted += session.compact_frames(batch_size=options['batch_size'])
+            compacted += 1
+            if options['pause']:
+                time.sleep(options['pause'])
+
+        self.stdout.write(f"Compacted {compacted} sessions, deleted {deleted} frame rows and chunks.")
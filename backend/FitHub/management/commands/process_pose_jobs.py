@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from FitHub.models import PoseSessionJob
+
+
+class Command(BaseCommand):
+    help = "Run queued pose session completion jobs (set creation, rep scoring, calories)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Drain the queue once and exit instead of polling.")
+        parser.add_argument('--batch-size', type=int, default=20, help="Jobs claimed per round.")
+        parser.add_argument('--sleep', type=float, default=2.0, help="Seconds to wait when the queue is empty.")
+
+    def handle(self, *args, **options):
+        while True:
+            jobs = list(PoseSessionJob.claim(options['batch_size']))
+            for job in jobs:
+                if job.run():
+                    self.stdout.write(f"Finished pose session {job.session_id}")
+                else:
+                    self.stderr.write(f"Pose session {job.session_id} failed ({job.status}): {job.last_error}")
+
+            if not jobs:
+                if options['once']:
+                    return
+                time.sleep(options['sleep'])
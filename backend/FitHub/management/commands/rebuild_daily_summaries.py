@@ -0,0 +1,68 @@
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import timedelta
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from FitHub.models import CustomUser, DailyCalorieSummary
+
+
+def _init_worker():
+    # Forked workers must not share the parent's database connections
+    django.setup()
+    connections.close_all()
+
+
+def _rebuild_shard(first_user_id, last_user_id, start, end):
+    try:
+        return DailyCalorieSummary.rebuild_range(first_user_id, last_user_id, start, end)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute DailyCalorieSummary rows of all users for a date range with grouped queries "
+        "and bulk upserts, sharded by user id across worker processes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help="First day (YYYY-MM-DD); defaults to yesterday.")
+        parser.add_argument('--end', help="Last day (YYYY-MM-DD); defaults to --start.")
+        parser.add_argument('--shard-size', type=int, default=1000, help="Users per shard (one transaction each).")
+        parser.add_argument('--workers', type=int, default=4, help="Worker processes; 1 runs in this process.")
+
+    def handle(self, *args, **options):
+        yesterday = timezone.localdate() - timedelta(days=1)
+        start = parse_date(options['start']) if options['start'] else yesterday
+        end = parse_date(options['end']) if options['end'] else start
+        if start is None or end is None or start > end:
+            raise CommandError("--start and --end must be dates (YYYY-MM-DD) with start <= end.")
+
+        user_ids = list(CustomUser.objects.order_by('pk').values_list('pk', flat=True))
+        size = max(options['shard_size'], 1)
+        shards = [(chunk[0], chunk[-1]) for chunk in (user_ids[i:i + size] for i in range(0, len(user_ids), size))]
+
+        # SQLite has a single writer, so parallel shards would only fail with "database is locked"
+        workers = 1 if connection.vendor == 'sqlite' else options['workers']
+
+        began = time.monotonic()
+        written = 0
+        if workers <= 1:
+            for first, last in shards:
+                written += DailyCalorieSummary.rebuild_range(first, last, start, end)
+        else:
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+                futures = [pool.submit(_rebuild_shard, first, last, start, end) for first, last in shards]
+                for future in as_completed(futures):
+                    written += future.result()
+
+        self.stdout.write(
+            f"Rebuilt {written} daily summaries for {len(user_ids)} users from {start} to {end} "
+            f"in {len(shards)} shards ({time.monotonic() - began:.1f}s)."
+        )
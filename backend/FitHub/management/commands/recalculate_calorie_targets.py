@@ -0,0 +1,96 @@
+import numpy as np
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from FitHub.models import CalorieTargetHistory, CustomUser
+from FitHub.utils import calorieTargets
+from FitHub.utils.responseCache import bump_user_version
+
+INPUT_FIELDS = CustomUser.TARGET_INPUT_FIELDS
+RESULT_FIELDS = ('bmr', 'tdee', 'daily_target')
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute every user's calorie target in bulk and add a CalorieTargetHistory row "
+        "where the inputs or the result differ from the latest one (e.g. after a formula change)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000, help="Users computed per batch.")
+        parser.add_argument('--dry-run', action='store_true', help="Report changes without writing them.")
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        latest_id = Subquery(
+            CalorieTargetHistory.objects.filter(user=OuterRef('pk')).order_by('-effective_date').values('id')[:1]
+        )
+        users = CustomUser.objects.annotate(latest_id=latest_id).order_by('pk').values_list(
+            'pk', 'latest_id', *INPUT_FIELDS
+        )
+
+        batch, checked, changed = [], 0, 0
+        for row in users.iterator(chunk_size=options['batch_size']):
+            batch.append(row)
+            if len(batch) >= options['batch_size']:
+                changed += self.process(batch, today, options['dry_run'])
+                checked += len(batch)
+                batch = []
+        if batch:
+            changed += self.process(batch, today, options['dry_run'])
+            checked += len(batch)
+
+        verb = "Would update" if options['dry_run'] else "Updated"
+        self.stdout.write(f"Checked {checked} users. {verb} {changed} calorie targets effective {today}.")
+
+    def process(self, rows, today, dry_run):
+        user_ids, latest_ids = [row[0] for row in rows], [row[1] for row in rows]
+        columns = list(zip(*(row[2:] for row in rows)))
+        bmr, tdee, target = calorieTargets.compute_targets(*columns)
+
+        latest = {
+            entry[0]: entry[1:]
+            for entry in CalorieTargetHistory.objects.filter(
+                id__in=[pk for pk in latest_ids if pk is not None]
+            ).values_list('id', *INPUT_FIELDS, *RESULT_FIELDS)
+        }
+        previous = [latest.get(pk) for pk in latest_ids]
+        old = np.array([
+            [np.nan] * len(RESULT_FIELDS) if entry is None
+            else [np.nan if value is None else value for value in entry[len(INPUT_FIELDS):]]
+            for entry in previous
+        ], dtype=float).reshape(len(rows), len(RESULT_FIELDS))
+        new = np.column_stack([bmr, tdee, target])
+        # Compare whole columns at once; NaN == NaN covers "no target" on both sides
+        result_changed = ~np.isclose(old, new, equal_nan=True).all(axis=1)
+        inputs_changed = np.array([
+            entry is None or tuple(entry[:len(INPUT_FIELDS)]) != tuple(row[2:])
+            for entry, row in zip(previous, rows)
+        ])
+        indexes = np.flatnonzero(result_changed | inputs_changed)
+        if dry_run or not len(indexes):
+            return len(indexes)
+
+        entries = [
+            CalorieTargetHistory(
+                user_id=user_ids[i],
+                effective_date=today,
+                **dict(zip(INPUT_FIELDS, rows[i][2:])),
+                bmr=float(bmr[i]),
+                tdee=float(tdee[i]),
+                daily_target=None if np.isnan(target[i]) else float(target[i]),
+            )
+            for i in indexes
+        ]
+        with transaction.atomic():
+            CalorieTargetHistory.objects.bulk_create(
+                entries,
+                update_conflicts=True,
+                unique_fields=['user', 'effective_date'],
+                update_fields=[*INPUT_FIELDS, *RESULT_FIELDS],
+            )
+            for entry in entries:
+                bump_user_version(entry.user_id)
+        return len(entries)
@@ -0,0 +1,83 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, FloatField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Abs, Coalesce
+
+from FitHub.models import CustomUser, DailyCalorieSummary, ProgressRollup, Workout
+from FitHub.utils.responseCache import bump_user_version
+
+
+class Command(BaseCommand):
+    help = (
+        "Find workouts whose total_time / total_calories differ from the sums over their exercises "
+        "and set them to those sums with set-based updates, moving the daily summaries and "
+        "progress rollups by the same calorie change."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help="Workouts repaired per transaction.")
+        parser.add_argument('--tolerance', type=float, default=0.01, help="Calorie difference ignored as rounding.")
+        parser.add_argument('--dry-run', action='store_true', help="Report drift without repairing it.")
+
+    def handle(self, *args, **options):
+        # Workouts without exercises have nothing to be compared against
+        drifted = (
+            Workout.with_child_totals()
+            .filter(exercises__isnull=False).distinct()
+            .annotate(calorie_drift=Abs(Coalesce('total_calories', Value(0.0)) - F('child_calories')))
+            .filter(
+                Q(calorie_drift__gt=options['tolerance'])
+                | ~Q(total_time=F('child_time'))
+                | Q(total_time__isnull=True)
+            )
+            .order_by('pk')
+            .values_list('pk', flat=True)
+        )
+        ids = list(drifted)
+        if options['dry_run']:
+            self.stdout.write(f"{len(ids)} workouts have drifted totals.")
+            return
+
+        size = max(options['batch_size'], 1)
+        for i in range(0, len(ids), size):
+            self.repair(ids[i:i + size])
+        self.stdout.write(f"Repaired {len(ids)} workouts.")
+
+    def repair(self, ids):
+        """
+        Set the workouts' totals to their sums and carry each calorie change into
+        the daily summaries and progress rollups, as Workout.record_calories does,
+        with one delta per user and day. Those ledgers were built from the drifted
+        totals (migration 0026 copied them, and a cancelled finished exercise leaves
+        its calories behind), so they need the same correction.
+        """
+        with transaction.atomic():
+            old = {
+                pk: (user_id, workout_date, total_calories or 0.0)
+                for pk, user_id, workout_date, total_calories in
+                Workout.objects.select_for_update().filter(pk__in=ids)
+                .values_list('pk', 'user_id', 'workout_date', 'total_calories')
+            }
+            new = dict(Workout.with_child_totals().filter(pk__in=old).values_list('pk', 'child_calories'))
+            # One UPDATE for the batch, with the sums computed by the database
+            Workout.objects.filter(pk__in=old).update(
+                total_time=Subquery(Workout.with_child_totals().filter(pk=OuterRef('pk')).values('child_time')[:1]),
+                total_calories=Subquery(
+                    Workout.with_child_totals().filter(pk=OuterRef('pk')).values('child_calories')[:1],
+                    output_field=FloatField(),
+                ),
+            )
+
+            changes = defaultdict(float)
+            for pk, (user_id, workout_date, calories) in old.items():
+                changes[user_id, workout_date] += new[pk] - calories
+            users = CustomUser.objects.in_bulk({user_id for user_id, _ in changes})
+            for (user_id, workout_date), change in changes.items():
+                if abs(change) > DailyCalorieSummary.LEDGER_TOLERANCE:
+                    DailyCalorieSummary.apply_delta(users[user_id], workout_date, burned=change)
+                    ProgressRollup.add(user_id, workout_date, workout_calories=change)
+            for user_id in users:
+                # Time-only repairs change no ledger but still change cached responses
+                bump_user_version(user_id)
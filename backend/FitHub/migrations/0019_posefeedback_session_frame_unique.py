@@ -0,0 +1,33 @@
+# Generated by Django 5.1.4 on 2026-10-18 13:24
+
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def remove_duplicate_frames(apps, schema_editor):
+    """Keep the first row of every (session, frame_id) pair so the constraint can be added."""
+    PoseFeedback = apps.get_model('FitHub', 'PoseFeedback')
+    duplicates = (
+        PoseFeedback.objects.values('session', 'frame_id')
+        .annotate(keep_id=Min('id'), rows=Count('id'))
+        .filter(rows__gt=1)
+    )
+    for dup in duplicates.iterator():
+        PoseFeedback.objects.filter(
+            session=dup['session'], frame_id=dup['frame_id']
+        ).exclude(id=dup['keep_id']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('FitHub', '0018_poseexerciseset'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_frames, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='posefeedback',
+            unique_together={('session', 'frame_id')},
+        ),
+    ]
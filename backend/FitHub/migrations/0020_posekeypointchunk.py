@@ -0,0 +1,30 @@
+# Generated by Django 5.1.4 on 2026-10-18 13:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('FitHub', '0019_posefeedback_session_frame_unique'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PoseKeypointChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('first_frame_id', models.IntegerField()),
+                ('last_frame_id', models.IntegerField()),
+                ('frame_count', models.IntegerField()),
+                ('format_version', models.PositiveSmallIntegerField(default=1)),
+                ('data', models.BinaryField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='keypoint_chunks', to='FitHub.poseestimationsession')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['session', 'first_frame_id'], name='FitHub_pose_session_2fbe3d_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.4 on 2026-10-18 13:29
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('FitHub', '0020_posekeypointchunk'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PoseSessionJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('attempts', models.IntegerField(default=0)),
+                ('last_error', models.TextField(blank=True, null=True)),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now)),
+                ('locked_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('session', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='completion_job', to='FitHub.poseestimationsession')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'run_after'], name='FitHub_pose_status_dd53a6_idx')],
+            },
+        ),
+    ]
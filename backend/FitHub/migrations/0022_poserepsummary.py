@@ -0,0 +1,37 @@
+# Generated by Django 5.1.4 on 2026-10-18 13:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('FitHub', '0021_posesessionjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='poseestimationsession',
+            name='frames_compacted_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='PoseRepSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rep_index', models.IntegerField()),
+                ('start_frame_id', models.IntegerField()),
+                ('end_frame_id', models.IntegerField()),
+                ('duration_seconds', models.FloatField(default=0.0)),
+                ('angle_min', models.FloatField(blank=True, null=True)),
+                ('angle_max', models.FloatField(blank=True, null=True)),
+                ('angle_mean', models.FloatField(blank=True, null=True)),
+                ('form_score', models.FloatField(blank=True, null=True)),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rep_summaries', to='FitHub.poseestimationsession')),
+            ],
+            options={
+                'unique_together': {('session', 'rep_index')},
+            },
+        ),
+    ]
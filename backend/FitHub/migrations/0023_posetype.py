@@ -0,0 +1,53 @@
+# Generated by Django 5.1.4 on 2026-10-18 13:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# The values previously hard-coded in PoseExerciseSet.calculate_calories and
+# poseAnalysis.POSE_ANALYSIS
+SEED_POSE_TYPES = [
+    {'name': 'squat', 'label': 'Squat', 'met': 5.0, 'analyzer': 'squat',
+     'down_angle': 70.0, 'up_angle': 100.0, 'target_angle': 90.0, 'tolerance': 10.0},
+    {'name': 'lunge', 'label': 'Lunge', 'met': 4.5, 'analyzer': 'lunge',
+     'down_angle': 70.0, 'up_angle': 100.0, 'target_angle': 90.0, 'tolerance': 10.0,
+     'torso_min_angle': 150.0},
+]
+
+
+def seed_pose_types(apps, schema_editor):
+    PoseType = apps.get_model('FitHub', 'PoseType')
+    Exercise = apps.get_model('FitHub', 'Exercise')
+    for row in SEED_POSE_TYPES:
+        exercise = (
+            Exercise.objects.filter(name__iexact=row['label']).first()
+            or Exercise.objects.filter(name__iexact=row['label'] + 's').first()
+        )
+        PoseType.objects.get_or_create(name=row['name'], defaults={**row, 'exercise': exercise})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('FitHub', '0022_poserepsummary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PoseType',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('label', models.CharField(blank=True, max_length=100)),
+                ('met', models.FloatField(blank=True, null=True)),
+                ('analyzer', models.CharField(blank=True, choices=[('squat', 'Squat'), ('lunge', 'Lunge')], max_length=20)),
+                ('down_angle', models.FloatField(blank=True, null=True)),
+                ('up_angle', models.FloatField(blank=True, null=True)),
+                ('target_angle', models.FloatField(blank=True, null=True)),
+                ('tolerance', models.FloatField(blank=True, null=True)),
+                ('torso_min_angle', models.FloatField(blank=True, null=True)),
+                ('exercise', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='pose_types', to='FitHub.exercise')),
+            ],
+        ),
+        migrations.RunPython(seed_pose_types, migrations.RunPython.noop),
+    ]
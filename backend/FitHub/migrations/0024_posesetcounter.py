@@ -0,0 +1,77 @@
+# Generated by Django 5.1.4 on 2026-10-18 13:34
+
+import django.db.models.deletion
+from collections import defaultdict
+from django.conf import settings
+from django.db import migrations, models
+
+
+def sequence_key(pose_set):
+    if pose_set.exercise_id:
+        return f'exercise:{pose_set.exercise_id}'
+    name = pose_set.session.pose_type.strip().lower()
+    if name.endswith('s'):
+        name = name[:-1]
+    return f'pose:{name}'
+
+
+def backfill_set_numbers(apps, schema_editor):
+    """
+    Fill sequence_key, renumber sets that raced into the same number and
+    start every counter at the highest number already used.
+    """
+    PoseExerciseSet = apps.get_model('FitHub', 'PoseExerciseSet')
+    PoseSetCounter = apps.get_model('FitHub', 'PoseSetCounter')
+
+    groups = defaultdict(list)
+    for pose_set in PoseExerciseSet.objects.select_related('session').order_by('set_number', 'id').iterator():
+        pose_set.sequence_key = sequence_key(pose_set)
+        groups[(pose_set.user_id, pose_set.date, pose_set.sequence_key)].append(pose_set)
+
+    changed, counters = [], []
+    for (user_id, day, key), sets in groups.items():
+        seen = set()
+        next_number = max(s.set_number for s in sets) + 1
+        for pose_set in sets:
+            if pose_set.set_number in seen:
+                pose_set.set_number = next_number
+                next_number += 1
+            seen.add(pose_set.set_number)
+            changed.append(pose_set)
+        counters.append(PoseSetCounter(user_id=user_id, date=day, key=key, last_number=next_number - 1))
+
+    PoseExerciseSet.objects.bulk_update(changed, ['sequence_key', 'set_number'], batch_size=500)
+    PoseSetCounter.objects.bulk_create(counters, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('FitHub', '0023_posetype'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PoseSetCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('key', models.CharField(max_length=120)),
+                ('last_number', models.IntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'date', 'key')},
+            },
+        ),
+        migrations.AddField(
+            model_name='poseexerciseset',
+            name='sequence_key',
+            field=models.CharField(default='', max_length=120),
+        ),
+        migrations.RunPython(backfill_set_numbers, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='poseexerciseset',
+            constraint=models.UniqueConstraint(fields=('user', 'date', 'sequence_key', 'set_number'), name='unique_pose_set_number'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.1.4 on 2026-10-18 13:35
+
+import django.db.models.deletion
+from collections import defaultdict
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_rollup(apps, schema_editor):
+    PoseExerciseSet = apps.get_model('FitHub', 'PoseExerciseSet')
+    DailyPoseCalories = apps.get_model('FitHub', 'DailyPoseCalories')
+
+    totals = defaultdict(lambda: [0.0, 0])
+    rows = (
+        PoseExerciseSet.objects.values('user_id', 'date', 'session__pose_type')
+        .annotate(calories=Sum('calories_burned'), sets=Count('id'))
+    )
+    for row in rows.iterator():
+        name = row['session__pose_type'].strip().lower()
+        if name.endswith('s'):
+            name = name[:-1]
+        total = totals[(row['user_id'], row['date'], name)]
+        total[0] += row['calories'] or 0.0
+        total[1] += row['sets']
+
+    DailyPoseCalories.objects.bulk_create(
+        [
+            DailyPoseCalories(user_id=user_id, date=day, pose_type=name, calories=calories, set_count=sets)
+            for (user_id, day, name), (calories, sets) in totals.items()
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('FitHub', '0024_posesetcounter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyPoseCalories',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('pose_type', models.CharField(max_length=100)),
+                ('calories', models.FloatField(default=0.0)),
+                ('set_count', models.IntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_pose_calories', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'date', 'pose_type')},
+            },
+        ),
+        migrations.RunPython(backfill_rollup, migrations.RunPython.noop),
+    ]
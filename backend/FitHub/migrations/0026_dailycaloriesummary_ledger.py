@@ -0,0 +1,85 @@
+# Generated by Django 5.1.4 on 2026-10-18 13:37
+
+from collections import defaultdict
+from django.db import migrations, models
+from django.db.models import Count, F, Max, Sum
+from django.db.models.functions import TruncDate
+
+
+def remove_duplicate_days(apps, schema_editor):
+    """Keep the most recently written row of every (user, date) pair."""
+    DailyCalorieSummary = apps.get_model('FitHub', 'DailyCalorieSummary')
+    duplicates = (
+        DailyCalorieSummary.objects.values('user', 'date')
+        .annotate(keep_id=Max('id'), rows=Count('id'))
+        .filter(rows__gt=1)
+    )
+    for dup in duplicates.iterator():
+        DailyCalorieSummary.objects.filter(
+            user=dup['user'], date=dup['date']
+        ).exclude(id=dup['keep_id']).delete()
+
+
+def rebuild_ledger(apps, schema_editor):
+    """
+    Recover each row's target from net = consumed - burned - target, then
+    recompute consumed (eaten meals) and burned (workouts + pose sets) from
+    their sources so later deltas start from correct totals.
+    """
+    DailyCalorieSummary = apps.get_model('FitHub', 'DailyCalorieSummary')
+    MealPlan = apps.get_model('FitHub', 'MealPlan')
+    Workout = apps.get_model('FitHub', 'Workout')
+    PoseExerciseSet = apps.get_model('FitHub', 'PoseExerciseSet')
+
+    DailyCalorieSummary.objects.update(
+        calorie_target=F('calories_consumed') - F('calories_burned') - F('net_calories')
+    )
+
+    consumed = defaultdict(float)
+    meals = (
+        MealPlan.objects.filter(is_consumed=True)
+        .annotate(day=TruncDate('created_at'))
+        .values('user_id', 'day')
+        .annotate(total=Sum('calories'))
+    )
+    for row in meals.iterator():
+        consumed[(row['user_id'], row['day'])] += row['total'] or 0
+
+    burned = defaultdict(float)
+    workouts = Workout.objects.values('user_id', 'workout_date').annotate(total=Sum('total_calories'))
+    for row in workouts.iterator():
+        burned[(row['user_id'], row['workout_date'])] += row['total'] or 0
+    pose_sets = PoseExerciseSet.objects.values('user_id', 'date').annotate(total=Sum('calories_burned'))
+    for row in pose_sets.iterator():
+        burned[(row['user_id'], row['date'])] += row['total'] or 0
+
+    summaries = list(DailyCalorieSummary.objects.all())
+    for summary in summaries:
+        key = (summary.user_id, summary.date)
+        summary.calories_consumed = consumed.get(key, 0.0)
+        summary.calories_burned = burned.get(key, 0.0)
+        summary.net_calories = summary.calories_consumed - summary.calories_burned - summary.calorie_target
+    DailyCalorieSummary.objects.bulk_update(
+        summaries, ['calories_consumed', 'calories_burned', 'net_calories'], batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('FitHub', '0025_dailyposecalories'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_days, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='dailycaloriesummary',
+            name='calorie_target',
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.RunPython(rebuild_ledger, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='dailycaloriesummary',
+            unique_together={('user', 'date')},
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.1.4 on 2026-10-18 13:40
+
+from django.db import migrations, models
+
+
+def backfill_cumulative_net(apps, schema_editor):
+    CustomUser = apps.get_model('FitHub', 'CustomUser')
+    DailyCalorieSummary = apps.get_model('FitHub', 'DailyCalorieSummary')
+
+    totals = {}
+    summaries = list(DailyCalorieSummary.objects.order_by('user_id', 'date'))
+    for summary in summaries:
+        totals[summary.user_id] = totals.get(summary.user_id, 0.0) + summary.net_calories
+        summary.cumulative_net = totals[summary.user_id]
+    DailyCalorieSummary.objects.bulk_update(summaries, ['cumulative_net'], batch_size=500)
+
+    users = list(CustomUser.objects.filter(pk__in=totals).only('pk'))
+    for user in users:
+        user.cumulative_net_calories = totals[user.pk]
+    CustomUser.objects.bulk_update(users, ['cumulative_net_calories'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('FitHub', '0026_dailycaloriesummary_ledger'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='cumulative_net_calories',
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.AddField(
+            model_name='dailycaloriesummary',
+            name='cumulative_net',
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.RunPython(backfill_cumulative_net, migrations.RunPython.noop),
+    ]
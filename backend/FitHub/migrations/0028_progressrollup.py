@@ -0,0 +1,75 @@
+# Generated by Django 5.1.4 on 2026-10-18 13:41
+
+import django.db.models.deletion
+from django.conf import settings
+from collections import defaultdict
+from datetime import timedelta
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill_rollups(apps, schema_editor):
+    """Group workouts and eaten meals by day in the database, then fold days into weeks and months."""
+    Workout = apps.get_model('FitHub', 'Workout')
+    MealPlan = apps.get_model('FitHub', 'MealPlan')
+    ProgressRollup = apps.get_model('FitHub', 'ProgressRollup')
+
+    totals = defaultdict(lambda: [0.0, 0, 0.0])
+
+    def add(user_id, day, workout_calories=0.0, workout_count=0, meal_calories=0.0):
+        for granularity, start in (('week', day - timedelta(days=day.weekday())), ('month', day.replace(day=1))):
+            bucket = totals[(user_id, granularity, start)]
+            bucket[0] += workout_calories
+            bucket[1] += workout_count
+            bucket[2] += meal_calories
+
+    workouts = Workout.objects.values('user_id', 'workout_date').annotate(calories=Sum('total_calories'), count=Count('id'))
+    for row in workouts.iterator():
+        add(row['user_id'], row['workout_date'], workout_calories=row['calories'] or 0.0, workout_count=row['count'])
+
+    meals = (
+        MealPlan.objects.filter(is_consumed=True)
+        .annotate(day=TruncDate('created_at'))
+        .values('user_id', 'day')
+        .annotate(calories=Sum('calories'))
+    )
+    for row in meals.iterator():
+        add(row['user_id'], row['day'], meal_calories=row['calories'] or 0.0)
+
+    ProgressRollup.objects.bulk_create(
+        [
+            ProgressRollup(
+                user_id=user_id, granularity=granularity, period_start=start,
+                workout_calories=calories, workout_count=count, meal_calories=meal_calories,
+            )
+            for (user_id, granularity, start), (calories, count, meal_calories) in totals.items()
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('FitHub', '0027_cumulative_net_calories'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProgressRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularity', models.CharField(choices=[('week', 'Week'), ('month', 'Month')], max_length=5)),
+                ('period_start', models.DateField()),
+                ('workout_calories', models.FloatField(default=0.0)),
+                ('workout_count', models.IntegerField(default=0)),
+                ('meal_calories', models.FloatField(default=0.0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='progress_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'granularity', 'period_start')},
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 5.1.4 on 2026-10-18 13:44
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+ACTIVITY_MULTIPLIERS = {'sedentary': 1.2, 'light': 1.375, 'moderate': 1.55, 'active': 1.725, 'very active': 1.9}
+INPUT_FIELDS = ('weight', 'height', 'age', 'gender', 'goal', 'goal_weight', 'goal_duration', 'activity_level')
+
+
+def backfill_calorie_targets(apps, schema_editor):
+    """One row per user, effective from sign-up, with the target as of this migration."""
+    CustomUser = apps.get_model('FitHub', 'CustomUser')
+    CalorieTargetHistory = apps.get_model('FitHub', 'CalorieTargetHistory')
+
+    entries = []
+    for user in CustomUser.objects.only('pk', 'created_at', *INPUT_FIELDS).iterator(chunk_size=1000):
+        bmr = 10 * user.weight + 6.25 * user.height - 5 * user.age + (5 if user.gender == 'male' else -161)
+        tdee = bmr * ACTIVITY_MULTIPLIERS.get(user.activity_level, 1.55)
+        days = int(user.goal_duration.split()[0]) * 30 if user.goal_duration else 90
+        adjustment = abs((user.goal_weight or user.weight) - user.weight) * 7700 / days if days else 0
+        if user.goal == 'Weight Loss':
+            target = round(tdee - adjustment)
+        elif user.goal == 'Weight Gain':
+            target = round(tdee + adjustment)
+        else:
+            target = None
+        entries.append(CalorieTargetHistory(
+            user_id=user.pk,
+            effective_date=user.created_at.date(),
+            **{name: getattr(user, name) for name in INPUT_FIELDS},
+            bmr=bmr,
+            tdee=tdee,
+            daily_target=target,
+        ))
+    CalorieTargetHistory.objects.bulk_create(entries, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('FitHub', '0028_progressrollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CalorieTargetHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('effective_date', models.DateField()),
+                ('weight', models.FloatField()),
+                ('height', models.FloatField()),
+                ('age', models.IntegerField()),
+                ('gender', models.CharField(max_length=10, null=True)),
+                ('goal', models.CharField(max_length=255)),
+                ('goal_weight', models.FloatField(blank=True, null=True)),
+                ('goal_duration', models.CharField(blank=True, max_length=20, null=True)),
+                ('activity_level', models.CharField(max_length=20)),
+                ('bmr', models.FloatField()),
+                ('tdee', models.FloatField()),
+                ('daily_target', models.FloatField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='calorie_targets', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'effective_date')},
+            },
+        ),
+        migrations.RunPython(backfill_calorie_targets, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.1.4 on 2026-10-18 13:48
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models.functions import TruncDate
+
+
+def backfill_plan_date(apps, schema_editor):
+    MealPlan = apps.get_model('FitHub', 'MealPlan')
+    # TruncDate converts to the current time zone, like timezone.localdate()
+    MealPlan.objects.update(plan_date=TruncDate('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('FitHub', '0029_calorie_target_history'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mealplan',
+            name='plan_date',
+            field=models.DateField(default=django.utils.timezone.localdate),
+        ),
+        migrations.RunPython(backfill_plan_date, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='mealplan',
+            index=models.Index(fields=['user', 'plan_date', 'is_consumed'], name='FitHub_meal_user_id_81a6e6_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-18 13:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('FitHub', '0030_mealplan_plan_date'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workoutexercise',
+            name='client_id',
+            field=models.UUIDField(blank=True, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.1.4 on 2026-10-18 14:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('FitHub', '0031_workoutexercise_client_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PoseRegistryVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-18 14:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('FitHub', '0032_poseregistryversion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='response_version',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.1.4 on 2026-10-18 14:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('FitHub', '0033_customuser_response_version'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='workoutexercise',
+            name='client_id',
+            field=models.UUIDField(blank=True, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='workoutexercise',
+            constraint=models.UniqueConstraint(fields=('workout', 'client_id'), name='unique_workout_exercise_client_id'),
+        ),
+    ]
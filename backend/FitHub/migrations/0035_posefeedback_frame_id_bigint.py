@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-18 14:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('FitHub', '0034_workoutexercise_client_id_per_workout'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='posefeedback',
+            name='frame_id',
+            field=models.BigIntegerField(),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.1.4 on 2026-10-18 14:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('FitHub', '0035_posefeedback_frame_id_bigint'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='posekeypointchunk',
+            name='first_frame_id',
+            field=models.BigIntegerField(),
+        ),
+        migrations.AlterField(
+            model_name='posekeypointchunk',
+            name='format_version',
+            field=models.PositiveSmallIntegerField(default=2),
+        ),
+        migrations.AlterField(
+            model_name='posekeypointchunk',
+            name='last_frame_id',
+            field=models.BigIntegerField(),
+        ),
+        migrations.AlterField(
+            model_name='poserepsummary',
+            name='end_frame_id',
+            field=models.BigIntegerField(),
+        ),
+        migrations.AlterField(
+            model_name='poserepsummary',
+            name='start_frame_id',
+            field=models.BigIntegerField(),
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 5.1.4 on 2026-10-18 16:05
+
+from bisect import bisect_right
+from collections import defaultdict
+
+from django.db import migrations, models
+
+
+def backfill_energy_balance(apps, schema_editor):
+    """tdee from the CalorieTargetHistory row in effect each day, then the balances and their prefix sums."""
+    CalorieTargetHistory = apps.get_model('FitHub', 'CalorieTargetHistory')
+    CustomUser = apps.get_model('FitHub', 'CustomUser')
+    DailyCalorieSummary = apps.get_model('FitHub', 'DailyCalorieSummary')
+
+    history = defaultdict(list)
+    for user_id, effective_date, tdee in CalorieTargetHistory.objects.order_by(
+        'user_id', 'effective_date'
+    ).values_list('user_id', 'effective_date', 'tdee'):
+        history[user_id].append((effective_date, tdee))
+
+    totals = {}
+    summaries = list(DailyCalorieSummary.objects.order_by('user_id', 'date'))
+    for summary in summaries:
+        entries = history.get(summary.user_id)
+        if entries:
+            index = bisect_right(entries, (summary.date, float('inf'))) - 1
+            summary.tdee = entries[max(index, 0)][1]
+        if summary.calories_consumed > 0:
+            summary.energy_balance = summary.calories_consumed - summary.calories_burned - summary.tdee
+        else:
+            summary.energy_balance = 0.0
+        totals[summary.user_id] = totals.get(summary.user_id, 0.0) + summary.energy_balance
+        summary.cumulative_balance = totals[summary.user_id]
+    DailyCalorieSummary.objects.bulk_update(
+        summaries, ['tdee', 'energy_balance', 'cumulative_balance'], batch_size=500
+    )
+
+    CustomUser.objects.exclude(pk__in=totals).update(cumulative_energy_balance=0.0)
+    users = list(CustomUser.objects.filter(pk__in=totals).only('pk'))
+    for user in users:
+        user.cumulative_energy_balance = totals[user.pk]
+    CustomUser.objects.bulk_update(users, ['cumulative_energy_balance'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('FitHub', '0036_pose_frame_ids_bigint'),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name='customuser',
+            old_name='cumulative_net_calories',
+            new_name='cumulative_energy_balance',
+        ),
+        migrations.RenameField(
+            model_name='dailycaloriesummary',
+            old_name='cumulative_net',
+            new_name='cumulative_balance',
+        ),
+        migrations.AddField(
+            model_name='dailycaloriesummary',
+            name='tdee',
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.AddField(
+            model_name='dailycaloriesummary',
+            name='energy_balance',
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.RunPython(backfill_energy_balance, migrations.RunPython.noop),
+    ]
@@ -7,9 +7,11 @@ from django.utils import timezone
 from django.db.models import Sum
 from django.conf import settings
 from datetime import datetime
-from collections import defaultdict
+from collections import defaultdict, namedtuple
 from django.db.models import Sum, Avg, Count
 from datetime import timedelta, date
+import numpy as np
+from FitHub.utils import poseCodec
 
 
 class CustomUserManager(BaseUserManager):
@@ -55,91 +57,148 @@ class CustomUser(AbstractUser):
     ]
     activity_level = models.CharField(max_length=20, choices=ACTIVITY_LEVEL_CHOICES, default='moderate')
     created_at = models.DateTimeField(auto_now_add=True)
+    # Sum of energy_balance over all daily summaries, kept by DailyCalorieSummary
+    cumulative_energy_balance = models.FloatField(default=0.0)
+    # Bumped on every write to the user's data; part of the cached response keys (see responseCache)
+    response_version = models.PositiveBigIntegerField(default=0)
+
+    # Only ever changed with F() updates, so a save() of a stale instance must not write them back
+    LEDGER_FIELDS = ('cumulative_energy_balance', 'response_version')
+    # Inputs of calculate_calories; a change to any of them starts a new CalorieTargetHistory row
+    TARGET_INPUT_FIELDS = (
+        'weight', 'height', 'age', 'gender', 'goal', 'goal_weight', 'goal_duration', 'activity_level',
+    )
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if set(cls.TARGET_INPUT_FIELDS) <= set(field_names):
+            instance._saved_target_inputs = instance.target_inputs()
+        return instance
+
+    def target_inputs(self):
+        return tuple(getattr(self, name) for name in self.TARGET_INPUT_FIELDS)
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.LEDGER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and not set(update_fields) & set(self.TARGET_INPUT_FIELDS):
+            return
+        inputs = self.target_inputs()
+        if getattr(self, '_saved_target_inputs', None) != inputs:
+            CalorieTargetHistory.record(self)
+            self._saved_target_inputs = inputs
 
     def calculate_calories(self, activity_level=None):
-        activity_level = activity_level or self.activity_level
-        if self.gender == 'male':
-            bmr = 10 * self.weight + 6.25 * self.height - 5 * self.age + 5
-        else:
-            bmr = 10 * self.weight + 6.25 * self.height - 5 * self.age - 161
-
-        activity_multipliers = {
-            'sedentary': 1.2,
-            'light': 1.375,
-            'moderate': 1.55,
-            'active': 1.725,
-            'very active': 1.9,
-        }
-        tdee = bmr * activity_multipliers.get(activity_level, 1.55)
+        """Target computed from the current inputs; readers use get_calorie_target() instead."""
+        from FitHub.utils import calorieTargets
 
-        weight_change = abs((self.goal_weight or self.weight) - self.weight)
-        duration_in_days = int(self.goal_duration.split()[0]) * 30 if self.goal_duration else 90
-        daily_adjustment = (weight_change * 7700) / duration_in_days if duration_in_days else 0
+        _, _, target = calorieTargets.compute_targets(
+            [self.weight], [self.height], [self.age], [self.gender], [self.goal],
+            [self.goal_weight], [self.goal_duration], [activity_level or self.activity_level],
+        )
+        return calorieTargets.calorie_dict(self.goal, target[0])
 
-        if self.goal == 'Weight Loss':
-            return {'weight_loss': round(tdee - daily_adjustment)}
-        elif self.goal == 'Weight Gain':
-            return {'weight_gain': round(tdee + daily_adjustment)}
-        return {}
+    def get_calorie_target(self, as_of=None):
+        """
+        Calorie target dict in effect on `as_of` (default today), read from
+        CalorieTargetHistory so a day keeps the target it was planned with.
+        """
+        entry = CalorieTargetHistory.as_of(self, as_of or timezone.localdate())
+        if entry is None:
+            return self.calculate_calories()
+        return entry.as_calorie_dict()
+
+    def get_tdee(self, as_of=None):
+        """TDEE in effect on `as_of` (default today), read from CalorieTargetHistory like the target."""
+        entry = CalorieTargetHistory.as_of(self, as_of or timezone.localdate())
+        if entry is not None:
+            return entry.tdee
+        from FitHub.utils import calorieTargets
+
+        _, tdee, _ = calorieTargets.compute_targets(
+            [self.weight], [self.height], [self.age], [self.gender], [self.goal],
+            [self.goal_weight], [self.goal_duration], [self.activity_level],
+        )
+        return float(tdee[0])
 
     def get_estimated_current_weight(self):
         """
-        Estimate current weight based on net calories consumed over time.
-        7700 kcal ≈ 1 kg weight change.
+        Estimate current weight from the energy balance summed over all days
+        (see DailyCalorieSummary.energy_balance). 7700 kcal ≈ 1 kg weight change.
         """
-        total_net_calories = self.daily_summaries.aggregate(total=Sum('net_calories'))['total'] or 0
-        weight_change = total_net_calories / 7700.0
+        weight_change = self.cumulative_energy_balance / 7700.0
         estimated_weight = round(self.weight + weight_change, 2)
         return estimated_weight
 
+    def get_weight_forecast(self, days=28):
+        """
+        Project the date goal_weight is reached from the average daily energy
+        balance of the last `days` days, the same balance the estimated
+        weight is built from (see DailyCalorieSummary.energy_balance). The
+        window total is the difference of two stored prefix sums.
+        """
+        import math
+
+        today = date.today()
+        window_balance = (
+            DailyCalorieSummary.cumulative_as_of(self, today)
+            - DailyCalorieSummary.cumulative_as_of(self, today - timedelta(days=days))
+        )
+        kg_per_day = window_balance / days / 7700.0
+        estimated_weight = self.get_estimated_current_weight()
+
+        forecast = {
+            'estimated_current_weight': estimated_weight,
+            'goal_weight': self.goal_weight,
+            'window_days': days,
+            'avg_daily_energy_balance': round(window_balance / days, 2),
+            'kg_per_week': round(kg_per_day * 7, 3),
+            'days_to_goal': None,
+            'projected_date': None,
+        }
+        if self.goal_weight is None:
+            return {**forecast, 'status': 'no_goal'}
+
+        remaining = self.goal_weight - estimated_weight
+        if abs(remaining) < 0.05:
+            return {**forecast, 'days_to_goal': 0, 'projected_date': today, 'status': 'reached'}
+        if kg_per_day == 0 or (remaining > 0) != (kg_per_day > 0):
+            return {**forecast, 'status': 'off_track'}
+
+        days_to_goal = math.ceil(remaining / kg_per_day)
+        if days_to_goal > 3650:
+            return {**forecast, 'status': 'off_track'}
+        return {
+            **forecast,
+            'days_to_goal': days_to_goal,
+            'projected_date': today + timedelta(days=days_to_goal),
+            'status': 'on_track',
+        }
+
     def get_calorie_trend(self, days=30):
         """
-        Returns daily average calories consumed, burned, and net calories for past `days`.
+        Returns daily calories consumed, burned, and net calories for past `days`.
         """
-        from django.db.models.functions import TruncDate
+        from FitHub.utils import trends
 
         start_date = date.today() - timedelta(days=days)
-        summaries = self.daily_summaries.filter(date__gte=start_date).order_by('date')
-
-        trend_data = []
-        for day in (start_date + timedelta(n) for n in range(days)):
-            day_summary = summaries.filter(date=day).first()
-            if day_summary:
-                trend_data.append({
-                    'date': day,
-                    'calories_consumed': day_summary.calories_consumed,
-                    'calories_burned': day_summary.calories_burned,
-                    'net_calories': day_summary.net_calories,
-                })
-            else:
-                trend_data.append({
-                    'date': day,
-                    'calories_consumed': 0,
-                    'calories_burned': 0,
-                    'net_calories': 0,
-                })
-        return trend_data
+        return trends.calorie_trend(self, start_date, start_date + timedelta(days=days - 1), rolling=False)
 
     def get_workout_trend(self, days=30):
         """
         Returns daily workout counts and calories burned for the past `days`.
         """
-        start_date = date.today() - timedelta(days=days)
-        workouts = self.workouts.filter(workout_date__gte=start_date)
-
-        daily_data = defaultdict(lambda: {'workout_count': 0, 'calories_burned': 0})
-
-        for workout in workouts:
-            day = workout.workout_date
-            daily_data[day]['workout_count'] += 1
-            daily_data[day]['calories_burned'] += workout.total_calories or 0
+        from FitHub.utils import trends
 
-        trend_data = []
-        for day in (start_date + timedelta(n) for n in range(days)):
-            data = daily_data.get(day, {'workout_count': 0, 'calories_burned': 0})
-            trend_data.append({'date': day, **data})
-
-        return trend_data
+        start_date = date.today() - timedelta(days=days)
+        return trends.workout_trend(self, start_date, start_date + timedelta(days=days - 1))
 
     def get_progress_summary(self):
         """
@@ -207,7 +266,7 @@ class CustomUser(AbstractUser):
         }
     
     def get_daily_calorie_goal(self):
-        data = self.calculate_calories()
+        data = self.get_calorie_target()
         if self.goal == "Weight Loss":
             return data.get("weight_loss", 1800)
         elif self.goal == "Weight Gain":
@@ -252,11 +311,143 @@ class Workout(models.Model):
     workout_library = models.ForeignKey(WorkoutLibrary, on_delete=models.SET_NULL, null=True, blank=True)
 
     def calculate_total_calories(self):
-        total = sum(ex.calculate_calories() for ex in self.exercises.all())
-        self.total_calories = total
-        self.save()
+        """
+        Recompute every exercise's calories from its MET and duration and
+        set the workout total to their sum: one read, one bulk update of the
+        exercises and one update of the workout.
+        """
+        from django.db import transaction
+
+        weight_kg = self.user.weight
+        with transaction.atomic():
+            exercises = list(self.exercises.select_related('exercise').only('id', 'total_time', 'exercise__met'))
+            for exercise in exercises:
+                exercise.total_calories = WorkoutExercise.calories_for(exercise.exercise, exercise.total_time, weight_kg)
+            WorkoutExercise.objects.bulk_update(exercises, ['total_calories'], batch_size=500)
+
+            total = sum(exercise.total_calories for exercise in exercises)
+            previous = Workout.objects.select_for_update().filter(pk=self.pk).values_list(
+                'total_calories', flat=True
+            ).first() or 0
+            Workout.objects.filter(pk=self.pk).update(total_calories=total)
+            self.total_calories = total
+            self.record_calories(total - previous)
         return total
 
+    def add_totals(self, seconds=0, calories=0.0):
+        """
+        Add to total_time / total_calories with F() expressions, so
+        concurrent exercises ending at once are all counted, and carry the
+        calories into the ledgers.
+        """
+        from django.db.models import Value
+        from django.db.models.functions import Coalesce
+
+        Workout.objects.filter(pk=self.pk).update(
+            total_time=Coalesce('total_time', Value(timedelta(0))) + timedelta(seconds=seconds),
+            total_calories=Coalesce('total_calories', Value(0.0)) + calories,
+        )
+        self.record_calories(calories)
+
+    @classmethod
+    def with_child_totals(cls):
+        """Workouts annotated with child_time / child_calories, the sums over their exercises."""
+        from django.db.models import OuterRef, Subquery, Value
+        from django.db.models.functions import Coalesce
+
+        sums = WorkoutExercise.objects.filter(workout=OuterRef('pk')).values('workout').order_by()
+        return cls.objects.annotate(
+            child_time=Coalesce(
+                Subquery(sums.annotate(total=Sum('total_time')).values('total'), output_field=models.DurationField()),
+                Value(timedelta(0)),
+            ),
+            child_calories=Coalesce(
+                Subquery(sums.annotate(total=Sum('total_calories')).values('total'), output_field=models.FloatField()),
+                Value(0.0),
+            ),
+        )
+
+    def record_calories(self, change):
+        """Carry a change of total_calories into the daily summary and progress rollups."""
+        if not change:
+            return
+        DailyCalorieSummary.apply_delta(self.user, self.workout_date, burned=change)
+        ProgressRollup.add(self.user_id, self.workout_date, workout_calories=change)
+
+    @classmethod
+    def sync(cls, user, workouts, exercises):
+        """
+        Apply workouts recorded offline, in one transaction.
+
+        `workouts` are validated SyncedWorkoutSerializer documents and
+        `exercises` maps lower-cased exercise names to Exercise rows.
+        Exercises go into the user's workout of their day (created when
+        missing, as StartExerciseView does) with one bulk insert, their sets
+        with ExercisePerformance.log_many, and each day's totals and ledgers
+        are updated once. Exercises whose client_id this user already synced
+        are skipped, so retrying an upload is harmless; ids are only compared
+        within the user's own workouts, so another user's id never collides.
+
+        Returns {client_id: (workout_exercise_id, created)} for every
+        exercise in the upload.
+        """
+        from django.db import transaction
+        from FitHub.utils.responseCache import bump_user_version
+
+        uploaded = [(workout, exercise) for workout in workouts for exercise in workout['exercises']]
+        with transaction.atomic():
+            # Retries of the same upload wait here and then see its exercises as synced
+            CustomUser.objects.select_for_update().filter(pk=user.pk).exists()
+            results = {
+                client_id: (pk, False)
+                for client_id, pk in WorkoutExercise.objects.filter(
+                    workout__user=user, client_id__in=[exercise['client_id'] for _, exercise in uploaded]
+                ).values_list('client_id', 'id')
+            }
+            pending = [(workout, exercise) for workout, exercise in uploaded if exercise['client_id'] not in results]
+            if not pending:
+                return results
+
+            days = {}
+            for workout in cls.objects.filter(
+                user=user, workout_date__in={workout['workout_date'] for workout, _ in pending}
+            ).order_by('-id'):
+                days[workout.workout_date] = workout  # the earliest workout of a day wins
+            for day in sorted({workout['workout_date'] for workout, _ in pending} - set(days)):
+                days[day] = cls.objects.create(
+                    user=user, workout_date=day, total_time=timedelta(seconds=0), total_calories=0
+                )
+
+            rows = [
+                WorkoutExercise(
+                    workout=days[workout['workout_date']],
+                    exercise=exercises[exercise['exercise_name'].lower()],
+                    start_date=workout['workout_date'],
+                    total_time=timedelta(seconds=exercise['total_time_seconds']),
+                    total_calories=exercise['calories_burned'],
+                    client_id=exercise['client_id'],
+                )
+                for workout, exercise in pending
+            ]
+            WorkoutExercise.objects.bulk_create(rows)
+            ExercisePerformance.log_many(
+                (row, performance_set)
+                for row, (_, exercise) in zip(rows, pending)
+                for performance_set in exercise.get('sets', [])
+            )
+
+            totals = defaultdict(lambda: [0.0, 0.0])
+            for row in rows:
+                totals[row.workout][0] += row.total_time.total_seconds()
+                totals[row.workout][1] += row.total_calories
+            for workout, (seconds, calories) in totals.items():
+                workout.add_totals(seconds, calories)
+
+            # bulk_create skips the post_save handler that invalidates cached responses
+            bump_user_version(user.pk)
+            results.update({row.client_id: (row.pk, True) for row in rows})
+        return results
+
     def __str__(self):
         return f"Workout for {self.user.email} on {self.workout_date}"
 
@@ -273,6 +464,57 @@ class Exercise(models.Model):
         return self.name
     
 
+class PoseType(models.Model):
+    """
+    Registry entry for a pose type tracked by the camera screen. Read through
+    FitHub.utils.poseRegistry rather than queried directly.
+    """
+    ANALYZER_CHOICES = [
+        ('squat', 'Squat'),
+        ('lunge', 'Lunge'),
+    ]
+
+    name = models.CharField(max_length=100, unique=True)  # normalized, e.g. "squat"
+    label = models.CharField(max_length=100, blank=True)  # e.g. "Squat"
+    exercise = models.ForeignKey(Exercise, on_delete=models.SET_NULL, null=True, blank=True, related_name='pose_types')
+    met = models.FloatField(null=True, blank=True)  # falls back to exercise.met
+    analyzer = models.CharField(max_length=20, choices=ANALYZER_CHOICES, blank=True)
+
+    # Angle thresholds in degrees; empty fields use the analyzer defaults
+    down_angle = models.FloatField(null=True, blank=True)
+    up_angle = models.FloatField(null=True, blank=True)
+    target_angle = models.FloatField(null=True, blank=True)
+    tolerance = models.FloatField(null=True, blank=True)
+    torso_min_angle = models.FloatField(null=True, blank=True)
+
+    def save(self, *args, **kwargs):
+        from FitHub.utils.poseAnalysis import normalize_pose_type
+        self.name = normalize_pose_type(self.name)
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return self.label or self.name
+
+
+class PoseRegistryVersion(models.Model):
+    """
+    Single row counting PoseType / Exercise changes. It is bumped in the
+    transaction that makes the change, so every process sees a new version
+    exactly when the change itself becomes visible (see poseRegistry).
+    """
+    version = models.PositiveBigIntegerField(default=0)
+
+    @classmethod
+    def current(cls):
+        return cls.objects.filter(pk=1).values_list('version', flat=True).first() or 0
+
+    @classmethod
+    def bump(cls):
+        from django.db.models import F
+        if not cls.objects.filter(pk=1).update(version=F('version') + 1):
+            cls.objects.get_or_create(pk=1, defaults={'version': 1})
+
+
 class WorkoutExercise(models.Model):
     # Temporarily allow null so Django can migrate existing rows
     exercise = models.ForeignKey(
@@ -286,23 +528,54 @@ class WorkoutExercise(models.Model):
     start_date = models.DateField(default=now)
     total_time = models.DurationField(null=True, blank=True)
     total_calories = models.FloatField(default=0.0)
+    # Id generated by the app for exercises uploaded through Workout.sync, so a retried upload is not applied twice.
+    # Unique per workout in the database; sync holds the user's row lock, which makes it unique per user.
+    client_id = models.UUIDField(null=True, blank=True)
 
-    def calculate_calories(self):
-        user = self.workout.user
-        weight_kg = user.weight
-        mins = self.total_time.total_seconds() / 60 if self.total_time else 60
-
-        if not self.exercise or not self.exercise.met or not weight_kg or mins <= 0:
-            self.total_calories = 0.0
-            self.save(update_fields=['total_calories'])
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['workout', 'client_id'],
+                name='unique_workout_exercise_client_id',
+            ),
+        ]
+
+    @staticmethod
+    def calories_for(exercise, total_time, weight_kg):
+        """MET-based calories for an exercise done for total_time (an hour when unknown)."""
+        mins = total_time.total_seconds() / 60 if total_time else 60
+        if not exercise or not exercise.met or not weight_kg or mins <= 0:
             return 0.0
+        return round(exercise.met * weight_kg * 0.0175 * mins, 2)
 
-        met = self.exercise.met
-        calories = met * weight_kg * 0.0175 * mins
-        self.total_calories = round(calories, 2)
+    def calculate_calories(self):
+        self.total_calories = self.calories_for(self.exercise, self.total_time, self.workout.user.weight)
         self.save(update_fields=['total_calories'])
         return self.total_calories
 
+    def finish(self, seconds, calories):
+        """
+        End the exercise: set its duration, add its calories and add both to
+        the workout, all as F() updates so concurrent ends don't lose one.
+        Only an exercise that has not ended yet is updated, so a repeated
+        end (e.g. a retried request) changes nothing and returns False.
+        """
+        from django.db import transaction
+        from django.db.models import F
+        from FitHub.utils.responseCache import bump_user_version
+
+        with transaction.atomic():
+            ended = WorkoutExercise.objects.filter(pk=self.pk, total_time__isnull=True).update(
+                total_time=timedelta(seconds=seconds),
+                total_calories=F('total_calories') + calories,
+            )
+            if not ended:
+                return False
+            self.workout.add_totals(seconds, calories)
+            # Queryset updates skip the post_save handler that invalidates cached responses
+            bump_user_version(self.workout.user_id)
+        return True
+
 
 class ExercisePerformance(models.Model):
     workout_exercise = models.ForeignKey(WorkoutExercise, on_delete=models.CASCADE, related_name="performance")
@@ -310,6 +583,34 @@ class ExercisePerformance(models.Model):
     reps = models.IntegerField()
     weight = models.FloatField()
 
+    @classmethod
+    def log_sets(cls, workout_exercise, sets):
+        """
+        Insert validated sets ({set_number, reps, weight} dicts) and their
+        ExerciseHistory rows with one bulk insert each, in one transaction.
+        bulk_create skips post_save, so the history rows the
+        create_exercise_history signal writes for single saves are built
+        here. Load workout_exercise with its workout and exercise.
+        """
+        return cls.log_many([(workout_exercise, s) for s in sets])
+
+    @classmethod
+    def log_many(cls, entries):
+        """log_sets for (workout_exercise, set) pairs spanning several exercises."""
+        from django.db import transaction
+
+        performances = [
+            cls(workout_exercise=workout_exercise, set_number=s['set_number'], reps=s['reps'], weight=s['weight'])
+            for workout_exercise, s in entries
+        ]
+        if not performances:
+            return performances
+        with transaction.atomic():
+            cls.objects.bulk_create(performances)
+            histories = [ExerciseHistory.for_performance(p) for p in performances]
+            ExerciseHistory.objects.bulk_create([h for h in histories if h is not None])
+        return performances
+
     def __str__(self):
         return f"{self.workout_exercise.exercise.name} - Set {self.set_number}: {self.reps} reps at {self.weight}kg"
 
@@ -331,49 +632,426 @@ class MealPlan(models.Model):
     dietary_restriction = models.CharField(max_length=50, blank=True, null=True)
     is_consumed = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Local date of created_at (both are set on insert), stored so per-day lookups can use the index below
+    plan_date = models.DateField(default=timezone.localdate)
+
+    class Meta:
+        indexes = [models.Index(fields=['user', 'plan_date', 'is_consumed'])]
+
+    def set_consumed(self, is_consumed):
+        """
+        Mark the meal (un)eaten and move its calories into or out of that
+        day's DailyCalorieSummary. is_consumed is parsed like a BooleanField
+        value, so "0" or "False" mean False and anything unrecognized raises
+        ValidationError instead of counting as True.
+        Returns False when nothing changed.
+        """
+        from django.db import transaction
+
+        is_consumed = models.BooleanField().to_python(is_consumed)
+        with transaction.atomic():
+            # Conditional update so a repeated toggle is never counted twice
+            changed = MealPlan.objects.filter(pk=self.pk, is_consumed=not is_consumed).update(is_consumed=is_consumed)
+            if changed:
+                day = self.plan_date
+                calories = self.calories if is_consumed else -self.calories
+                DailyCalorieSummary.apply_delta(self.user, day, consumed=calories)
+                ProgressRollup.add(self.user_id, day, meal_calories=calories)
+        self.is_consumed = is_consumed
+        return bool(changed)
 
     def __str__(self):
         return f"{self.user.username} - {self.meal} - {self.name}"
 
+class CalorieTargetHistory(models.Model):
+    """
+    A user's calorie target and the profile inputs it was computed from,
+    effective from effective_date until the next row. A row is written only
+    when the inputs change (or when recalculate_calorie_targets changes the
+    target), so past days keep the target they had.
+    """
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name="calorie_targets")
+    effective_date = models.DateField()
+    weight = models.FloatField()
+    height = models.FloatField()
+    age = models.IntegerField()
+    gender = models.CharField(max_length=10, null=True)
+    goal = models.CharField(max_length=255)
+    goal_weight = models.FloatField(null=True, blank=True)
+    goal_duration = models.CharField(max_length=20, null=True, blank=True)
+    activity_level = models.CharField(max_length=20)
+    bmr = models.FloatField()
+    tdee = models.FloatField()
+    daily_target = models.FloatField(null=True, blank=True)  # None for goals without a target
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('user', 'effective_date')
+
+    def target_inputs(self):
+        return tuple(getattr(self, name) for name in CustomUser.TARGET_INPUT_FIELDS)
+
+    def as_calorie_dict(self):
+        from FitHub.utils import calorieTargets
+
+        return calorieTargets.calorie_dict(self.goal, self.daily_target)
+
+    @classmethod
+    def record(cls, user, effective_date=None):
+        """
+        Store the user's current target from effective_date (default today)
+        on, unless the latest row already has the same inputs. Several
+        changes on one day leave a single row with the last of them.
+        """
+        from FitHub.utils import calorieTargets
+
+        latest = cls.objects.filter(user=user).order_by('-effective_date').first()
+        if latest is not None and latest.target_inputs() == user.target_inputs():
+            return latest
+
+        bmr, tdee, target = calorieTargets.compute_targets(
+            [user.weight], [user.height], [user.age], [user.gender], [user.goal],
+            [user.goal_weight], [user.goal_duration], [user.activity_level],
+        )
+        defaults = {name: getattr(user, name) for name in CustomUser.TARGET_INPUT_FIELDS}
+        defaults.update(
+            bmr=float(bmr[0]),
+            tdee=float(tdee[0]),
+            daily_target=None if np.isnan(target[0]) else float(target[0]),
+        )
+        entry, _ = cls.objects.update_or_create(
+            user=user, effective_date=effective_date or timezone.localdate(), defaults=defaults
+        )
+        return entry
+
+    @classmethod
+    def as_of(cls, user, date_val):
+        """
+        Row in effect on date_val. Days before the first row use the first
+        row, the closest thing to what the target was back then.
+        """
+        rows = cls.objects.filter(user=user)
+        return (
+            rows.filter(effective_date__lte=date_val).order_by('-effective_date').first()
+            or rows.order_by('effective_date').first()
+        )
+
+
 class DailyCalorieSummary(models.Model):
+    """
+    Running calorie ledger for one user and day. Rows are kept current by
+    apply_delta as meals are eaten, workouts ended and pose sets recorded,
+    so reading a day is a single row lookup.
+
+    net_calories is measured against the goal-adjusted target, for showing
+    how a day went against the plan. energy_balance is measured against
+    TDEE and drives the weight estimate and forecast; a day without logged
+    meals has unknown intake and counts as maintenance (0), the same as a
+    day without a row.
+    """
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name="daily_summaries")
     date = models.DateField(default=now)
     calories_consumed = models.FloatField(default=0.0)
     calories_burned = models.FloatField(default=0.0)
-    net_calories = models.FloatField(default=0.0)
+    net_calories = models.FloatField(default=0.0)  # consumed - burned - calorie_target
+    calorie_target = models.FloatField(default=0.0)  # user's daily target when the day was opened
+    tdee = models.FloatField(default=0.0)  # user's TDEE when the day was opened
+    energy_balance = models.FloatField(default=0.0)  # consumed - burned - tdee, 0 without logged meals
+    cumulative_balance = models.FloatField(default=0.0)  # energy_balance summed over this and all earlier days
 
-    def calculate_net_calories(self):
-        # 1. Total calories burned from workouts
-        burned = Workout.objects.filter(
-            user=self.user,
-            workout_date=self.date
-        ).aggregate(total=Sum('total_calories'))['total'] or 0
+    # Calories; ledger differences below this are float rounding
+    LEDGER_TOLERANCE = 0.01
+
+    class Meta:
+        unique_together = ('user', 'date')
 
-        # 2. Total calories consumed from meals marked as consumed
+    @staticmethod
+    def target_for(user, date_val=None):
+        target_data = user.get_calorie_target(as_of=date_val)
+        return target_data.get('weight_loss') or target_data.get('weight_gain') or 0
+
+    @staticmethod
+    def totals_for(user, date_val):
+        """(consumed, burned) for a day, recomputed from meals, workouts and pose sets."""
         consumed = MealPlan.objects.filter(
-            user=self.user,
+            user=user,
             is_consumed=True,
-            created_at__date=self.date
+            plan_date=date_val
         ).aggregate(total=Sum('calories'))['total'] or 0
+        workout_burned = Workout.objects.filter(
+            user=user,
+            workout_date=date_val
+        ).aggregate(total=Sum('total_calories'))['total'] or 0
+        return consumed, workout_burned + PoseExerciseSet.get_daily_calories(user, date_val)
 
-        self.calories_burned = burned
-        self.calories_consumed = consumed
+    @staticmethod
+    def balance_of(consumed, burned, tdee):
+        """energy_balance of a day; without logged meals the intake is unknown and counted as maintenance."""
+        return consumed - burned - tdee if consumed > 0 else 0.0
 
-        # 3. Fetch user target calorie goal
-        target_data = self.user.calculate_calories(activity_level=self.user.activity_level)
-        base_target = target_data.get('weight_loss') or target_data.get('weight_gain') or 0
+    @classmethod
+    def apply_delta(cls, user, date_val, consumed=0.0, burned=0.0, open_day=True):
+        """
+        Add consumed / burned calories to a day with F() expressions.
 
-        # 4. Compute net calories depending on user's goal
-        if self.user.goal == 'Weight Gain':
-            goal_threshold = base_target + burned
-            self.net_calories = consumed - goal_threshold
-        elif self.user.goal == 'Weight Loss':
-            goal_threshold = base_target - burned
-            self.net_calories = goal_threshold - consumed
+        Call this after the source row has been written, in the same
+        transaction. A day without a row yet is opened from totals_for(),
+        which already includes that write, so the delta is not applied twice.
+        With open_day=False a missing day is left alone instead.
+
+        The user row is locked first, so ledger writes for one user are
+        serialized, the day read below stays current until it is updated and
+        the cumulative_balance prefix sums stay consistent.
+        """
+        from django.db import transaction
+        from django.db.models import F
+        from FitHub.utils.responseCache import bump_user_version
+
+        if not consumed and not burned:
+            return
+
+        bump_user_version(user.pk)
+        with transaction.atomic():
+            if not CustomUser.objects.select_for_update().filter(pk=user.pk).exists():
+                return
+            day = cls.objects.filter(user=user, date=date_val).values_list(
+                'calories_consumed', 'calories_burned', 'tdee', 'energy_balance'
+            ).first()
+            if day is not None:
+                day_consumed, day_burned, tdee, balance = day
+                new_balance = cls.balance_of(day_consumed + consumed, day_burned + burned, tdee)
+                cls.objects.filter(user=user, date=date_val).update(
+                    calories_consumed=F('calories_consumed') + consumed,
+                    calories_burned=F('calories_burned') + burned,
+                    net_calories=F('net_calories') + consumed - burned,
+                    energy_balance=new_balance,
+                )
+                cls.shift_cumulative(user, date_val, new_balance - balance)
+            elif open_day:
+                cls(user=user, date=date_val).calculate_net_calories()
+
+    @classmethod
+    def shift_cumulative(cls, user, date_val, change, include_day=True):
+        """Add a change of one day's energy_balance to the prefix sums from that day on and to the user's total."""
+        from django.db.models import F
+
+        if not change:
+            return
+        later = {'date__gte': date_val} if include_day else {'date__gt': date_val}
+        cls.objects.filter(user=user, **later).update(cumulative_balance=F('cumulative_balance') + change)
+        CustomUser.objects.filter(pk=user.pk).update(cumulative_energy_balance=F('cumulative_energy_balance') + change)
+
+    @classmethod
+    def cumulative_as_of(cls, user, date_val):
+        """Sum of energy_balance over every day up to and including date_val."""
+        return cls.objects.filter(user=user, date__lte=date_val).order_by('-date').values_list(
+            'cumulative_balance', flat=True
+        ).first() or 0.0
+
+    @classmethod
+    def rebuild_range(cls, first_user_id, last_user_id, start, end):
+        """
+        Set-based calculate_net_calories for every user with an id between
+        first_user_id and last_user_id and every day from start to end.
+
+        Sources are read with one grouped query each, the days are written
+        with a single bulk upsert, and the cumulative_balance of later days
+        and the users' totals are moved to continue from the rebuilt range.
+        Days without a row and without
+        activity stay absent, as with apply_delta. Existing rows keep their
+        calorie_target and tdee; new rows take the ones in effect that day.
+        Returns the number of days written.
+        """
+        from bisect import bisect_right
+        from itertools import chain
+        from django.db import transaction
+        from django.db.models import Case, F, OuterRef, Subquery, Value, When
+        from FitHub.utils.responseCache import bump_user_version
+
+        users = {'user__pk__range': (first_user_id, last_user_id)}
+        with transaction.atomic():
+            # Same lock as apply_delta, so live writes wait for the rebuild of their user.
+            # Prefix sums continue from each user's last day before the range.
+            def nearest_day(field, date_filter):
+                return Subquery(
+                    cls.objects.filter(user=OuterRef('pk'), **date_filter)
+                    .order_by('date' if 'date__gt' in date_filter else '-date').values(field)[:1]
+                )
+
+            ledger = {
+                user_id: (base or 0.0, total, next_cumulative, next_balance)
+                for user_id, base, total, next_cumulative, next_balance in
+                CustomUser.objects.select_for_update().filter(pk__range=(first_user_id, last_user_id)).annotate(
+                    base=nearest_day('cumulative_balance', {'date__lt': start}),
+                    next_cumulative=nearest_day('cumulative_balance', {'date__gt': end}),
+                    next_balance=nearest_day('energy_balance', {'date__gt': end}),
+                ).values_list('pk', 'base', 'cumulative_energy_balance', 'next_cumulative', 'next_balance')
+            }
+            if not ledger:
+                return 0
+
+            days = defaultdict(lambda: [0.0, 0.0])
+            meals = (
+                MealPlan.objects.filter(**users, is_consumed=True, plan_date__range=(start, end))
+                .values_list('user_id', 'plan_date')
+                .annotate(total=Sum('calories'))
+                .order_by()
+            )
+            for user_id, day, total in meals:
+                days[user_id, day][0] += total or 0
+            workouts = (
+                Workout.objects.filter(**users, workout_date__range=(start, end))
+                .values_list('user_id', 'workout_date')
+                .annotate(total=Sum('total_calories'))
+                .order_by()
+            )
+            pose_sets = (
+                PoseExerciseSet.objects.filter(**users, date__range=(start, end))
+                .values_list('user_id', 'date')
+                .annotate(total=Sum('calories_burned'))
+                .order_by()
+            )
+            for user_id, day, total in chain(workouts, pose_sets):
+                days[user_id, day][1] += total or 0
+
+            existing = dict(
+                ((user_id, day), (target, tdee)) for user_id, day, target, tdee in
+                cls.objects.filter(**users, date__range=(start, end)).values_list(
+                    'user_id', 'date', 'calorie_target', 'tdee'
+                )
+            )
+            for key in existing:
+                days[key]  # rows whose sources are all gone now are zeroed, not left stale
+
+            history = defaultdict(list)
+            for user_id, effective_date, target, tdee in CalorieTargetHistory.objects.filter(**users).order_by(
+                'user_id', 'effective_date'
+            ).values_list('user_id', 'effective_date', 'daily_target', 'tdee'):
+                history[user_id].append((effective_date, target or 0, tdee))
+
+            def targets_on(user_id, day):
+                entries = history.get(user_id)
+                if not entries:
+                    return 0, 0
+                index = bisect_right(entries, (day, float('inf'))) - 1
+                return entries[max(index, 0)][1:]
+
+            rows, running = [], {}
+            for (user_id, day), (consumed, burned) in sorted(days.items()):
+                target, tdee = existing[user_id, day] if (user_id, day) in existing else targets_on(user_id, day)
+                balance = cls.balance_of(consumed, burned, tdee)
+                running[user_id] = running.get(user_id, ledger[user_id][0]) + balance
+                rows.append(cls(
+                    user_id=user_id, date=day, calories_consumed=consumed, calories_burned=burned,
+                    net_calories=consumed - burned - target, calorie_target=target, tdee=tdee,
+                    energy_balance=balance, cumulative_balance=running[user_id],
+                ))
+            cls.objects.bulk_create(
+                rows,
+                batch_size=1000,
+                update_conflicts=True,
+                unique_fields=['user', 'date'],
+                update_fields=[
+                    'calories_consumed', 'calories_burned', 'net_calories', 'energy_balance', 'cumulative_balance',
+                ],
+            )
+
+            # Days after the range continue from its new end: their offset is taken from
+            # the first of them (cumulative minus its own balance), and the user's total
+            # becomes the new end plus the balance of those later days. Differences within
+            # LEDGER_TOLERANCE are float rounding and left alone.
+            later_balance = dict(
+                cls.objects.filter(**users, date__gt=end).values_list('user_id')
+                .annotate(total=Sum('energy_balance')).order_by()
+            )
+            shifts, totals = {}, {}
+            for user_id, end_cumulative in running.items():
+                _, total, next_cumulative, next_balance = ledger[user_id]
+                if next_cumulative is not None:
+                    change = end_cumulative - (next_cumulative - next_balance)
+                    if abs(change) > cls.LEDGER_TOLERANCE:
+                        shifts[user_id] = change
+                new_total = end_cumulative + later_balance.get(user_id, 0.0)
+                if abs(new_total - total) > cls.LEDGER_TOLERANCE:
+                    totals[user_id] = new_total
+
+            if shifts:
+                cls.objects.filter(user_id__in=shifts, date__gt=end).update(cumulative_balance=F('cumulative_balance') + Case(
+                    *[When(user_id=user_id, then=Value(change)) for user_id, change in shifts.items()],
+                    output_field=models.FloatField(),
+                ))
+            if totals:
+                CustomUser.objects.filter(pk__in=totals).update(cumulative_energy_balance=Case(
+                    *[When(pk=user_id, then=Value(total)) for user_id, total in totals.items()],
+                    output_field=models.FloatField(),
+                ))
+            for user_id in shifts.keys() | totals.keys():
+                bump_user_version(user_id)
+        return len(rows)
+
+    def calculate_net_calories(self):
+        """
+        Rebuild this day from its sources, e.g. to repair a ledger that has
+        drifted, and carry the change in energy balance into the cumulative totals.
+        """
+        previous_balance = self.energy_balance if self.pk else 0.0
+        self.calories_consumed, self.calories_burned = self.totals_for(self.user, self.date)
+        if not self.pk:
+            self.calorie_target = self.calorie_target or self.target_for(self.user, self.date)
+            self.tdee = self.tdee or self.user.get_tdee(self.date)
+        self.net_calories = self.calories_consumed - self.calories_burned - self.calorie_target
+        self.energy_balance = self.balance_of(self.calories_consumed, self.calories_burned, self.tdee)
+        change = self.energy_balance - previous_balance
+
+        if self.pk:
+            self.save(update_fields=['calories_consumed', 'calories_burned', 'net_calories', 'energy_balance'])
+            self.shift_cumulative(self.user, self.date, change)
         else:
-            self.net_calories = consumed - burned
+            self.cumulative_balance = (
+                self.cumulative_as_of(self.user, self.date - timedelta(days=1)) + self.energy_balance
+            )
+            self.save()
+            self.shift_cumulative(self.user, self.date, change, include_day=False)
+
+
+class ProgressRollup(models.Model):
+    """
+    Weekly (ISO weeks, starting Monday) and monthly totals of workouts and
+    eaten meals per user, for progress charts over long periods. Maintained
+    with ProgressRollup.add whenever a workout or a meal's consumed flag changes.
+    """
+    WEEK = 'week'
+    MONTH = 'month'
+    GRANULARITY_CHOICES = [(WEEK, 'Week'), (MONTH, 'Month')]
+
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='progress_rollups')
+    granularity = models.CharField(max_length=5, choices=GRANULARITY_CHOICES)
+    period_start = models.DateField()
+    workout_calories = models.FloatField(default=0.0)
+    workout_count = models.IntegerField(default=0)
+    meal_calories = models.FloatField(default=0.0)
+
+    class Meta:
+        unique_together = ('user', 'granularity', 'period_start')
+
+    @classmethod
+    def bucket_start(cls, granularity, day):
+        if granularity == cls.WEEK:
+            return day - timedelta(days=day.weekday())
+        return day.replace(day=1)
 
-        self.save()
+    @classmethod
+    def add(cls, user_id, day, workout_calories=0.0, workout_count=0, meal_calories=0.0):
+        from FitHub.utils.upsert import upsert_increment
+
+        if not (workout_calories or workout_count or meal_calories):
+            return
+        for granularity in (cls.WEEK, cls.MONTH):
+            upsert_increment(
+                cls,
+                {'user': user_id, 'granularity': granularity, 'period_start': cls.bucket_start(granularity, day)},
+                {'workout_calories': workout_calories, 'workout_count': workout_count, 'meal_calories': meal_calories},
+            )
 
 
 class WorkoutLibraryExercise(models.Model):
@@ -402,6 +1080,23 @@ class ExerciseHistory(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    @classmethod
+    def for_performance(cls, performance):
+        """Unsaved one-set history row for an ExercisePerformance, or None if it has no workout or exercise."""
+        we = performance.workout_exercise
+        if not we or not we.workout or not we.exercise:
+            return None
+        return cls(
+            user_id=we.workout.user_id,
+            exercise=we.exercise,
+            workout=we.workout,
+            workout_exercise=we,
+            date=we.start_date,
+            sets=1,
+            reps_per_set=performance.reps,
+            weight_per_set=performance.weight,
+        )
+
     def total_volume(self):
         return self.sets * self.reps_per_set * self.weight_per_set
 
@@ -465,12 +1160,12 @@ def get_today_summary(user):
     today = date.today()
     summary = DailyCalorieSummary.objects.filter(user=user, date=today).first()
 
-    meals_eaten = MealPlan.objects.filter(user=user, is_consumed=True, created_at__date=today).count()
+    meals_eaten = MealPlan.objects.filter(user=user, is_consumed=True, plan_date=today).count()
     workouts_done = Workout.objects.filter(user=user, workout_date=today).count()
 
     return {
-        "calories_consumed": summary.calories_consumed,
-        "calories_burned": summary.calories_burned,
+        "calories_consumed": summary.calories_consumed if summary else 0,
+        "calories_burned": summary.calories_burned if summary else 0,
         "meals_eaten": meals_eaten,
         "workouts_done": workouts_done,
     }
@@ -482,22 +1177,468 @@ class PoseEstimationSession(models.Model):
     ended_at = models.DateTimeField(null=True, blank=True)
     completed = models.BooleanField(default=False)
     feedback_score = models.FloatField(null=True, blank=True)
+    frames_compacted_at = models.DateTimeField(null=True, blank=True)
 
     def duration(self):
         if self.ended_at:
             return (self.ended_at - self.started_at).total_seconds()
         return None
 
+    def analyze(self):
+        """Rep count and form scores from the stored frames (see poseAnalysis)."""
+        from FitHub.utils.poseAnalysis import analyze_frames
+        return analyze_frames(self.pose_type, PoseKeypointChunk.load_session(self))
+
+    def finalize(self):
+        """
+        Post-completion work, run by the pose job worker: pack frames, grade
+        the session, create or refresh its PoseExerciseSet and calories.
+        """
+        PoseKeypointChunk.pack_session(self)
+        analysis = self.analyze()
+        if analysis:
+            self.feedback_score = analysis.score
+            # update() rather than save() so the completion signal is not re-fired
+            PoseEstimationSession.objects.filter(pk=self.pk).update(feedback_score=analysis.score)
+
+        from FitHub.utils import poseRegistry
+
+        pose = poseRegistry.lookup(self.pose_type)
+        set_date = self.ended_at.date() if self.ended_at else date.today()
+        pose_set, created_set = PoseExerciseSet.objects.get_or_create(
+            session=self,
+            defaults={
+                'user': self.user,
+                'exercise_id': pose.exercise_id if pose else None,
+                'date': set_date,
+                'duration_seconds': self.duration() or 0.0,
+                'reps': analysis.rep_count if analysis else 1,
+            }
+        )
+        if not created_set:
+            pose_set.duration_seconds = self.duration() or 0.0
+            previous_date = pose_set.date
+            if previous_date != set_date:
+                pose_set.date = set_date
+                pose_set.assign_set_number()
+            if analysis:
+                pose_set.reps = analysis.rep_count
+            pose_set.save(update_fields=['duration_seconds', 'date', 'reps', 'set_number', 'sequence_key'])
+            if previous_date != set_date:
+                # Move the set's calories over to the other day's totals
+                pose_set.add_to_rollup(-pose_set.calories_burned, sets=-1, date_val=previous_date)
+                pose_set.add_to_rollup(pose_set.calories_burned, sets=1)
+
+        pose_set.calculate_calories()
+        return pose_set
+
+    def summarize_reps(self):
+        """Write one PoseRepSummary per detected rep from the stored frames."""
+        from FitHub.utils.poseAnalysis import analyze_frames, rep_angle_stats
+
+        frames = PoseKeypointChunk.load_session(self)
+        analysis = analyze_frames(self.pose_type, frames)
+        if not analysis or not analysis.rep_count:
+            return 0
+
+        frame_seconds = getattr(settings, 'POSE_FRAME_ID_SECONDS', 0.1)
+        minima, maxima, means = rep_angle_stats(analysis)
+        summaries = []
+        for i, (start, _, end) in enumerate(analysis.rep_bounds.tolist()):
+            start_id, end_id = int(frames.frame_ids[start]), int(frames.frame_ids[end])
+            summaries.append(PoseRepSummary(
+                session=self,
+                rep_index=i + 1,
+                start_frame_id=start_id,
+                end_frame_id=end_id,
+                duration_seconds=round((end_id - start_id) * frame_seconds, 2),
+                angle_min=round(float(minima[i]), 2),
+                angle_max=round(float(maxima[i]), 2),
+                angle_mean=round(float(means[i]), 2),
+                form_score=round(float(analysis.rep_scores[i]), 1),
+            ))
+        PoseRepSummary.objects.bulk_create(summaries, ignore_conflicts=True)
+        return len(summaries)
+
+    def compact_frames(self, batch_size=5000):
+        """
+        Replace this session's stored frames with per-rep summaries.
+
+        Summaries are written first, together with frames_compacted_at, so an
+        interrupted run never summarizes a half-deleted session. Frames are then
+        deleted in batches of `batch_size` rows, each in its own short statement,
+        and a rerun picks up wherever the last one stopped.
+        Returns the number of frame rows and chunks deleted.
+        """
+        from django.db import transaction
+
+        if not self.frames_compacted_at:
+            with transaction.atomic():
+                self.summarize_reps()
+                self.frames_compacted_at = timezone.now()
+                PoseEstimationSession.objects.filter(pk=self.pk).update(frames_compacted_at=self.frames_compacted_at)
+
+        deleted = 0
+        chunk_batch = max(batch_size // poseCodec.CHUNK_FRAMES, 1)
+        for model, manager, size in (
+            (PoseFeedback, self.feedbacks, batch_size),
+            (PoseKeypointChunk, self.keypoint_chunks, chunk_batch),
+        ):
+            while True:
+                ids = list(manager.order_by('id').values_list('id', flat=True)[:size])
+                if not ids:
+                    break
+                deleted += model.objects.filter(id__in=ids).delete()[0]
+        return deleted
+
+
+class PoseSessionJob(models.Model):
+    """
+    Durable queue entry for finishing a completed pose session. Jobs live in
+    the database, so no broker is needed; `manage.py process_pose_jobs` runs them.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+    MAX_ATTEMPTS = 5
+    LOCK_TIMEOUT = timedelta(minutes=10)  # a running job older than this is assumed dead
+
+    session = models.OneToOneField(PoseEstimationSession, on_delete=models.CASCADE, related_name='completion_job')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.IntegerField(default=0)
+    last_error = models.TextField(blank=True, null=True)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'run_after'])]
+
+    @classmethod
+    def enqueue(cls, session):
+        job, _ = cls.objects.update_or_create(
+            session=session,
+            defaults={
+                'status': cls.STATUS_PENDING,
+                'attempts': 0,
+                'last_error': None,
+                'run_after': timezone.now(),
+                'locked_at': None,
+            }
+        )
+        return job
+
+    @classmethod
+    def claim(cls, limit=10):
+        """Lock up to `limit` runnable jobs for this worker and mark them running."""
+        from django.db import transaction
+        from django.db.models import F, Q
+
+        current = timezone.now()
+        with transaction.atomic():
+            jobs = list(
+                cls.objects.select_for_update(skip_locked=True)
+                .filter(
+                    Q(status=cls.STATUS_PENDING, run_after__lte=current)
+                    | Q(status=cls.STATUS_RUNNING, locked_at__lt=current - cls.LOCK_TIMEOUT)
+                )
+                .order_by('run_after')[:limit]
+            )
+            cls.objects.filter(id__in=[job.id for job in jobs]).update(
+                status=cls.STATUS_RUNNING, locked_at=current, attempts=F('attempts') + 1
+            )
+        return cls.objects.filter(id__in=[job.id for job in jobs]).select_related('session__user')
+
+    def run(self):
+        """
+        Finalize the session and record the outcome. The outcome is only
+        written while the job is still the run this worker claimed: a job
+        re-enqueued meanwhile (status reset to pending, attempts to 0) or
+        reclaimed after LOCK_TIMEOUT keeps its newer state and runs again.
+        """
+        from django.db import transaction
+
+        claimed = PoseSessionJob.objects.filter(pk=self.pk, status=self.STATUS_RUNNING, attempts=self.attempts)
+        try:
+            with transaction.atomic():
+                self.session.finalize()
+        except Exception as e:
+            retry = self.attempts < self.MAX_ATTEMPTS
+            self.status = self.STATUS_PENDING if retry else self.STATUS_FAILED
+            self.last_error = str(e)
+            # Back off 30s, 60s, 120s, ... between attempts
+            self.run_after = timezone.now() + timedelta(seconds=30 * 2 ** (self.attempts - 1))
+            claimed.update(
+                status=self.status, last_error=self.last_error, run_after=self.run_after, updated_at=timezone.now()
+            )
+            return False
+
+        self.status = self.STATUS_DONE
+        self.last_error = None
+        claimed.update(status=self.status, last_error=None, updated_at=timezone.now())
+        return True
+
+
+# created: rows written; duplicates: frame_ids already stored; collided:
+# frames sharing a frame_id with a later frame of the same batch; dropped:
+# frames skipped by the retention policy
+FrameIngestResult = namedtuple('FrameIngestResult', ['created', 'duplicates', 'collided', 'dropped'])
+
 
 class PoseFeedback(models.Model):
+    # frame_id is the capture time in POSE_FRAME_ID_SECONDS ticks since the epoch
+    # (about 1.8e10 today), past the 32-bit integer range
+    MAX_FRAME_ID = 2 ** 63 - 1
+
     session = models.ForeignKey(PoseEstimationSession, on_delete=models.CASCADE, related_name='feedbacks')
-    frame_id = models.IntegerField()
+    frame_id = models.BigIntegerField()
     keypoints_json = models.JSONField()  
     feedback_notes = models.TextField(blank=True, null=True)
     confidence_score = models.FloatField()
 
     timestamp = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        unique_together = ('session', 'frame_id')
+
+    @classmethod
+    def ingest_frames(cls, session, frames):
+        """
+        Bulk-insert validated frames for a session in one transaction.
+        Frames whose frame_id is already stored are skipped, so retried
+        uploads are idempotent, and frames dropped by the pose type's
+        retention policy (see poseRetention) are never written.
+
+        frame_id is the capture time in POSE_FRAME_ID_SECONDS ticks, so a
+        client sampling faster than that sends several frames per id; only
+        the last of them is kept. Returns a FrameIngestResult whose
+        `collided` count makes that loss visible to the caller.
+        """
+        from django.db import transaction
+        from FitHub.utils.poseRetention import get_policy, keyframe_mask
+
+        # Last occurrence wins for frame_ids repeated inside one batch
+        by_frame = {frame['frame_id']: frame for frame in frames}
+        collided = len(frames) - len(by_frame)
+        if not by_frame:
+            return FrameIngestResult(0, 0, collided, 0)
+
+        policy = get_policy(session.pose_type)
+        dropped = 0
+        if policy.get('mode', 'all') != 'all':
+            ordered = [by_frame[frame_id] for frame_id in sorted(by_frame)]
+            keep = keyframe_mask(session.pose_type, poseCodec.frames_from_rows([
+                (frame['frame_id'], frame['keypoints_json'], frame['confidence_score']) for frame in ordered
+            ]), policy)
+            by_frame = {frame['frame_id']: frame for frame, kept in zip(ordered, keep) if kept}
+            dropped = len(ordered) - len(by_frame)
+
+        with transaction.atomic():
+            stored = cls.objects.filter(session=session, frame_id__in=list(by_frame))
+            existing = set(stored.values_list('frame_id', flat=True))
+            rows = [
+                cls(
+                    session=session,
+                    frame_id=frame_id,
+                    keypoints_json=frame['keypoints_json'],
+                    feedback_notes=frame.get('feedback_notes'),
+                    confidence_score=frame['confidence_score'],
+                )
+                for frame_id, frame in sorted(by_frame.items())
+                if frame_id not in existing
+            ]
+            # ignore_conflicts covers a concurrent retry racing this insert,
+            # so the rows actually written are counted afterwards
+            cls.objects.bulk_create(rows, batch_size=500, ignore_conflicts=True)
+            created = stored.count() - len(existing) if rows else 0
+        return FrameIngestResult(created, len(by_frame) - created, collided, dropped)
+
+
+class PoseKeypointChunk(models.Model):
+    """
+    Packed keypoints for a run of frames of one session.
+    See FitHub.utils.poseCodec for the binary layout.
+    """
+    session = models.ForeignKey(PoseEstimationSession, on_delete=models.CASCADE, related_name='keypoint_chunks')
+    first_frame_id = models.BigIntegerField()
+    last_frame_id = models.BigIntegerField()
+    frame_count = models.IntegerField()
+    format_version = models.PositiveSmallIntegerField(default=poseCodec.FORMAT_VERSION)
+    data = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['session', 'first_frame_id'])]
+
+    def decode(self):
+        return poseCodec.decode_chunk(self.data, self.frame_count, self.format_version)
+
+    @classmethod
+    def build(cls, session, frames):
+        return cls(
+            session=session,
+            first_frame_id=int(frames.frame_ids[0]),
+            last_frame_id=int(frames.frame_ids[-1]),
+            frame_count=len(frames.frame_ids),
+            data=poseCodec.encode_chunk(*frames),
+        )
+
+    @classmethod
+    def pack_session(cls, session):
+        """
+        Move the raw PoseFeedback rows of a session into chunks of
+        poseCodec.CHUNK_FRAMES frames and delete the packed rows.
+        Returns the number of chunks written.
+        """
+        from django.db import transaction
+
+        rows = (
+            session.feedbacks.order_by('frame_id')
+            .values_list('id', 'frame_id', 'keypoints_json', 'confidence_score')
+        )
+        written = 0
+        with transaction.atomic():
+            batch = []
+            for row in rows.iterator(chunk_size=poseCodec.CHUNK_FRAMES):
+                batch.append(row)
+                if len(batch) == poseCodec.CHUNK_FRAMES:
+                    cls._pack_rows(session, batch)
+                    written += 1
+                    batch = []
+            if batch:
+                cls._pack_rows(session, batch)
+                written += 1
+        return written
+
+    @classmethod
+    def _pack_rows(cls, session, rows):
+        frames = poseCodec.frames_from_rows([row[1:] for row in rows])
+        cls.build(session, frames).save()
+        PoseFeedback.objects.filter(id__in=[row[0] for row in rows]).delete()
+
+    @classmethod
+    def load_session(cls, session, start_frame=None, end_frame=None):
+        """
+        Return a session's frames as poseCodec.PoseFrames, ordered by frame_id.
+        Reads the overlapping chunks plus any rows that are not packed yet.
+        """
+        chunks = cls.objects.filter(session=session)
+        rows = session.feedbacks.all()
+        if start_frame is not None:
+            chunks = chunks.filter(last_frame_id__gte=start_frame)
+            rows = rows.filter(frame_id__gte=start_frame)
+        if end_frame is not None:
+            chunks = chunks.filter(first_frame_id__lte=end_frame)
+            rows = rows.filter(frame_id__lte=end_frame)
+
+        parts = [chunk.decode() for chunk in chunks.order_by('first_frame_id')]
+        parts.append(poseCodec.frames_from_rows(
+            list(rows.order_by('frame_id').values_list('frame_id', 'keypoints_json', 'confidence_score'))
+        ))
+        return poseCodec.slice_frames(poseCodec.merge_frames(parts), start_frame, end_frame)
+
+
+    @classmethod
+    def iter_session_frames(cls, session, start_frame=None, end_frame=None, block_size=poseCodec.CHUNK_FRAMES):
+        """
+        Yield a session's frames as PoseFrames blocks in frame_id order without
+        loading the session into memory. Chunks and unpacked rows are both read
+        through server-side cursors and merged; a frame_id stored in both is
+        emitted once.
+        """
+        import heapq
+        from itertools import islice
+
+        chunks = cls.objects.filter(session=session)
+        rows = session.feedbacks.all()
+        if start_frame is not None:
+            chunks = chunks.filter(last_frame_id__gte=start_frame)
+            rows = rows.filter(frame_id__gte=start_frame)
+        if end_frame is not None:
+            chunks = chunks.filter(first_frame_id__lte=end_frame)
+            rows = rows.filter(frame_id__lte=end_frame)
+
+        def from_chunks():
+            for chunk in chunks.order_by('first_frame_id').iterator(chunk_size=8):
+                frames = poseCodec.slice_frames(chunk.decode(), start_frame, end_frame)
+                yield from zip(frames.frame_ids.tolist(), frames.keypoints, frames.confidence)
+
+        def from_rows():
+            cursor = rows.order_by('frame_id').values_list(
+                'frame_id', 'keypoints_json', 'confidence_score'
+            ).iterator(chunk_size=block_size)
+            while True:
+                frames = poseCodec.frames_from_rows(list(islice(cursor, block_size)))
+                if not len(frames.frame_ids):
+                    return
+                yield from zip(frames.frame_ids.tolist(), frames.keypoints, frames.confidence)
+
+        block, last_frame_id = [], None
+        for frame in heapq.merge(from_chunks(), from_rows(), key=lambda item: item[0]):
+            if frame[0] == last_frame_id:
+                continue
+            last_frame_id = frame[0]
+            block.append(frame)
+            if len(block) == block_size:
+                yield cls._stack_block(block)
+                block = []
+        if block:
+            yield cls._stack_block(block)
+
+    @staticmethod
+    def _stack_block(block):
+        frame_ids, keypoints, confidence = zip(*block)
+        return poseCodec.PoseFrames(
+            np.asarray(frame_ids, dtype=np.int64), np.stack(keypoints), np.asarray(confidence, dtype=np.float32)
+        )
+
+
+class PoseRepSummary(models.Model):
+    """What is left of a rep once its frames have been compacted away."""
+    session = models.ForeignKey(PoseEstimationSession, on_delete=models.CASCADE, related_name='rep_summaries')
+    rep_index = models.IntegerField()
+    start_frame_id = models.BigIntegerField()
+    end_frame_id = models.BigIntegerField()
+    duration_seconds = models.FloatField(default=0.0)
+    angle_min = models.FloatField(null=True, blank=True)
+    angle_max = models.FloatField(null=True, blank=True)
+    angle_mean = models.FloatField(null=True, blank=True)
+    form_score = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ('session', 'rep_index')
+
+
+class PoseSetCounter(models.Model):
+    """Last set number handed out per user, day and PoseExerciseSet.sequence_key."""
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='+')
+    date = models.DateField()
+    key = models.CharField(max_length=120)
+    last_number = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('user', 'date', 'key')
+
+    @classmethod
+    def allocate(cls, user_id, date_val, key):
+        """Next set number for the sequence, in one INSERT ... ON CONFLICT statement."""
+        from FitHub.utils.upsert import upsert_increment
+
+        (number,) = upsert_increment(
+            cls,
+            {'user': user_id, 'date': date_val, 'key': key},
+            {'last_number': 1},
+            returning=('last_number',),
+        )
+        return number
 
 
 class PoseExerciseSet(models.Model):
@@ -511,50 +1652,67 @@ class PoseExerciseSet(models.Model):
     duration_seconds = models.FloatField(default=0.0)
     calories_burned = models.FloatField(default=0.0)
 
+    # What set_number counts within a day: "exercise:<id>" or "pose:<pose type>"
+    sequence_key = models.CharField(max_length=120, default='')
+
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'date', 'sequence_key', 'set_number'],
+                name='unique_pose_set_number',
+            ),
+        ]
+
     def save(self, *args, **kwargs):
-        if not self.pk:  # Only set on create
-            filters = {
-                'user': self.user,
-                'date': self.date,
-            }
-            if self.exercise:
-                filters['exercise'] = self.exercise
-            else:
-                filters['session__pose_type'] = self.session.pose_type
+        creating = not self.pk
+        if creating:
+            self.assign_set_number()
+        super().save(*args, **kwargs)
+        if creating:
+            self.add_to_rollup(self.calories_burned, sets=1)
 
-            last_set = PoseExerciseSet.objects.filter(**filters).order_by('-set_number').first()
-            self.set_number = (last_set.set_number + 1) if last_set else 1
+    @property
+    def rollup_pose_type(self):
+        from FitHub.utils.poseAnalysis import normalize_pose_type
+        return normalize_pose_type(self.session.pose_type)
 
-        super().save(*args, **kwargs)
+    def add_to_rollup(self, calories, sets=0, date_val=None):
+        """Apply a change of this set to the DailyPoseCalories and DailyCalorieSummary totals."""
+        date_val = date_val or self.date
+        DailyPoseCalories.add(self.user_id, date_val, self.rollup_pose_type, calories, sets)
+        DailyCalorieSummary.apply_delta(self.user, date_val, burned=calories)
+
+    def assign_set_number(self):
+        from FitHub.utils.poseAnalysis import normalize_pose_type
+
+        if self.exercise_id:
+            self.sequence_key = f'exercise:{self.exercise_id}'
+        else:
+            self.sequence_key = f'pose:{normalize_pose_type(self.session.pose_type)}'
+        self.set_number = PoseSetCounter.allocate(self.user_id, self.date, self.sequence_key)
 
     def calculate_calories(self):
-        met_values = {
-            'squat': 5.0,
-            'lunge': 4.5,
-        }
+        from FitHub.utils import poseRegistry
 
         if self.exercise and self.exercise.met:
             met = self.exercise.met
         else:
-            pose_name = self.session.pose_type.strip().lower()
-            # Handle plural normalization
-            if pose_name.endswith('s'):
-                pose_name = pose_name[:-1]
-            met = met_values.get(pose_name, None)
+            pose = poseRegistry.lookup(self.session.pose_type)
+            met = pose.met if pose else None
 
+        previous = self.calories_burned
         if not met or self.duration_seconds <= 0:
             self.calories_burned = 0
-            self.save(update_fields=['calories_burned'])
-            return 0
-
-        weight = self.user.weight
-        minutes = self.duration_seconds / 60
-        calories = met * weight * 0.0175 * minutes
+        else:
+            weight = self.user.weight
+            minutes = self.duration_seconds / 60
+            self.calories_burned = round(met * weight * 0.0175 * minutes, 2)
 
-        self.calories_burned = round(calories, 2)
         self.save(update_fields=['calories_burned'])
+        if self.calories_burned != previous:
+            self.add_to_rollup(self.calories_burned - previous)
         return self.calories_burned
 
 
@@ -566,3 +1724,28 @@ class PoseExerciseSet(models.Model):
 
     def __str__(self):
         return f"{self.user.email} - {self.exercise.name if self.exercise else self.session.pose_type} Set {self.set_number} on {self.date}"
+
+
+class DailyPoseCalories(models.Model):
+    """
+    Per-user, per-day, per-pose-type totals of PoseExerciseSet, kept current
+    by PoseExerciseSet as sets are written and removed.
+    """
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='daily_pose_calories')
+    date = models.DateField()
+    pose_type = models.CharField(max_length=100)  # normalized, e.g. "squat"
+    calories = models.FloatField(default=0.0)
+    set_count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('user', 'date', 'pose_type')
+
+    @classmethod
+    def add(cls, user_id, date_val, pose_type, calories, sets=0):
+        from FitHub.utils.upsert import upsert_increment
+
+        upsert_increment(
+            cls,
+            {'user': user_id, 'date': date_val, 'pose_type': pose_type},
+            {'calories': calories, 'set_count': sets},
+        )
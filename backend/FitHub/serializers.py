@@ -41,7 +41,7 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         return user
     
     def get_calories(self, obj):
-        return obj.calculate_calories(activity_level=obj.activity_level)
+        return obj.get_calorie_target()
 
 
 class UserProfileSerializer(serializers.ModelSerializer):
@@ -62,7 +62,7 @@ class UserProfileSerializer(serializers.ModelSerializer):
         return obj.get_estimated_current_weight()
 
     def get_calories(self, obj):
-        return obj.calculate_calories(activity_level=obj.activity_level)
+        return obj.get_calorie_target()
 
     def validate(self, data):
         """
@@ -216,6 +216,11 @@ class MealPlanSerializer(serializers.ModelSerializer):
         fields = ['id', 'user', 'meal', 'name', 'ingredients', 'calories', 'is_consumed', 'created_at', 'dietary_restriction']
         read_only_fields = ['id', 'user', 'created_at']
 
+class MealConsumedSerializer(serializers.Serializer):
+    # DRF's BooleanField also accepts "false", "0", "off" etc. from form-style clients
+    id = serializers.IntegerField(required=False)
+    is_consumed = serializers.BooleanField()
+
 class PoseEstimationSessionSerializer(serializers.ModelSerializer):
     class Meta:
         model = PoseEstimationSession
@@ -223,10 +228,67 @@ class PoseEstimationSessionSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'started_at', 'ended_at', 'completed']
 
 
-class PoseFeedbackSerializer(serializers.ModelSerializer):
-        class Meta:
-            model = PoseFeedback
-            fields = '__all__'
+class PoseFrameSerializer(serializers.Serializer):
+    """One frame of a batch upload; the session comes from the batch."""
+    frame_id = serializers.IntegerField(min_value=0, max_value=PoseFeedback.MAX_FRAME_ID)
+    keypoints_json = serializers.JSONField()
+    feedback_notes = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+    confidence_score = serializers.FloatField()
+
+
+class PoseFeedbackSerializer(PoseFrameSerializer):
+    """A single frame upload, stored like a batch of one."""
+    session = serializers.IntegerField()
+
+
+class PoseFeedbackBatchSerializer(serializers.Serializer):
+    MAX_FRAMES = 500
+
+    session = serializers.IntegerField()
+    frames = PoseFrameSerializer(many=True, allow_empty=False, max_length=MAX_FRAMES)
+
+
+class PerformanceSetSerializer(serializers.Serializer):
+    """One logged set; the workout exercise comes from the batch."""
+    set_number = serializers.IntegerField(min_value=1)
+    reps = serializers.IntegerField(min_value=0)
+    weight = serializers.FloatField(min_value=0)
+
+
+class LogPerformanceBatchSerializer(serializers.Serializer):
+    MAX_SETS = 100
+
+    workout_exercise_id = serializers.IntegerField()
+    sets = PerformanceSetSerializer(many=True, allow_empty=False, max_length=MAX_SETS)
+
+
+class SyncedExerciseSerializer(serializers.Serializer):
+    """One finished exercise of an offline workout, as StartExercise + LogExercisePerformance + EndExercise would record it."""
+    client_id = serializers.UUIDField()
+    exercise_name = serializers.CharField(max_length=255)
+    total_time_seconds = serializers.IntegerField(min_value=0)
+    calories_burned = serializers.FloatField(min_value=0, default=0.0)
+    sets = PerformanceSetSerializer(many=True, required=False, max_length=LogPerformanceBatchSerializer.MAX_SETS)
+
+
+class SyncedWorkoutSerializer(serializers.Serializer):
+    """Exercises of one offline day; they are merged into that day's workout, so only the exercises carry ids."""
+    MAX_EXERCISES = 50
+
+    workout_date = serializers.DateField()
+    exercises = SyncedExerciseSerializer(many=True, allow_empty=False, max_length=MAX_EXERCISES)
+
+
+class WorkoutSyncSerializer(serializers.Serializer):
+    MAX_WORKOUTS = 20
+
+    workouts = SyncedWorkoutSerializer(many=True, allow_empty=False, max_length=MAX_WORKOUTS)
+
+    def validate_workouts(self, value):
+        client_ids = [exercise['client_id'] for workout in value for exercise in workout['exercises']]
+        if len(client_ids) != len(set(client_ids)):
+            raise serializers.ValidationError("Exercise client_id values must be unique within an upload.")
+        return value
 
 
 class PoseExerciseSetSummarySerializer(serializers.ModelSerializer):
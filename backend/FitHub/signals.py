@@ -1,48 +1,88 @@
-from django.db.models.signals import post_save
+from django.db.models import F, Q
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
-from FitHub.models import ExercisePerformance, ExerciseHistory, PoseEstimationSession, PoseExerciseSet
-from datetime import date
+from FitHub.models import (
+    CustomUser, DailyCalorieSummary, DailyPoseCalories, Exercise, ExercisePerformance, ExerciseHistory, PoseEstimationSession,
+    MealPlan, PoseExerciseSet, PoseSessionJob, PoseType, ProgressRollup, Workout, WorkoutExercise,
+)
+from FitHub.utils import poseRegistry
+from FitHub.utils.responseCache import bump_user_version
 
 @receiver(post_save, sender=ExercisePerformance)
 def create_exercise_history(sender, instance, created, **kwargs):
     if not created:
         return  # only create on first save
 
-    we = instance.workout_exercise
-    if not we or not we.workout or not we.exercise:
-        return
-
-    ExerciseHistory.objects.create(
-        user=we.workout.user,
-        exercise=we.exercise,
-        workout=we.workout,
-        workout_exercise=we,
-        date=we.start_date,
-        sets=1,
-        reps_per_set=instance.reps,
-        weight_per_set=instance.weight
-    )
+    history = ExerciseHistory.for_performance(instance)
+    if history is not None:
+        history.save()
 
 
 @receiver(post_save, sender=PoseEstimationSession)
 def handle_pose_session_end(sender, instance, created, **kwargs):
-    # Only proceed if the session is ended and marked completed
+    # Only proceed if the session is ended and marked completed. The set,
+    # rep count and calories are filled in by the pose job worker.
     if instance.ended_at and instance.completed:
-        # Check if PoseExerciseSet already exists
-        pose_set, created_set = PoseExerciseSet.objects.get_or_create(
-            session=instance,
-            defaults={
-                'user': instance.user,
-                'date': instance.ended_at.date() if instance.ended_at else date.today(),
-                'duration_seconds': instance.duration() or 0.0,
-            }
-        )
-        
-        # Update if it already exists
-        if not created_set:
-            pose_set.duration_seconds = instance.duration() or 0.0
-            pose_set.date = instance.ended_at.date() if instance.ended_at else date.today()
-            pose_set.save(update_fields=['duration_seconds', 'date'])
-
-        # Calculate calories (if exercise is attached)
-        pose_set.calculate_calories()
+        PoseSessionJob.enqueue(instance)
+
+
+@receiver(post_save, sender=PoseType)
+@receiver(post_delete, sender=PoseType)
+@receiver(post_save, sender=Exercise)
+@receiver(post_delete, sender=Exercise)
+def invalidate_pose_registry(sender, **kwargs):
+    # Exercise changes matter too: a pose type without its own MET uses its exercise's
+    poseRegistry.invalidate()
+
+
+@receiver(post_delete, sender=PoseExerciseSet)
+def remove_pose_set_from_rollup(sender, instance, **kwargs):
+    # A plain update: when the whole user is being deleted the rollup row is already gone
+    DailyPoseCalories.objects.filter(
+        user_id=instance.user_id, date=instance.date, pose_type=instance.rollup_pose_type,
+    ).update(calories=F('calories') - instance.calories_burned, set_count=F('set_count') - 1)
+    DailyCalorieSummary.apply_delta(instance.user, instance.date, burned=-instance.calories_burned, open_day=False)
+
+
+@receiver(post_save, sender=Workout)
+def add_workout_to_rollup(sender, instance, created, **kwargs):
+    # Later calorie changes go through Workout.record_calories
+    if created:
+        ProgressRollup.add(instance.user_id, instance.workout_date, workout_calories=instance.total_calories or 0, workout_count=1)
+
+
+@receiver(post_delete, sender=Workout)
+def remove_workout_from_rollup(sender, instance, **kwargs):
+    # A plain update, like the pose rollup: the rows may already be gone with the user
+    buckets = Q()
+    for granularity in (ProgressRollup.WEEK, ProgressRollup.MONTH):
+        buckets |= Q(granularity=granularity, period_start=ProgressRollup.bucket_start(granularity, instance.workout_date))
+    ProgressRollup.objects.filter(buckets, user_id=instance.user_id).update(
+        workout_calories=F('workout_calories') - (instance.total_calories or 0),
+        workout_count=F('workout_count') - 1,
+    )
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_save, sender=MealPlan)
+@receiver(post_delete, sender=MealPlan)
+@receiver(post_save, sender=Workout)
+@receiver(post_delete, sender=Workout)
+@receiver(post_save, sender=WorkoutExercise)
+@receiver(post_delete, sender=WorkoutExercise)
+@receiver(post_save, sender=PoseExerciseSet)
+@receiver(post_delete, sender=PoseExerciseSet)
+def invalidate_user_responses(sender, instance, **kwargs):
+    # Queryset F() updates skip these signals; DailyCalorieSummary.apply_delta bumps for those
+    if sender is CustomUser:
+        bump_user_version(instance.pk)
+    elif sender is WorkoutExercise:
+        if WorkoutExercise.workout.is_cached(instance):
+            bump_user_version(instance.workout.user_id)
+        else:
+            # The workout may already be gone when its delete cascades here; its own signal bumps then
+            user_id = Workout.objects.filter(pk=instance.workout_id).values_list('user_id', flat=True).first()
+            if user_id:
+                bump_user_version(user_id)
+    else:
+        bump_user_version(instance.user_id)
@@ -1,3 +1,1194 @@
-from django.test import TestCase
+import io
+import json
+import struct
+import uuid
+import zlib
+from datetime import date, timedelta
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.test import AsyncClient, TestCase, override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from FitHub.consumers import parse_frame
+from FitHub.models import (
+    CalorieTargetHistory, CustomUser, DailyCalorieSummary, DailyPoseCalories, Exercise, ExerciseHistory,
+    ExercisePerformance, MealPlan, PoseEstimationSession, PoseFeedback, PoseExerciseSet,
+    PoseKeypointChunk, PoseSessionJob, PoseSetCounter, ProgressRollup, Workout, WorkoutExercise,
+)
+from FitHub.utils import downsample, poseCodec, poseRegistry
+from FitHub.serializers import LogPerformanceBatchSerializer
+from FitHub.views import TodayDashboardView
+from FitHub.utils.responseCache import get_cache
+
+
+def make_user(email='runner@example.com', **extra):
+    fields = dict(
+        username=email, first_name='Test', last_name='User', age=30, height=180, weight=80,
+        gender='male', goal='Weight Loss', goal_weight=70,
+    )
+    fields.update(extra)
+    return CustomUser.objects.create(email=email, **fields)
+
+
+def squat_frames(count=3000, reps=10, first_frame=0):
+    """Synthetic squat: the knee angle swings between 60 and 170 degrees `reps` times."""
+    joint = poseCodec.JOINT_INDEX
+    t = np.arange(count)
+    knee = np.radians(60 + 110 * (0.5 + 0.5 * np.cos(2 * np.pi * reps * t / count)))
+    keypoints = np.full((count, len(poseCodec.JOINTS), 3), np.nan, np.float32)
+    for side in ('left', 'right'):
+        keypoints[:, joint[side + 'Hip'], :2] = 0
+        keypoints[:, joint[side + 'Knee'], :2] = (0, 100)
+        keypoints[:, joint[side + 'Ankle'], 0] = 100 * np.sin(knee)
+        keypoints[:, joint[side + 'Ankle'], 1] = 100 - 100 * np.cos(knee)
+        keypoints[:, joint[side + 'Shoulder'], 0] = 100 * np.sin(knee + np.radians(12))
+        keypoints[:, joint[side + 'Shoulder'], 1] = 100 * np.cos(knee + np.radians(12))
+    keypoints[:, :, 2] = 0.9
+    return [
+        {'frame_id': first_frame + i, 'keypoints_json': poseCodec.array_to_landmarks(keypoints[i]), 'confidence_score': 0.9}
+        for i in range(count)
+    ]
+
+
+class FitHubTestCase(APITestCase):
+    """
+    Each test rolls back, so primary keys and version counters come back in
+    the next one; process-wide caches keyed by them are cleared here.
+    """
+    def setUp(self):
+        super().setUp()
+        get_cache().clear()
+        poseRegistry._drop()
+
+
+@override_settings(POSE_FRAME_RETENTION={})
+class PoseFeedbackBatchTests(FitHubTestCase):
+    # A frame_id as PoseScreen sends it: Date.now() / 100, past the 32-bit range
+    FIRST_FRAME = 17923329753
+
+    def setUp(self):
+        super().setUp()
+        self.user = make_user()
+        self.client.force_authenticate(self.user)
+        self.session = PoseEstimationSession.objects.create(user=self.user, pose_type='Squat')
+        self.frames = [
+            {'frame_id': self.FIRST_FRAME + i, 'keypoints_json': {'leftKnee': {'x': i, 'y': 2}}, 'confidence_score': 0.9}
+            for i in range(20)
+        ]
+
+    def upload(self, frames):
+        return self.client.post('/api/pose-feedback/batch/', {'session': self.session.id, 'frames': frames}, format='json')
+
+    def test_batch_is_stored_with_full_frame_ids(self):
+        response = self.upload(self.frames)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            (response.data['created'], response.data['duplicates'], response.data['collided']), (20, 0, 0)
+        )
+        self.assertEqual(
+            list(self.session.feedbacks.order_by('frame_id').values_list('frame_id', flat=True)),
+            [self.FIRST_FRAME + i for i in range(20)],
+        )
+
+    def test_retried_batch_creates_nothing(self):
+        self.upload(self.frames)
+        response = self.upload(self.frames)
+        self.assertEqual((response.data['created'], response.data['duplicates']), (0, 20))
+        self.assertEqual(PoseFeedback.objects.count(), 20)
+
+    def test_frames_sharing_a_frame_id_are_reported(self):
+        response = self.upload(self.frames + [dict(self.frames[3], confidence_score=0.5)])
+        self.assertEqual((response.data['created'], response.data['collided']), (20, 1))
+        # The last frame of a frame_id wins
+        self.assertEqual(self.session.feedbacks.get(frame_id=self.FIRST_FRAME + 3).confidence_score, 0.5)
+
+    def test_out_of_range_frame_id_is_rejected(self):
+        response = self.upload([dict(self.frames[0], frame_id=-1)])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.upload([dict(self.frames[0], frame_id=2 ** 63)])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_streamed_frame_ids_are_range_checked(self):
+        self.assertEqual(parse_frame(self.frames[0])['frame_id'], self.FIRST_FRAME)
+        with self.assertRaises(ValueError):
+            parse_frame(dict(self.frames[0], frame_id=2 ** 63))
+
+
+class PoseRetentionTests(FitHubTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = make_user()
+        self.frames = squat_frames()
+
+    def ingest(self, policy):
+        session = PoseEstimationSession.objects.create(user=self.user, pose_type='Squat')
+        with override_settings(POSE_FRAME_RETENTION={'default': policy}):
+            for start in range(0, len(self.frames), 300):
+                PoseFeedback.ingest_frames(session, self.frames[start:start + 300])
+        return session
+
+    def test_kept_frames_give_the_same_reps_and_scores(self):
+        full = self.ingest({'mode': 'all'}).analyze()
+        self.assertEqual(full.rep_count, 10)
+
+        for policy in ({'mode': 'every_nth', 'n': 10}, {'mode': 'angle_delta', 'degrees': 15}, {'mode': 'rep_boundary'}):
+            with self.subTest(policy=policy['mode']):
+                session = self.ingest(policy)
+                self.assertLess(session.feedbacks.count(), len(self.frames) / 5)
+                analysis = session.analyze()
+                self.assertEqual(analysis.rep_count, full.rep_count)
+                np.testing.assert_allclose(analysis.rep_scores, full.rep_scores, atol=0.5)
+
+    @override_settings(POSE_FRAME_RETENTION={'default': {'mode': 'every_nth', 'n': 10}})
+    def test_single_frame_endpoint_goes_through_ingestion(self):
+        self.client.force_authenticate(self.user)
+        session = PoseEstimationSession.objects.create(user=self.user, pose_type='Squat')
+        payload = dict(self.frames[7], session=session.id)
+
+        response = self.client.post('/api/pose-feedback/', payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['created'], 1)
+        response = self.client.post('/api/pose-feedback/', payload, format='json')
+        self.assertEqual((response.data['created'], response.data['duplicates']), (0, 1))
+
+        other = make_user('other@example.com')
+        self.client.force_authenticate(other)
+        response = self.client.post('/api/pose-feedback/', payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class PoseSessionJobTests(FitHubTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = make_user()
+        self.session = PoseEstimationSession.objects.create(
+            user=self.user, pose_type='Squat', ended_at=timezone.now(), completed=True
+        )
+        self.job = self.session.completion_job
+
+    def test_claim_marks_jobs_running_once(self):
+        [job] = PoseSessionJob.claim()
+        self.assertEqual((job.status, job.attempts), (PoseSessionJob.STATUS_RUNNING, 1))
+        self.assertEqual(list(PoseSessionJob.claim()), [])
+
+    def test_stale_running_job_is_reclaimed(self):
+        PoseSessionJob.claim()
+        PoseSessionJob.objects.filter(pk=self.job.pk).update(
+            locked_at=timezone.now() - PoseSessionJob.LOCK_TIMEOUT - timedelta(seconds=1)
+        )
+        [job] = PoseSessionJob.claim()
+        self.assertEqual(job.attempts, 2)
+
+    def test_failure_backs_off_then_gives_up(self):
+        with mock.patch.object(PoseEstimationSession, 'finalize', side_effect=RuntimeError('boom')):
+            for attempt in range(1, PoseSessionJob.MAX_ATTEMPTS + 1):
+                PoseSessionJob.objects.filter(pk=self.job.pk).update(run_after=timezone.now())
+                [job] = PoseSessionJob.claim()
+                started = timezone.now()
+                self.assertFalse(job.run())
+                job.refresh_from_db()
+                self.assertEqual(job.attempts, attempt)
+                self.assertEqual(job.last_error, 'boom')
+                if attempt < PoseSessionJob.MAX_ATTEMPTS:
+                    self.assertEqual(job.status, PoseSessionJob.STATUS_PENDING)
+                    self.assertGreaterEqual(job.run_after, started + timedelta(seconds=30 * 2 ** (attempt - 1)))
+
+        self.assertEqual(job.status, PoseSessionJob.STATUS_FAILED)
+        self.assertEqual(list(PoseSessionJob.claim()), [])
+
+    def test_success_marks_job_done(self):
+        [job] = PoseSessionJob.claim()
+        self.assertTrue(job.run())
+        job.refresh_from_db()
+        self.assertEqual(job.status, PoseSessionJob.STATUS_DONE)
+        self.assertTrue(self.session.pose_set)
+
+    def test_reenqueue_while_running_is_kept(self):
+        [job] = PoseSessionJob.claim()
+        PoseSessionJob.enqueue(self.session)
+        self.assertTrue(job.run())
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (PoseSessionJob.STATUS_PENDING, 0))
+        self.assertEqual(len(PoseSessionJob.claim()), 1)
+
+
+class PoseCodecTests(TestCase):
+    FIRST_FRAME = 17923329753
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.frame_ids = np.arange(self.FIRST_FRAME, self.FIRST_FRAME + 40, dtype=np.int64)
+        self.keypoints = rng.uniform(0, 500, size=(40, len(poseCodec.JOINTS), 3)).astype(np.float32)
+        self.keypoints[:, :, 2] = rng.uniform(0, 1, size=(40, len(poseCodec.JOINTS)))
+        self.keypoints[3, 5] = np.nan  # a joint the model did not see
+        self.confidence = rng.uniform(0, 1, size=40).astype(np.float32)
+
+    def test_chunk_round_trip(self):
+        payload = poseCodec.encode_chunk(self.frame_ids, self.keypoints, self.confidence)
+        frames = poseCodec.decode_chunk(payload, len(self.frame_ids))
+
+        np.testing.assert_array_equal(frames.frame_ids, self.frame_ids)
+        self.assertEqual(frames.keypoints.dtype, np.float32)
+        # float16 storage keeps about three significant digits
+        np.testing.assert_allclose(frames.keypoints, self.keypoints, rtol=1e-3, equal_nan=True)
+        np.testing.assert_allclose(frames.confidence, self.confidence, rtol=1e-3)
+
+    def test_version_1_chunks_are_still_read(self):
+        frame_ids = np.arange(100, 140, dtype=np.int32)
+        payload = zlib.compress(b''.join((
+            frame_ids.tobytes(),
+            self.confidence.astype(np.float16).tobytes(),
+            self.keypoints.astype(np.float16).tobytes(),
+        )))
+        frames = poseCodec.decode_chunk(payload, len(frame_ids), version=1)
+
+        np.testing.assert_array_equal(frames.frame_ids, frame_ids)
+        np.testing.assert_allclose(frames.keypoints, self.keypoints, rtol=1e-3, equal_nan=True)
+
+    def test_landmarks_round_trip(self):
+        landmarks = poseCodec.array_to_landmarks(self.keypoints[3])
+        self.assertNotIn(poseCodec.JOINTS[5], landmarks)
+
+        array = poseCodec.landmarks_to_array([landmarks])[0]
+        np.testing.assert_array_equal(array, self.keypoints[3])
+
+    def test_stream_block_layout(self):
+        header = json.loads(poseCodec.stream_header())
+        self.assertEqual(header['version'], poseCodec.FORMAT_VERSION)
+
+        block = poseCodec.encode_stream_block(poseCodec.PoseFrames(self.frame_ids, self.keypoints, self.confidence))
+        (count,) = struct.unpack('<I', block[:4])
+        self.assertEqual(count, 40)
+        np.testing.assert_array_equal(np.frombuffer(block[4:4 + 8 * count], '<i8'), self.frame_ids)
+        self.assertEqual(len(block), 4 + count * (8 + 4 + len(poseCodec.JOINTS) * 3 * 4))
+
+
+class PoseKeypointChunkTests(FitHubTestCase):
+    def test_packed_session_keeps_full_frame_ids(self):
+        user = make_user()
+        session = PoseEstimationSession.objects.create(user=user, pose_type='Squat')
+        first = PoseCodecTests.FIRST_FRAME
+        PoseFeedback.objects.bulk_create([
+            PoseFeedback(session=session, frame_id=first + i, keypoints_json={'nose': {'x': i, 'y': 1}}, confidence_score=0.9)
+            for i in range(300)
+        ])
+
+        self.assertEqual(PoseKeypointChunk.pack_session(session), 2)
+        chunk = PoseKeypointChunk.objects.order_by('first_frame_id').first()
+        self.assertEqual((chunk.first_frame_id, chunk.format_version), (first, poseCodec.FORMAT_VERSION))
+
+        frames = PoseKeypointChunk.load_session(session, first + 250, first + 260)
+        np.testing.assert_array_equal(frames.frame_ids, np.arange(first + 250, first + 261))
+        self.assertEqual(frames.keypoints[0, poseCodec.JOINT_INDEX['nose'], 0], 250)
+
+
+def binary_frame_ids(content):
+    """frame_ids of an export in the binary encoding, checking the block sizes on the way."""
+    header, _, body = content.partition(b'\n')
+    frame_size = 8 + 4 + len(json.loads(header)['joints']) * 3 * 4
+    frame_ids, offset = [], 0
+    while offset < len(body):
+        (count,) = struct.unpack_from('<I', body, offset)
+        frame_ids += np.frombuffer(body, '<i8', count, offset + 4).tolist()
+        offset += 4 + count * frame_size
+    assert offset == len(body)
+    return frame_ids
+
+
+@override_settings(POSE_FRAME_RETENTION={})
+class PoseFrameExportTests(FitHubTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = make_user()
+        self.session = PoseEstimationSession.objects.create(user=self.user, pose_type='Squat')
+        frames = squat_frames(count=700, reps=3)
+        # Packed chunks overlapping unpacked rows, as after a late upload
+        PoseFeedback.ingest_frames(self.session, frames[:600])
+        PoseKeypointChunk.pack_session(self.session)
+        PoseFeedback.ingest_frames(self.session, frames[550:])
+        self.url = f'/api/pose-session/{self.session.id}/frames/'
+        self.client.force_authenticate(self.user)
+
+    def ndjson_frame_ids(self, response):
+        content = b''.join(response.streaming_content).decode()
+        return [json.loads(line)['frame_id'] for line in content.splitlines()]
+
+    def test_ndjson_export(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Accept-Ranges'], 'frames')
+        self.assertEqual(self.ndjson_frame_ids(response), list(range(700)))
+
+    def test_binary_export(self):
+        response = self.client.get(self.url, {'encoding': 'binary'})
+        self.assertEqual(response['Content-Type'], 'application/octet-stream')
+        self.assertEqual(binary_frame_ids(b''.join(response.streaming_content)), list(range(700)))
+
+    def test_range_request(self):
+        response = self.client.get(self.url, HTTP_RANGE='frames=580-619')
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(response['Content-Range'], 'frames 580-619/*')
+        self.assertEqual(self.ndjson_frame_ids(response), list(range(580, 620)))
+
+        response = self.client.get(self.url, HTTP_RANGE='frames=650-')
+        self.assertEqual(response['Content-Range'], 'frames 650-/*')
+        self.assertEqual(self.ndjson_frame_ids(response), list(range(650, 700)))
+
+    def test_bad_range_is_rejected(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-99')
+        self.assertEqual(response.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+
+    def test_other_users_session_is_not_found(self):
+        self.client.force_authenticate(make_user('other@example.com'))
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_asgi_export_drains_for_both_encodings(self):
+        token = await sync_to_async(lambda: str(RefreshToken.for_user(self.user).access_token))()
+        client = AsyncClient()
+        for encoding in ('ndjson', 'binary'):
+            with self.subTest(encoding=encoding):
+                response = await client.get(
+                    self.url, {'encoding': encoding}, headers={'Authorization': f'Bearer {token}'}
+                )
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                content = b''.join([part async for part in response.streaming_content])
+                if encoding == 'binary':
+                    frame_ids = binary_frame_ids(content)
+                else:
+                    frame_ids = [json.loads(line)['frame_id'] for line in content.decode().splitlines()]
+                self.assertEqual(frame_ids, list(range(700)))
+
+
+class PoseSetNumberTests(FitHubTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = make_user()
+        self.day = date(2026, 3, 2)
+
+    def make_set(self, pose_type='Squat', day=None, **fields):
+        session = PoseEstimationSession.objects.create(user=self.user, pose_type=pose_type)
+        return PoseExerciseSet.objects.create(user=self.user, session=session, date=day or self.day, **fields)
+
+    def test_counter_increments_existing_row(self):
+        numbers = [PoseSetCounter.allocate(self.user.pk, self.day, 'pose:squat') for _ in range(3)]
+        self.assertEqual(numbers, [1, 2, 3])
+        self.assertEqual(PoseSetCounter.objects.get(user=self.user, date=self.day, key='pose:squat').last_number, 3)
+
+        self.assertEqual(PoseSetCounter.allocate(self.user.pk, self.day, 'pose:lunge'), 1)
+        self.assertEqual(PoseSetCounter.objects.filter(user=self.user).count(), 2)
+
+    def test_sets_are_numbered_per_day_and_sequence(self):
+        exercise = Exercise.objects.create(name='Squat', met=5)
+        squats = [self.make_set('squats'), self.make_set('Squat')]
+        lunge = self.make_set('Lunge')
+        with_exercise = self.make_set('Squat', exercise=exercise)
+        next_day = self.make_set('Squat', day=self.day + timedelta(days=1))
+
+        self.assertEqual([pose_set.set_number for pose_set in squats], [1, 2])
+        self.assertEqual(squats[0].sequence_key, squats[1].sequence_key)
+        self.assertEqual(lunge.set_number, 1)
+        self.assertEqual(next_day.set_number, 1)
+        self.assertEqual((with_exercise.sequence_key, with_exercise.set_number), (f'exercise:{exercise.id}', 1))
+
+    def test_numbers_are_not_reused_after_a_delete(self):
+        first = self.make_set()
+        self.make_set().delete()
+        self.assertEqual(self.make_set().set_number, 3)
+        self.assertEqual(first.set_number, 1)
+
+
+class CaloriesByPoseTests(FitHubTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = make_user()
+        self.day = date(2026, 3, 2)
+        self.client.force_authenticate(self.user)
+
+    def make_set(self, pose_type, calories):
+        session = PoseEstimationSession.objects.create(user=self.user, pose_type=pose_type)
+        return PoseExerciseSet.objects.create(user=self.user, session=session, date=self.day, calories_burned=calories)
+
+    def test_conflict_adds_every_increment(self):
+        DailyPoseCalories.add(self.user.pk, self.day, 'squat', 12.5, sets=1)
+        DailyPoseCalories.add(self.user.pk, self.day, 'squat', 7.5, sets=1)
+
+        row = DailyPoseCalories.objects.get(user=self.user, date=self.day, pose_type='squat')
+        self.assertEqual((row.calories, row.set_count), (20.0, 2))
+
+    def test_view_reads_the_rollup(self):
+        self.make_set('Squats', 12.5)
+        self.make_set('squat', 7.5)
+        self.make_set('Lunge', 4).delete()
+
+        response = self.client.get('/api/calories-by-pose/', {'start_date': '2026-03-01', 'end_date': '2026-03-31'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['data'], [{'pose_type': 'Squat', 'date': '2026-03-02', 'calories_burned': 20.0}])
+        self.assertEqual(DailyCalorieSummary.objects.get(user=self.user, date=self.day).calories_burned, 20.0)
+
+
+class MealConsumedTests(FitHubTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = make_user()
+        self.client.force_authenticate(self.user)
+        self.meal = MealPlan.objects.create(user=self.user, meal='Lunch', name='Rice', ingredients=[], calories=600)
+
+    def consumed(self):
+        return DailyCalorieSummary.objects.get(user=self.user, date=self.meal.plan_date).calories_consumed
+
+    def test_toggles_move_calories_once(self):
+        self.assertTrue(self.meal.set_consumed(True))
+        self.assertFalse(self.meal.set_consumed(True))
+        self.assertEqual(self.consumed(), 600)
+
+        self.assertTrue(self.meal.set_consumed('0'))
+        self.assertEqual(self.consumed(), 0)
+        with self.assertRaises(ValidationError):
+            self.meal.set_consumed('maybe')
+        self.assertFalse(MealPlan.objects.get(pk=self.meal.pk).is_consumed)
+
+    def test_form_values_are_parsed(self):
+        self.meal.set_consumed(True)
+        url = f'/api/meal-plans/{self.meal.id}/update-consumed/'
+
+        for value in ('false', '0', False):
+            with self.subTest(value=value):
+                response = self.client.patch(url, {'is_consumed': value}, format='json')
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertIs(response.data['is_consumed'], False)
+                self.assertEqual(self.consumed(), 0)
+
+        response = self.client.patch(url, {'is_consumed': 'yes please'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.consumed(), 0)
+
+    def test_bulk_update_skips_bad_values(self):
+        other = MealPlan.objects.create(user=self.user, meal='Dinner', name='Soup', ingredients=[], calories=250)
+        response = self.client.patch('/api/meal-plans/bulk-update-consumed/', {'updates': [
+            {'id': self.meal.id, 'is_consumed': 'true'},
+            {'id': other.id, 'is_consumed': 'maybe'},
+        ]}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.consumed(), 600)
+        other.refresh_from_db()
+        self.assertFalse(other.is_consumed)
+
+
+class FitnessSummaryPagingTests(FitHubTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = make_user()
+        self.client.force_authenticate(self.user)
+        self.start = date(2026, 3, 1)
+        for offset, calories in ((0, 100), (3, 250), (3, 50), (9, 400)):
+            Workout.objects.create(user=self.user, workout_date=self.start + timedelta(days=offset), total_calories=calories)
+        MealPlan.objects.create(
+            user=self.user, meal='Lunch', name='Rice', ingredients=[], calories=600, is_consumed=True,
+            plan_date=self.start + timedelta(days=3),
+        )
+        self.query = {'start': '2026-03-01', 'end': '2026-03-10'}
+
+    def test_pages_follow_the_cursor_back_to_the_start(self):
+        pages, query = [], dict(self.query, days=4)
+        while True:
+            response = self.client.get('/api/fitness-summary/', query)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            pages.append([row['date'] for row in response.data])
+            if 'X-Next-Cursor' not in response:
+                break
+            self.assertIn(f"cursor={response['X-Next-Cursor']}", response['Link'])
+            query['cursor'] = response['X-Next-Cursor']
+
+        self.assertEqual([len(page) for page in pages], [4, 4, 2])
+        days = [day for page in pages for day in page]
+        self.assertEqual(days, [self.start + timedelta(days=offset) for offset in range(9, -1, -1)])
+
+    def test_page_totals_match_the_whole_range(self):
+        whole = self.client.get('/api/fitness-summary/', self.query)
+        self.assertNotIn('X-Next-Cursor', whole)
+        by_date = {row['date']: row for row in whole.data}
+        self.assertEqual(by_date[self.start + timedelta(days=3)]['calories_burned'], 300)
+        self.assertEqual(by_date[self.start + timedelta(days=3)]['net_calories'], 300)
+
+        paged = self.client.get('/api/fitness-summary/', dict(self.query, days=3, cursor='2026-03-04'))
+        self.assertEqual([row['date'] for row in paged.data], [date(2026, 3, 4), date(2026, 3, 3), date(2026, 3, 2)])
+        self.assertEqual(paged.data[0], by_date[date(2026, 3, 4)])
+
+    def test_bad_page_size_is_rejected(self):
+        response = self.client.get('/api/fitness-summary/', dict(self.query, days=0))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class EnergyBalanceTests(FitHubTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = make_user()
+        self.tdee = self.user.get_tdee()
+        self.today = date.today()
+
+    def eat(self, day, calories):
+        meal = MealPlan.objects.create(
+            user=self.user, meal='Lunch', name='Rice', ingredients=[], calories=calories, plan_date=day,
+        )
+        meal.set_consumed(True)
+        return meal
+
+    def burn(self, day, calories):
+        Workout.objects.create(user=self.user, workout_date=day, total_calories=calories)
+        DailyCalorieSummary.apply_delta(self.user, day, burned=calories)
+
+    def balances(self):
+        return list(
+            DailyCalorieSummary.objects.filter(user=self.user).order_by('date')
+            .values_list('energy_balance', 'cumulative_balance')
+        )
+
+    def test_days_without_meals_count_as_maintenance(self):
+        workout_day = self.today - timedelta(days=2)
+        meal_day = self.today - timedelta(days=1)
+        self.burn(workout_day, 400)
+        self.eat(meal_day, 1500)
+        self.burn(meal_day, 300)
+
+        balance = 1500 - 300 - self.tdee
+        self.assertEqual(self.balances(), [(0.0, 0.0), (balance, balance)])
+        summary = DailyCalorieSummary.objects.get(user=self.user, date=workout_day)
+        self.assertEqual(summary.net_calories, -400 - summary.calorie_target)
+
+        # Un-eating the only meal makes the day unknown again
+        MealPlan.objects.get(user=self.user).set_consumed(False)
+        self.assertEqual(self.balances(), [(0.0, 0.0), (0.0, 0.0)])
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.cumulative_energy_balance, 0.0)
+
+    def test_estimate_and_forecast_use_the_same_balance(self):
+        for days_ago in range(1, 15):
+            self.eat(self.today - timedelta(days=days_ago), round(self.tdee) - 500)
+        self.user.refresh_from_db()
+
+        total = 14 * (round(self.tdee) - 500 - self.tdee)
+        self.assertAlmostEqual(self.user.cumulative_energy_balance, total, places=6)
+        self.assertEqual(self.user.get_estimated_current_weight(), round(80 + total / 7700, 2))
+
+        forecast = self.user.get_weight_forecast(days=28)
+        self.assertAlmostEqual(forecast['avg_daily_energy_balance'], round(total / 28, 2))
+        self.assertEqual(forecast['status'], 'on_track')
+
+        # Days before the window move the estimate but not the forecast slope
+        self.eat(self.today - timedelta(days=40), round(self.tdee) + 2000)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.get_weight_forecast(days=28)['avg_daily_energy_balance'],
+                         forecast['avg_daily_energy_balance'])
+        self.assertGreater(self.user.get_estimated_current_weight(), forecast['estimated_current_weight'])
+
+    def test_backdated_day_shifts_later_prefix_sums(self):
+        later = self.today - timedelta(days=1)
+        self.eat(later, 2000)
+        self.eat(self.today - timedelta(days=5), 1000)
+
+        earlier_balance = 1000 - self.tdee
+        self.assertEqual(self.balances(), [
+            (earlier_balance, earlier_balance),
+            (2000 - self.tdee, earlier_balance + 2000 - self.tdee),
+        ])
+
+
+class ProgressBucketTests(FitHubTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = make_user()
+        self.client.force_authenticate(self.user)
+        for day, calories in ((date(2026, 2, 27), 50), (date(2026, 3, 2), 100), (date(2026, 3, 10), 200)):
+            Workout.objects.create(user=self.user, workout_date=day, total_calories=calories)
+        MealPlan.objects.create(
+            user=self.user, meal='Lunch', name='Rice', ingredients=[], calories=600, plan_date=date(2026, 3, 10),
+        ).set_consumed(True)
+
+    def get(self, granularity):
+        response = self.client.get('/api/visualization/', {
+            'period': 'month', 'date': '2026-03-01', 'granularity': granularity,
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_buckets_match_daily_totals(self):
+        daily = self.get('day')
+        self.assertEqual(daily['summary'], {'total_workout_calories': 300, 'total_meal_calories': 600})
+
+        monthly = self.get('month')
+        self.assertEqual([bucket['period_start'] for bucket in monthly['buckets']], ['2026-03-01'])
+        self.assertEqual(monthly['summary'], daily['summary'])
+
+        # Weeks start on Monday, so the range widens back to 23 February
+        weekly = self.get('week')
+        self.assertEqual(weekly['start_date'], '2026-02-23')
+        self.assertEqual(weekly['end_date'], '2026-04-05')
+        by_week = {bucket['period_start']: bucket for bucket in weekly['buckets']}
+        self.assertEqual(by_week['2026-02-23']['workout_calories_burned'], 50)
+        self.assertEqual(by_week['2026-03-09']['workout_count'], 1)
+        self.assertEqual(by_week['2026-03-09']['meal_calories_consumed'], 600)
+
+        quarterly = self.get('quarter')
+        self.assertEqual(len(quarterly['buckets']), 1)
+        self.assertEqual(quarterly['buckets'][0]['period_end'], '2026-03-31')
+        self.assertEqual(quarterly['summary'], {'total_workout_calories': 350, 'total_meal_calories': 600})
+
+    def test_rollup_follows_deletes_and_meal_toggles(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Workout.objects.get(user=self.user, workout_date=date(2026, 3, 10)).delete()
+            MealPlan.objects.get(user=self.user).set_consumed(False)
+
+        self.assertEqual(self.get('month')['summary'], {'total_workout_calories': 100, 'total_meal_calories': 0})
+        self.assertEqual(self.get('month')['buckets'][0]['workout_count'], 1)
+
+
+class ResponseCacheTests(FitHubTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = make_user()
+        self.client.force_authenticate(self.user)
+        self.today = timezone.localdate()
+        self.exercise = Exercise.objects.create(name='Run', met=8)
+
+    def dashboard(self):
+        return self.client.get('/api/dashboard/today/', {'fields': 'target,calories,meals,workouts,pose_sets'}).data
+
+    def assertInvalidatedBy(self, write):
+        before = self.dashboard()
+        self.assertEqual(self.dashboard(), before)
+        with self.captureOnCommitCallbacks(execute=True):
+            write()
+        after = self.dashboard()
+        self.assertNotEqual(after, before)
+        return after
+
+    def test_cached_response_is_served_until_a_write(self):
+        meal = MealPlan.objects.create(user=self.user, meal='Lunch', name='Rice', ingredients=[], calories=600)
+        before = self.dashboard()
+        # A queryset update skips the signals, so nothing invalidates the cached copy
+        with self.captureOnCommitCallbacks(execute=True):
+            MealPlan.objects.filter(pk=meal.pk).update(name='Soup')
+        self.assertEqual(self.dashboard(), before)
+
+    def test_meal_writes(self):
+        meal = MealPlan.objects.create(user=self.user, meal='Lunch', name='Rice', ingredients=[], calories=600)
+        after = self.assertInvalidatedBy(lambda: meal.set_consumed(True))
+        self.assertEqual(after['calories']['consumed'], 600)
+
+        after = self.assertInvalidatedBy(meal.delete)
+        self.assertEqual(after['meals']['planned'], 0)
+
+    def test_workout_writes(self):
+        workout = Workout.objects.create(user=self.user, total_calories=0)
+        exercise = WorkoutExercise.objects.create(workout=workout, exercise=self.exercise)
+
+        after = self.assertInvalidatedBy(lambda: exercise.finish(600, 90))
+        self.assertEqual(after['workouts']['exercises_done'], 1)
+        self.assertEqual(after['calories']['burned'], 90)
+
+        after = self.assertInvalidatedBy(workout.delete)
+        self.assertEqual(after['workouts']['workouts'], 0)
+
+    def test_pose_set_writes(self):
+        session = PoseEstimationSession.objects.create(user=self.user, pose_type='Squat')
+        after = self.assertInvalidatedBy(lambda: PoseExerciseSet.objects.create(
+            user=self.user, session=session, date=self.today, calories_burned=30,
+        ))
+        self.assertEqual(len(after['pose_sets']), 1)
+
+    def test_profile_writes(self):
+        def lose_weight():
+            self.user.weight = 75
+            self.user.save()
+
+        self.assertInvalidatedBy(lose_weight)
+
+    def test_other_users_writes_do_not_invalidate(self):
+        before = self.dashboard()
+        version = CustomUser.objects.get(pk=self.user.pk).response_version
+        other = make_user('other@example.com')
+        with self.captureOnCommitCallbacks(execute=True):
+            MealPlan.objects.create(user=other, meal='Lunch', name='Rice', ingredients=[], calories=600)
+        self.assertEqual(CustomUser.objects.get(pk=self.user.pk).response_version, version)
+        self.assertEqual(self.dashboard(), before)
+
+
+class CalorieTargetHistoryTests(FitHubTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = make_user()
+        self.today = timezone.localdate()
+        CalorieTargetHistory.objects.filter(user=self.user).update(effective_date=self.today - timedelta(days=30))
+        self.first_target = DailyCalorieSummary.target_for(self.user, self.today)
+
+    def change_weight(self, weight):
+        self.user.weight = weight
+        self.user.save()
+
+    def test_only_input_changes_add_rows(self):
+        self.user.first_name = 'Renamed'
+        self.user.save()
+        self.assertEqual(CalorieTargetHistory.objects.filter(user=self.user).count(), 1)
+
+        self.change_weight(78)
+        self.change_weight(76)
+        rows = list(CalorieTargetHistory.objects.filter(user=self.user).order_by('effective_date'))
+        self.assertEqual([row.effective_date for row in rows], [self.today - timedelta(days=30), self.today])
+        self.assertEqual(rows[-1].weight, 76)
+
+    def test_past_days_keep_their_target(self):
+        self.change_weight(70)
+        yesterday = self.today - timedelta(days=1)
+        new_target = DailyCalorieSummary.target_for(self.user, self.today)
+        self.assertNotEqual(new_target, self.first_target)
+        self.assertEqual(DailyCalorieSummary.target_for(self.user, yesterday), self.first_target)
+        self.assertEqual(DailyCalorieSummary.target_for(self.user, self.today - timedelta(days=400)), self.first_target)
+
+        MealPlan.objects.create(
+            user=self.user, meal='Lunch', name='Rice', ingredients=[], calories=600, plan_date=yesterday,
+        ).set_consumed(True)
+        summary = DailyCalorieSummary.objects.get(user=self.user, date=yesterday)
+        self.assertEqual(summary.calorie_target, self.first_target)
+        self.assertEqual(summary.tdee, CalorieTargetHistory.as_of(self.user, yesterday).tdee)
+
+    def test_recalculate_adds_rows_only_for_changed_results(self):
+        out = io.StringIO()
+        call_command('recalculate_calorie_targets', stdout=out)
+        self.assertIn('Updated 0 calorie targets', out.getvalue())
+
+        # As after a formula change: the stored result no longer matches the inputs
+        CalorieTargetHistory.objects.filter(user=self.user).update(daily_target=1234)
+        call_command('recalculate_calorie_targets', '--dry-run', stdout=out)
+        self.assertIn('Would update 1 calorie targets', out.getvalue())
+        self.assertEqual(CalorieTargetHistory.objects.filter(user=self.user).count(), 1)
+
+        call_command('recalculate_calorie_targets', stdout=out)
+        latest = CalorieTargetHistory.as_of(self.user, self.today)
+        self.assertEqual((latest.effective_date, latest.daily_target), (self.today, self.first_target))
+        self.assertEqual(CalorieTargetHistory.as_of(self.user, self.today - timedelta(days=1)).daily_target, 1234)
+
+
+class RebuildDailySummaryTests(FitHubTestCase):
+    def setUp(self):
+        super().setUp()
+        self.today = timezone.localdate()
+        self.users = [make_user(f'user{i}@example.com') for i in range(3)]
+        for user in self.users:
+            for days_ago in range(4):
+                day = self.today - timedelta(days=days_ago)
+                self.meal(user, day, 2000).set_consumed(True)
+                Workout.objects.create(user=user, workout_date=day, total_calories=100).record_calories(100)
+
+    def meal(self, user, day, calories, **fields):
+        return MealPlan.objects.create(
+            user=user, meal='Lunch', name='Rice', ingredients=[], calories=calories, plan_date=day, **fields
+        )
+
+    def ledger(self, user):
+        user.refresh_from_db()
+        rows = DailyCalorieSummary.objects.filter(user=user).order_by('date').values_list(
+            'date', 'calories_consumed', 'calories_burned', 'net_calories', 'energy_balance', 'cumulative_balance'
+        )
+        return list(rows), user.cumulative_energy_balance
+
+    def expected_ledger(self, user):
+        """The ledger rebuilt one day at a time from the sources."""
+        rows, running = [], 0.0
+        for summary in DailyCalorieSummary.objects.filter(user=user).order_by('date'):
+            consumed, burned = DailyCalorieSummary.totals_for(user, summary.date)
+            balance = DailyCalorieSummary.balance_of(consumed, burned, summary.tdee)
+            running += balance
+            rows.append((
+                summary.date, consumed, burned, consumed - burned - summary.calorie_target, balance, running,
+            ))
+        return rows, running
+
+    def test_rebuild_repairs_drift_and_shifts_later_days(self):
+        drifted, untouched = self.users[0], self.users[2]
+        yesterday = self.today - timedelta(days=1)
+        # Writes that skipped the ledger: a meal stored as eaten and a workout deleted in bulk
+        self.meal(drifted, yesterday, 400, is_consumed=True)
+        Workout.objects.filter(user=drifted, workout_date=self.today - timedelta(days=2)).delete()
+        untouched_before = self.ledger(untouched)
+
+        written = DailyCalorieSummary.rebuild_range(
+            self.users[0].pk, self.users[1].pk, self.today - timedelta(days=2), yesterday
+        )
+        self.assertEqual(written, 4)
+
+        rows, total = self.ledger(drifted)
+        expected_rows, expected_total = self.expected_ledger(drifted)
+        for row, expected in zip(rows, expected_rows):
+            self.assertEqual(row[0], expected[0])
+            np.testing.assert_allclose(row[1:], expected[1:])
+        self.assertAlmostEqual(total, expected_total)
+        self.assertAlmostEqual(rows[-1][-1], expected_total)
+        # Consistent users come through unchanged
+        self.assertEqual(self.ledger(self.users[1]), self.expected_ledger(self.users[1]))
+        self.assertEqual(self.ledger(untouched), untouched_before)
+
+    def test_rows_without_sources_are_zeroed(self):
+        user = self.users[0]
+        day = self.today - timedelta(days=3)
+        MealPlan.objects.filter(user=user, plan_date=day).update(is_consumed=False)
+        Workout.objects.filter(user=user, workout_date=day).delete()
+
+        DailyCalorieSummary.rebuild_range(user.pk, user.pk, day, day)
+        summary = DailyCalorieSummary.objects.get(user=user, date=day)
+        self.assertEqual((summary.calories_consumed, summary.calories_burned, summary.energy_balance), (0, 0, 0))
+        self.assertEqual(self.ledger(user), self.expected_ledger(user))
+
+    def test_command_rebuilds_every_shard(self):
+        for user in self.users:
+            self.meal(user, self.today - timedelta(days=1), 300, is_consumed=True)
+
+        out = io.StringIO()
+        call_command('rebuild_daily_summaries', '--shard-size', '2', '--workers', '1', stdout=out)
+        self.assertIn('Rebuilt 3 daily summaries for 3 users', out.getvalue())
+        self.assertIn('in 2 shards', out.getvalue())
+        for user in self.users:
+            self.assertEqual(self.ledger(user), self.expected_ledger(user))
+
+
+class TodayDashboardTests(FitHubTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = make_user()
+        self.client.force_authenticate(self.user)
+        self.url = '/api/dashboard/today/'
+        meal = MealPlan.objects.create(user=self.user, meal='Lunch', name='Rice', ingredients=[], calories=500)
+        MealPlan.objects.create(user=self.user, meal='Dinner', name='Soup', ingredients=[], calories=300)
+        meal.set_consumed(True)
+        workout = Workout.objects.create(user=self.user, total_calories=0)
+        exercise = Exercise.objects.create(name='Run', met=8)
+        WorkoutExercise.objects.create(workout=workout, exercise=exercise).finish(600, 90)
+        WorkoutExercise.objects.create(workout=workout, exercise=exercise)
+        Workout.objects.create(user=self.user, total_calories=0)  # started, no exercises yet
+
+    def test_full_response(self):
+        # One version lookup, then one query per section; profile needs none
+        with self.assertNumQueries(7):
+            data = self.client.get(self.url).data
+        self.assertEqual(set(data), {'date', *TodayDashboardView.SECTIONS})
+        self.assertEqual(data['calories']['consumed'], 500)
+        self.assertEqual(data['calories']['burned'], 90)
+        self.assertEqual(data['meals']['planned'], 2)
+        self.assertEqual(data['meals']['eaten'], 1)
+        self.assertEqual(data['workouts'], {'workouts': 2, 'exercises_done': 1, 'exercises_in_progress': 1})
+        self.assertEqual(data['target']['daily_calorie_goal'], DailyCalorieSummary.target_for(self.user))
+        self.assertEqual(data['streak'], 1)
+
+    def test_fields_limit_the_sections_and_queries(self):
+        with self.assertNumQueries(3):
+            data = self.client.get(self.url, {'fields': 'calories,meals'}).data
+        self.assertEqual(set(data), {'date', 'calories', 'meals'})
+
+    def test_target_lookup_is_shared_before_the_day_opens(self):
+        DailyCalorieSummary.objects.filter(user=self.user).delete()
+        with self.assertNumQueries(3):
+            data = self.client.get(self.url, {'fields': 'target,calories'}).data
+        self.assertEqual(data['calories']['target'], data['target']['daily_calorie_goal'])
+        self.assertEqual(data['calories']['net'], -data['calories']['target'])
+
+    def test_unknown_fields_are_rejected(self):
+        response = self.client.get(self.url, {'fields': 'calories,bogus'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('bogus', response.data['error'])
+
+
+class DownsampleTests(TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.y = rng.normal(100, 10, size=1000)
+        self.y[417] = 900  # a spike
+        self.y[730] = -500  # a trough
+
+    def test_lttb_keeps_exactly_the_budget(self):
+        for n_out in (3, 10, 77, 500, 999):
+            with self.subTest(n_out=n_out):
+                picked = downsample.lttb_indices(self.y, n_out)
+                self.assertEqual(len(picked), n_out)
+                self.assertTrue((np.diff(picked) > 0).all())
+                self.assertEqual((picked[0], picked[-1]), (0, 999))
+        self.assertIn(417, downsample.lttb_indices(self.y, 50))
+        self.assertIn(730, downsample.lttb_indices(self.y, 50))
+
+    def test_minmax_keeps_every_extreme_within_the_budget(self):
+        for n_out in (2, 11, 100, 999):
+            with self.subTest(n_out=n_out):
+                picked = downsample.minmax_indices(self.y, n_out)
+                self.assertLessEqual(len(picked), n_out)
+                self.assertIn(417, picked)
+                self.assertIn(730, picked)
+
+    def test_short_series_are_returned_whole(self):
+        np.testing.assert_array_equal(downsample.lttb_indices(self.y[:20], 50), np.arange(20))
+        np.testing.assert_array_equal(downsample.minmax_indices(self.y[:20], 20), np.arange(20))
+
+    def test_records_never_exceed_max_points(self):
+        records = [{'a': float(a), 'b': float(b)} for a, b in zip(self.y, self.y[::-1])]
+        for method in downsample.METHODS:
+            for max_points in (6, 7, 50, 333):
+                with self.subTest(method=method, max_points=max_points):
+                    kept = downsample.downsample_records(records, ('a', 'b'), max_points, method)
+                    self.assertLessEqual(len(kept), max_points)
+                    # A spike in either series survives
+                    self.assertIn(900.0, [record['a'] for record in kept])
+                    self.assertIn(900.0, [record['b'] for record in kept])
+
+        self.assertIs(downsample.downsample_records(records, ('a', 'b'), None), records)
+        with self.assertRaises(ValueError):
+            downsample.downsample_records(records, ('a', 'b'), 5)
+
+    def test_parse_params(self):
+        self.assertEqual(downsample.parse_params({}), (None, 'lttb'))
+        self.assertEqual(downsample.parse_params({'max_points': '40', 'downsample': 'minmax'}, 2), (40, 'minmax'))
+        for params in ({'downsample': 'mean'}, {'max_points': 'many'}, {'max_points': '5'}, {'max_points': '20000'}):
+            with self.subTest(params=params), self.assertRaises(ValueError):
+                downsample.parse_params(params, series_count=2)
+
+
+class ChartDownsampleTests(FitHubTestCase):
+    def test_progress_chart_respects_max_points(self):
+        user = make_user()
+        self.client.force_authenticate(user)
+        today = date.today()
+        Workout.objects.bulk_create([
+            Workout(user=user, workout_date=today - timedelta(days=days_ago), total_calories=100 + days_ago % 7)
+            for days_ago in range(365)
+        ])
+
+        for method in downsample.METHODS:
+            with self.subTest(method=method):
+                response = self.client.get('/api/visualization/', {
+                    'period': 'year', 'granularity': 'day', 'max_points': 40, 'downsample': method,
+                })
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertLessEqual(len(response.data['daily_data']), 40)
+                # The summary still covers every day
+                self.assertEqual(response.data['summary']['total_workout_calories'], sum(
+                    100 + days_ago % 7 for days_ago in range(365)
+                ))
+
+        response = self.client.get('/api/visualization/', {'period': 'year', 'granularity': 'day', 'max_points': 3})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class LogPerformanceTests(FitHubTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = make_user()
+        self.client.force_authenticate(self.user)
+        workout = Workout.objects.create(user=self.user, total_calories=0)
+        self.exercise = WorkoutExercise.objects.create(workout=workout, exercise=Exercise.objects.create(name='Squat'))
+
+    def log(self, sets, workout_exercise=None):
+        return self.client.post('/api/log-exercise-performance/', {
+            'workout_exercise_id': (workout_exercise or self.exercise).id,
+            'sets': sets,
+        }, format='json')
+
+    def sets(self, count):
+        return [{'set_number': i + 1, 'reps': 8, 'weight': 60 + i} for i in range(count)]
+
+    def test_sets_and_history_are_written_together(self):
+        response = self.log(self.sets(3))
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        performances = ExercisePerformance.objects.filter(workout_exercise=self.exercise).order_by('set_number')
+        self.assertEqual([(p.set_number, p.weight) for p in performances], [(1, 60), (2, 61), (3, 62)])
+        history = ExerciseHistory.objects.filter(workout_exercise=self.exercise).order_by('weight_per_set')
+        self.assertEqual(
+            list(history.values_list('user_id', 'sets', 'reps_per_set', 'weight_per_set')),
+            [(self.user.id, 1, 8, 60.0), (self.user.id, 1, 8, 61.0), (self.user.id, 1, 8, 62.0)],
+        )
+
+    def test_bulk_history_matches_a_single_save(self):
+        ExercisePerformance.objects.create(workout_exercise=self.exercise, set_number=1, reps=8, weight=60)
+        ExercisePerformance.log_sets(self.exercise, self.sets(1))
+        fields = ('user_id', 'exercise_id', 'workout_id', 'workout_exercise_id', 'date', 'sets', 'reps_per_set',
+                  'weight_per_set')
+        first, second = ExerciseHistory.objects.order_by('id').values_list(*fields)
+        self.assertEqual(first, second)
+
+    def test_query_count_does_not_grow_with_the_batch(self):
+        # Exercise lookup, then one insert each for the sets and their history inside a savepoint
+        with self.assertNumQueries(5):
+            self.log(self.sets(2))
+        with self.assertNumQueries(5):
+            self.log(self.sets(40))
+
+    def test_invalid_batches_write_nothing(self):
+        sets = self.sets(3)
+        sets[2]['reps'] = -1
+        self.assertEqual(self.log(sets).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.log(self.sets(LogPerformanceBatchSerializer.MAX_SETS + 1)).status_code,
+                         status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(ExercisePerformance.objects.exists())
+
+        other = Workout.objects.create(user=make_user('other@example.com'), total_calories=0)
+        other_exercise = WorkoutExercise.objects.create(workout=other, exercise=self.exercise.exercise)
+        self.assertEqual(self.log(self.sets(1), other_exercise).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertFalse(ExercisePerformance.objects.exists())
+
+
+class WorkoutSyncTests(FitHubTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = make_user()
+        self.client.force_authenticate(self.user)
+        Exercise.objects.create(name='Squat', met=5)
+        self.day = date.today() - timedelta(days=1)
+        self.upload = {'workouts': [{
+            'workout_date': self.day.isoformat(),
+            'exercises': [
+                {'client_id': str(uuid.uuid4()), 'exercise_name': 'squat', 'total_time_seconds': 600,
+                 'calories_burned': 80, 'sets': [{'set_number': 1, 'reps': 8, 'weight': 60}]},
+                {'client_id': str(uuid.uuid4()), 'exercise_name': 'Squat', 'total_time_seconds': 300,
+                 'calories_burned': 40},
+            ],
+        }]}
+
+    def totals(self):
+        self.user.refresh_from_db()
+        return (
+            list(Workout.objects.filter(user=self.user).values_list('total_time', 'total_calories')),
+            WorkoutExercise.objects.filter(workout__user=self.user).count(),
+            DailyCalorieSummary.objects.get(user=self.user, date=self.day).calories_burned,
+            self.user.cumulative_energy_balance,
+            list(ProgressRollup.objects.filter(user=self.user).values_list('workout_calories', 'workout_count')),
+        )
+
+    def test_upload_creates_exercises_and_updates_ledgers_once(self):
+        response = self.client.post('/api/workouts/sync/', self.upload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        statuses = [exercise['status'] for exercise in response.data['workouts'][0]['exercises']]
+        self.assertEqual(statuses, ['created', 'created'])
+
+        workouts, exercise_count, burned, _, rollups = self.totals()
+        self.assertEqual(workouts, [(timedelta(seconds=900), 120.0)])
+        self.assertEqual(exercise_count, 2)
+        self.assertEqual(burned, 120.0)
+        self.assertEqual(rollups, [(120.0, 1), (120.0, 1)])
+
+    def test_retried_upload_is_reported_as_duplicate_and_changes_nothing(self):
+        self.client.post('/api/workouts/sync/', self.upload, format='json')
+        before = self.totals()
+
+        response = self.client.post('/api/workouts/sync/', self.upload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        statuses = [exercise['status'] for exercise in response.data['workouts'][0]['exercises']]
+        self.assertEqual(statuses, ['duplicate', 'duplicate'])
+        self.assertEqual(self.totals(), before)
+
+    def test_client_id_of_another_user_does_not_collide(self):
+        other = make_user('other@example.com')
+        self.client.force_authenticate(other)
+        self.client.post('/api/workouts/sync/', self.upload, format='json')
+        self.client.force_authenticate(self.user)
+
+        response = self.client.post('/api/workouts/sync/', self.upload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(WorkoutExercise.objects.filter(workout__user=self.user).count(), 2)
+
+
+class WorkoutExerciseFinishTests(FitHubTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = make_user()
+        self.workout = Workout.objects.create(user=self.user, total_time=timedelta(0), total_calories=0)
+        exercise = Exercise.objects.create(name='Run', met=8)
+        self.exercises = [WorkoutExercise.objects.create(workout=self.workout, exercise=exercise) for _ in range(2)]
+
+    def test_finish_adds_to_workout_with_stale_instances(self):
+        # Both ends go through instances holding the same stale workout totals
+        first, second = (WorkoutExercise.objects.select_related('workout').get(pk=we.pk) for we in self.exercises)
+        self.assertTrue(first.finish(60, 10))
+        self.assertTrue(second.finish(120, 15))
+
+        self.workout.refresh_from_db()
+        self.assertEqual(self.workout.total_time, timedelta(seconds=180))
+        self.assertEqual(self.workout.total_calories, 25.0)
+        self.assertEqual(DailyCalorieSummary.objects.get(user=self.user).calories_burned, 25.0)
+
+    def test_repeated_finish_changes_nothing(self):
+        exercise = self.exercises[0]
+        self.assertTrue(exercise.finish(60, 10))
+        self.assertFalse(exercise.finish(90, 20))
+
+        exercise.refresh_from_db()
+        self.workout.refresh_from_db()
+        self.assertEqual((exercise.total_time, exercise.total_calories), (timedelta(seconds=60), 10.0))
+        self.assertEqual((self.workout.total_time, self.workout.total_calories), (timedelta(seconds=60), 10.0))
+        self.assertEqual(DailyCalorieSummary.objects.get(user=self.user).calories_burned, 10.0)
+
+
+class ReconcileWorkoutTotalsTests(FitHubTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = make_user()
+        self.client.force_authenticate(self.user)
+        self.exercise = Exercise.objects.create(name='Run', met=8)
+        self.day = date.today() - timedelta(days=1)
+
+    def workout(self, *ends):
+        workout = Workout.objects.create(user=self.user, workout_date=self.day, total_time=timedelta(0), total_calories=0)
+        exercises = [WorkoutExercise.objects.create(workout=workout, exercise=self.exercise) for _ in ends]
+        for exercise, (seconds, calories) in zip(exercises, ends):
+            exercise.finish(seconds, calories)
+        return workout, exercises
+
+    def reconcile(self, *args):
+        out = io.StringIO()
+        call_command('reconcile_workout_totals', *args, stdout=out)
+        return out.getvalue()
+
+    def ledgers(self):
+        return (
+            DailyCalorieSummary.objects.get(user=self.user, date=self.day).calories_burned,
+            list(ProgressRollup.objects.filter(user=self.user).values_list('workout_calories', flat=True)),
+        )
+
+    def test_cancelled_exercise_is_taken_out_of_every_total(self):
+        workout, exercises = self.workout((60, 10), (120, 15))
+        # Deleting a finished exercise leaves its time and calories in the workout and the ledgers
+        self.client.delete(f'/api/cancel-exercise/{exercises[1].id}/')
+        self.assertEqual(self.ledgers(), (25.0, [25.0, 25.0]))
+
+        self.assertIn('1 workouts have drifted totals', self.reconcile('--dry-run'))
+        self.assertEqual(self.ledgers(), (25.0, [25.0, 25.0]))
+
+        self.assertIn('Repaired 1 workouts', self.reconcile())
+        workout.refresh_from_db()
+        self.assertEqual((workout.total_time, workout.total_calories), (timedelta(seconds=60), 10.0))
+        self.assertEqual(self.ledgers(), (10.0, [10.0, 10.0]))
+        summary = DailyCalorieSummary.objects.get(user=self.user, date=self.day)
+        self.assertEqual(summary.net_calories, -10.0 - summary.calorie_target)
+
+        self.assertIn('0 workouts have drifted totals', self.reconcile('--dry-run'))
+
+    def test_changes_on_one_day_are_netted(self):
+        raised, _ = self.workout((60, 10))
+        lowered, exercises = self.workout((60, 20), (60, 30))
+        # A lost update that the ledgers copied, and a cancelled exercise
+        Workout.objects.filter(pk=raised.pk).update(total_calories=15)
+        DailyCalorieSummary.apply_delta(self.user, self.day, burned=5)
+        ProgressRollup.add(self.user.pk, self.day, workout_calories=5)
+        exercises[1].delete()
+        self.assertEqual(self.ledgers(), (65.0, [65.0, 65.0]))
+
+        self.assertIn('Repaired 2 workouts', self.reconcile())
+        self.assertEqual(self.ledgers(), (30.0, [30.0, 30.0]))
+        self.assertEqual(
+            list(Workout.objects.filter(user=self.user).order_by('pk').values_list('total_calories', flat=True)),
+            [10.0, 20.0],
+        )
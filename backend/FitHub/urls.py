@@ -27,7 +27,10 @@ urlpatterns = [
 
     path('progress/summary/', views.CalorieProgressSummaryView.as_view(), name='calorie-progress-summary'),
     path('progress/exercise/', views.ExerciseProgressView.as_view(), name='exercise-progress'),
+    path('progress/trend/', views.CalorieTrendView.as_view(), name='calorie-trend'),
+    path('progress/forecast/', views.WeightForecastView.as_view(), name='weight-forecast'),
     path('daily-summary/', views.DailySummaryView.as_view(), name='daily-summary'),
+    path('dashboard/today/', views.TodayDashboardView.as_view(), name='today-dashboard'),
     path('daily-calorie-summary/', views.DailyCalorieSummaryView.as_view(), name='daily_calorie_summary'),
     path('visualization/', views.ProgressVisualizationAPIView.as_view(), name='progress_visualization'),
     path('workout-stats/', views.WorkoutStatsView.as_view(), name='workout-stats'),
@@ -39,6 +42,7 @@ urlpatterns = [
     path('end-exercise/', views.EndExerciseView.as_view(), name='end_exercise'),
     path('cancel-exercise/<int:workout_exercise_id>/', views.CancelExerciseView.as_view(), name='cancel-exercise'),
     path('log-exercise-performance/', views.LogExercisePerformanceView.as_view(), name='log_exercise_performance'),
+    path('workouts/sync/', views.WorkoutSyncView.as_view(), name='workout_sync'),
     path('recommend-exercise/', views.RecommendExercisesView.as_view(), name='recommend-top-exercise'),
     path('workout-dates/', views.WorkoutDatesView.as_view(), name='workout_dates'),
 
@@ -73,7 +77,9 @@ urlpatterns = [
 
     path('pose-session/', views.PoseEstimationSessionCreateView.as_view(), name='pose-session-create'),
     path('pose-session/<int:session_id>/complete/', views.PoseEstimationSessionCompleteView.as_view(), name='pose-session-complete'),
+    path('pose-session/<int:session_id>/frames/', views.PoseFrameExportView.as_view(), name='pose-session-frames'),
     path('pose-feedback/', views.PoseFeedbackCreateView.as_view(), name='pose-feedback-create'),
+    path('pose-feedback/batch/', views.PoseFeedbackBatchCreateView.as_view(), name='pose-feedback-batch-create'),
     path('fitness-summary/', views.DailyFitnessSummaryView.as_view(), name='fitness-summary'),
     path('calories-by-pose/', views.CaloriesByPoseView.as_view(), name='calories-by-pose'),
 
@@ -0,0 +1,58 @@
+"""
+Daily calorie target math (Mifflin-St Jeor BMR, activity multiplier and a
+goal adjustment spread over the goal duration).
+
+compute_targets works on NumPy arrays, so recalculate_calorie_targets can
+process every user at once; CustomUser.calculate_calories calls it with
+one-element arrays.
+"""
+import numpy as np
+
+ACTIVITY_MULTIPLIERS = {
+    'sedentary': 1.2,
+    'light': 1.375,
+    'moderate': 1.55,
+    'active': 1.725,
+    'very active': 1.9,
+}
+DEFAULT_ACTIVITY_MULTIPLIER = 1.55
+DEFAULT_GOAL_DAYS = 90
+
+GOAL_SIGNS = {'Weight Loss': -1, 'Weight Gain': 1}
+GOAL_KEYS = {'Weight Loss': 'weight_loss', 'Weight Gain': 'weight_gain'}
+
+
+def goal_days(goal_duration):
+    """'3 month' -> 90; no duration -> DEFAULT_GOAL_DAYS."""
+    return int(goal_duration.split()[0]) * 30 if goal_duration else DEFAULT_GOAL_DAYS
+
+
+def compute_targets(weight, height, age, gender, goal, goal_weight, goal_duration, activity_level):
+    """
+    Arrays of (bmr, tdee, target) from equal-length input sequences. target
+    is NaN for goals other than weight loss / gain, which have no target.
+    """
+    weight = np.asarray(weight, dtype=float)
+    height = np.asarray(height, dtype=float)
+    age = np.asarray(age, dtype=float)
+    goal_weight = np.array([w if w is not None else np.nan for w in goal_weight], dtype=float)
+    goal_weight = np.where(np.isnan(goal_weight), weight, goal_weight)
+    days = np.array([goal_days(d) for d in goal_duration], dtype=float)
+    multiplier = np.array([ACTIVITY_MULTIPLIERS.get(a, DEFAULT_ACTIVITY_MULTIPLIER) for a in activity_level])
+    sign = np.array([GOAL_SIGNS.get(g, 0) for g in goal], dtype=float)
+    male = np.array([g == 'male' for g in gender])
+
+    bmr = 10 * weight + 6.25 * height - 5 * age + np.where(male, 5.0, -161.0)
+    tdee = bmr * multiplier
+    with np.errstate(divide='ignore', invalid='ignore'):
+        adjustment = np.where(days > 0, np.abs(goal_weight - weight) * 7700 / days, 0.0)
+    target = np.where(sign != 0, np.round(tdee + sign * adjustment), np.nan)
+    return bmr, tdee, target
+
+
+def calorie_dict(goal, target):
+    """The {'weight_loss': ...} / {'weight_gain': ...} / {} shape the API returns."""
+    key = GOAL_KEYS.get(goal)
+    if key is None or target is None or np.isnan(target):
+        return {}
+    return {key: round(target)}
@@ -0,0 +1,113 @@
+"""
+Downsampling of daily chart series to a bounded number of points.
+
+Both methods keep real points of the series (nothing is averaged), so the
+values a chart shows are values that actually occurred:
+
+- lttb: Largest-Triangle-Three-Buckets. The first and last points are
+  always kept, and each bucket in between keeps the point forming the
+  largest triangle with the previous pick and the next bucket's mean,
+  which preserves the visual shape including spikes.
+- minmax: the minimum and the maximum of each bucket, so no peak or
+  trough is ever dropped.
+
+For records with several series each series gets an equal share of the
+budget and the union of the picked rows is returned, so a peak in any
+series survives and the result never has more than max_points rows.
+"""
+import numpy as np
+
+METHODS = ('lttb', 'minmax')
+MIN_POINTS = 3
+
+
+def lttb_indices(y, n_out):
+    """Indices of the points LTTB keeps out of y (x is the position)."""
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n_out >= n or n_out < MIN_POINTS:
+        return np.arange(n)
+
+    x = np.arange(n, dtype=float)
+    # Bucket edges for the n - 2 inner points, split into n_out - 2 buckets
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    means_x = np.add.reduceat(x[1:n - 1], edges[:-1] - 1) / np.diff(edges)
+    means_y = np.add.reduceat(y[1:n - 1], edges[:-1] - 1) / np.diff(edges)
+    # The bucket after the last one is the final point
+    means_x, means_y = np.append(means_x[1:], x[-1]), np.append(means_y[1:], y[-1])
+
+    picked = np.empty(n_out, dtype=int)
+    picked[0], picked[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(n_out - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        areas = np.abs(
+            (x[previous] - means_x[bucket]) * (y[start:stop] - y[previous])
+            - (x[previous] - x[start:stop]) * (means_y[bucket] - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        picked[bucket + 1] = previous
+    return picked
+
+
+def minmax_indices(y, n_out):
+    """Indices of the minimum and maximum of each of n_out // 2 buckets, in order."""
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    buckets = n_out // 2
+    if n_out >= n or buckets < 1:
+        return np.arange(n)
+
+    edges = np.linspace(0, n, buckets + 1).astype(int)
+    # Pad each bucket to the same width so argmin / argmax run over a 2-D block
+    width = int(np.diff(edges).max())
+    positions = edges[:-1, None] + np.arange(width)
+    valid = positions < edges[1:, None]
+    positions = np.where(valid, positions, edges[:-1, None])
+    block = y[positions]
+    lows = positions[np.arange(buckets), np.where(valid, block, np.inf).argmin(axis=1)]
+    highs = positions[np.arange(buckets), np.where(valid, block, -np.inf).argmax(axis=1)]
+    return np.unique(np.concatenate([lows, highs]))
+
+
+def downsample_records(records, series, max_points, method='lttb'):
+    """
+    Rows of `records` (a list of dicts, in date order) kept when the
+    numeric `series` keys are downsampled to at most max_points rows.
+    Raises ValueError when max_points leaves a series fewer than
+    MIN_POINTS points (parse_params rejects those first).
+    """
+    if not max_points or len(records) <= max_points:
+        return records
+    pick = lttb_indices if method == 'lttb' else minmax_indices
+    budget = max_points // max(len(series), 1)
+    if budget < MIN_POINTS:
+        raise ValueError(f'max_points must be at least {MIN_POINTS * len(series)}.')
+
+    keep = np.zeros(len(records), dtype=bool)
+    for key in series:
+        values = np.array([record.get(key) or 0 for record in records], dtype=float)
+        keep[pick(values, budget)] = True
+    return [record for record, kept in zip(records, keep) if kept]
+
+
+def parse_params(query_params, series_count=1, upper=10000):
+    """
+    (max_points, method) from ?max_points=&downsample= query parameters;
+    max_points is None when absent. Raises ValueError when invalid,
+    including a max_points below MIN_POINTS for each of series_count series.
+    """
+    method = query_params.get('downsample', 'lttb')
+    if method not in METHODS:
+        raise ValueError(f"downsample must be one of {', '.join(METHODS)}.")
+    value = query_params.get('max_points')
+    if value in (None, ''):
+        return None, method
+    try:
+        max_points = int(value)
+    except ValueError:
+        raise ValueError('max_points must be an integer.')
+    lower = MIN_POINTS * series_count
+    if not lower <= max_points <= upper:
+        raise ValueError(f'max_points must be between {lower} and {upper}.')
+    return max_points, method
@@ -0,0 +1,225 @@
+"""
+Server-side rep counting and form scoring for pose sessions.
+
+Everything works on the whole frames x joints x 3 keypoint array at once
+(see FitHub.utils.poseCodec), so a 10-minute session is a handful of NumPy
+passes rather than a Python loop over frames. The default thresholds mirror
+checkPoseAccuracy in PoseScreen.jsx; PoseType rows can override them.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from FitHub.utils.poseCodec import JOINT_INDEX
+
+POSE_ANALYSIS = {
+    'squat': {
+        'analyzer': 'squat',
+        'down_angle': 70.0,     # knee angle that starts the "down" phase
+        'up_angle': 100.0,      # knee angle that completes the rep
+        'target_angle': 90.0,   # ideal knee / hip angle at the bottom
+        'tolerance': 10.0,      # deviation still scored as perfect
+    },
+    'lunge': {
+        'analyzer': 'lunge',
+        'down_angle': 70.0,
+        'up_angle': 100.0,
+        'target_angle': 90.0,
+        'tolerance': 10.0,
+        'torso_min_angle': 150.0,  # shoulder-hip-knee angle for an upright torso
+    },
+}
+
+PoseAnalysis = namedtuple('PoseAnalysis', [
+    'rep_count',    # number of completed reps
+    'rep_bounds',   # int array (reps, 3): start, bottom and end frame index
+    'rep_scores',   # float array (reps,): form score 0-100 per rep
+    'score',        # mean rep score, or None without reps
+    'angles',       # dict of per-frame angle series in degrees
+    'primary',      # name of the angle series that drives rep detection
+])
+
+
+def normalize_pose_type(pose_type):
+    """'Squats ' -> 'squat'."""
+    name = (pose_type or '').strip().lower()
+    if name.endswith('s'):
+        name = name[:-1]
+    return name
+
+
+def get_config(pose_type):
+    """
+    Analysis config for a pose type. Registered PoseType rows win, and the
+    POSE_ANALYSIS defaults cover pose types missing from the registry.
+    """
+    from FitHub.utils import poseRegistry
+
+    entry = poseRegistry.lookup(pose_type)
+    if entry is not None:
+        return entry.analysis
+    return POSE_ANALYSIS.get(normalize_pose_type(pose_type))
+
+
+def joint_angle(keypoints, a, b, c):
+    """
+    Angle at joint b (degrees) formed by a-b-c for every frame.
+    NaN where any joint is missing or a limb has zero length.
+    """
+    p1 = keypoints[:, JOINT_INDEX[a], :2]
+    p2 = keypoints[:, JOINT_INDEX[b], :2]
+    p3 = keypoints[:, JOINT_INDEX[c], :2]
+    v1 = p1 - p2
+    v2 = p3 - p2
+    dot = np.einsum('ij,ij->i', v1, v2)
+    norms = np.linalg.norm(v1, axis=1) * np.linalg.norm(v2, axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cos = np.clip(dot / np.where(norms == 0, np.nan, norms), -1.0, 1.0)
+    return np.degrees(np.arccos(cos))
+
+
+def _squat_angles(keypoints):
+    left_knee = joint_angle(keypoints, 'leftHip', 'leftKnee', 'leftAnkle')
+    right_knee = joint_angle(keypoints, 'rightHip', 'rightKnee', 'rightAnkle')
+    left_hip = joint_angle(keypoints, 'leftShoulder', 'leftHip', 'leftKnee')
+    right_hip = joint_angle(keypoints, 'rightShoulder', 'rightHip', 'rightKnee')
+
+    # The client tracks the left side when both knees are visible
+    knees_visible = (
+        ~np.isnan(keypoints[:, JOINT_INDEX['leftKnee'], 0])
+        & ~np.isnan(keypoints[:, JOINT_INDEX['rightKnee'], 0])
+    )
+    return {
+        'knee': np.where(knees_visible, left_knee, right_knee),
+        'hip': np.where(knees_visible, left_hip, right_hip),
+    }, 'knee'
+
+
+def _lunge_angles(keypoints):
+    left_knee = joint_angle(keypoints, 'leftHip', 'leftKnee', 'leftAnkle')
+    right_knee = joint_angle(keypoints, 'rightHip', 'rightKnee', 'rightAnkle')
+    torso = joint_angle(keypoints, 'leftShoulder', 'leftHip', 'rightKnee')
+    torso_fallback = joint_angle(keypoints, 'rightShoulder', 'rightHip', 'leftKnee')
+    return {
+        'front_knee': np.fmin(left_knee, right_knee),
+        'torso': np.where(np.isnan(torso) | (torso == 0), torso_fallback, torso),
+    }, 'front_knee'
+
+
+ANGLE_BUILDERS = {
+    'squat': _squat_angles,
+    'lunge': _lunge_angles,
+}
+
+
+def rep_phases(angle, down_angle, up_angle):
+    """
+    Raw per-frame phase: -1 below down_angle, +1 above up_angle, 0 in between
+    or when the angle is unknown.
+    """
+    raw = np.zeros(len(angle), dtype=np.int8)
+    with np.errstate(invalid='ignore'):
+        raw[angle < down_angle] = -1
+        raw[angle > up_angle] = 1
+    return raw
+
+
+def detect_reps(angle, down_angle, up_angle):
+    """
+    Hysteresis rep detector. A rep starts on the frame the angle drops below
+    down_angle and ends on the frame it rises back above up_angle; the state
+    starts "up". Returns (starts, ends) frame index arrays.
+    """
+    raw = np.concatenate(([1], rep_phases(angle, down_angle, up_angle)))
+    # Carry the last non-zero phase forward over the in-between frames
+    last_set = np.maximum.accumulate(np.where(raw != 0, np.arange(len(raw)), 0))
+    state = raw[last_set]
+
+    change = np.diff(state)
+    downs = np.flatnonzero(change < 0)
+    ups = np.flatnonzero(change > 0)
+    return downs[:len(ups)], ups
+
+
+def segment_argmin(values, starts, ends):
+    """First index of the minimum of values[start:end] for every segment."""
+    if not len(starts):
+        return np.empty(0, dtype=np.int64)
+    # Trailing inf lets a segment end one past the last frame
+    filled = np.append(np.where(np.isnan(values), np.inf, values), np.inf)
+    bounds = np.empty(len(starts) * 2, dtype=np.int64)
+    bounds[0::2] = starts
+    bounds[1::2] = ends
+    minima = np.minimum.reduceat(filled, bounds)[0::2]
+
+    marks = np.zeros(len(values) + 1, dtype=np.int64)
+    np.add.at(marks, starts, 1)
+    np.add.at(marks, ends, -1)
+    inside = np.cumsum(marks[:-1]) > 0
+    segment = np.searchsorted(starts, np.arange(len(values)), side='right') - 1
+
+    candidates = np.flatnonzero(inside & (filled[:-1] == minima[np.clip(segment, 0, None)]))
+    _, first = np.unique(segment[candidates], return_index=True)
+    return candidates[first]
+
+
+def _score(deviation, tolerance):
+    """100 within tolerance, falling linearly to 0 at four times the tolerance."""
+    excess = np.clip(np.nan_to_num(deviation, nan=0.0) - tolerance, 0, None)
+    return np.clip(100.0 * (1.0 - excess / (3.0 * tolerance)), 0.0, 100.0)
+
+
+def score_reps(analyzer, angles, bottoms, config):
+    target = config['target_angle']
+    if analyzer == 'squat':
+        deviation = np.fmax(
+            np.abs(angles['knee'][bottoms] - target),
+            np.abs(angles['hip'][bottoms] - target),
+        )
+    else:
+        lean = np.clip(config['torso_min_angle'] - angles['torso'][bottoms], 0, None)
+        deviation = np.abs(angles['front_knee'][bottoms] - target) + np.nan_to_num(lean, nan=0.0)
+    return np.round(_score(deviation, config['tolerance']), 1)
+
+
+def analyze_frames(pose_type, frames, config=None):
+    """
+    Count reps and grade form for one session's poseCodec.PoseFrames.
+    Returns None for pose types without an analyzer or sessions without frames.
+    """
+    config = config or get_config(pose_type)
+    if not config or config.get('analyzer') not in ANGLE_BUILDERS or not len(frames.frame_ids):
+        return None
+
+    analyzer = config['analyzer']
+    angles, primary = ANGLE_BUILDERS[analyzer](frames.keypoints)
+    starts, ends = detect_reps(angles[primary], config['down_angle'], config['up_angle'])
+    bottoms = segment_argmin(angles[primary], starts, ends)
+    scores = score_reps(analyzer, angles, bottoms, config)
+
+    return PoseAnalysis(
+        rep_count=len(starts),
+        rep_bounds=np.stack([starts, bottoms, ends], axis=1) if len(starts) else np.empty((0, 3), dtype=np.int64),
+        rep_scores=scores,
+        score=round(float(scores.mean()), 1) if len(scores) else None,
+        angles=angles,
+        primary=primary,
+    )
+
+
+def rep_angle_stats(analysis):
+    """Per-rep (min, max, mean) of the primary angle over [start, end)."""
+    angle = analysis.angles[analysis.primary]
+    if not analysis.rep_count:
+        empty = np.empty(0)
+        return empty, empty, empty
+
+    bounds = analysis.rep_bounds[:, [0, 2]].ravel()
+    padded = np.append(angle, np.nan)
+    valid = ~np.isnan(padded)
+    counts = np.add.reduceat(valid, bounds)[0::2]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        minima = np.minimum.reduceat(np.where(valid, padded, np.inf), bounds)[0::2]
+        maxima = np.maximum.reduceat(np.where(valid, padded, -np.inf), bounds)[0::2]
+        means = np.add.reduceat(np.where(valid, padded, 0.0), bounds)[0::2] / counts
+    return minima, maxima, means
@@ -0,0 +1,183 @@
+"""
+Compact binary layout for pose keypoints.
+
+Frames are stored as dense arrays with a fixed joint order instead of one
+landmark dict per frame. A chunk holds up to CHUNK_FRAMES frames laid out as:
+
+    frame_ids   int64   [frames]
+    confidence  float16 [frames]
+    keypoints   float16 [frames, joints, 3]   (x, y, score)
+
+and the whole buffer is zlib-compressed. Missing joints are stored as NaN.
+Decoding always hands back int64 frame ids and float32 arrays. Frame ids
+are capture times in POSE_FRAME_ID_SECONDS ticks (about 1.8e10), so they
+need 64 bits; format version 1 chunks stored them as int32 and are still
+read.
+
+The export stream (stream_header / encode_stream_block) is uncompressed and
+float32: one JSON header line, then blocks of
+
+    uint32 frame_count | int64 frame_ids | float32 confidence | float32 keypoints
+
+all little-endian, until the end of the response.
+"""
+import json
+import struct
+import zlib
+from collections import namedtuple
+
+import numpy as np
+
+# Keypoint names as sent by react-native-human-pose (see PoseScreen.jsx)
+JOINTS = (
+    'nose',
+    'leftEye', 'rightEye',
+    'leftEar', 'rightEar',
+    'leftShoulder', 'rightShoulder',
+    'leftElbow', 'rightElbow',
+    'leftWrist', 'rightWrist',
+    'leftHip', 'rightHip',
+    'leftKnee', 'rightKnee',
+    'leftAnkle', 'rightAnkle',
+)
+JOINT_INDEX = {name: i for i, name in enumerate(JOINTS)}
+CHANNELS = ('x', 'y', 'score')
+
+CHUNK_FRAMES = 256
+FORMAT_VERSION = 2
+
+# Frame id dtype of each chunk format version
+_FRAME_ID_DTYPES = {1: np.int32, 2: np.int64}
+
+_STORED_DTYPE = np.float16
+
+PoseFrames = namedtuple('PoseFrames', ['frame_ids', 'keypoints', 'confidence'])
+
+
+def empty_frames():
+    return PoseFrames(
+        np.empty(0, dtype=np.int64),
+        np.empty((0, len(JOINTS), len(CHANNELS)), dtype=np.float32),
+        np.empty(0, dtype=np.float32),
+    )
+
+
+def _joint_score(point):
+    score = point.get('score', point.get('confidence'))
+    return np.nan if score is None else score
+
+
+def landmarks_to_array(landmarks_list):
+    """Convert a list of landmark dicts into a frames x joints x 3 float32 array."""
+    keypoints = np.full((len(landmarks_list), len(JOINTS), len(CHANNELS)), np.nan, dtype=np.float32)
+    for f, landmarks in enumerate(landmarks_list):
+        if not isinstance(landmarks, dict):
+            continue
+        for name, point in landmarks.items():
+            j = JOINT_INDEX.get(name)
+            if j is None or not isinstance(point, dict):
+                continue
+            try:
+                keypoints[f, j] = (point.get('x', np.nan), point.get('y', np.nan), _joint_score(point))
+            except (TypeError, ValueError):
+                continue
+    return keypoints
+
+
+def frames_from_rows(rows):
+    """Build PoseFrames from (frame_id, keypoints_json, confidence_score) rows."""
+    if not rows:
+        return empty_frames()
+    frame_ids, landmarks, confidence = zip(*rows)
+    return PoseFrames(
+        np.asarray(frame_ids, dtype=np.int64),
+        landmarks_to_array(landmarks),
+        np.asarray(confidence, dtype=np.float32),
+    )
+
+
+def array_to_landmarks(frame):
+    """Inverse of landmarks_to_array for a single joints x 3 frame."""
+    landmarks = {}
+    for j, name in enumerate(JOINTS):
+        x, y, score = (float(v) for v in frame[j])
+        if np.isnan(x) or np.isnan(y):
+            continue
+        landmarks[name] = {'x': x, 'y': y, 'score': None if np.isnan(score) else score}
+    return landmarks
+
+
+def encode_chunk(frame_ids, keypoints, confidence):
+    """Pack one chunk of frames into a compressed byte string (FORMAT_VERSION layout)."""
+    frame_ids = np.ascontiguousarray(frame_ids, dtype=np.int64)
+    buffer = b''.join((
+        frame_ids.tobytes(),
+        np.ascontiguousarray(confidence, dtype=_STORED_DTYPE).tobytes(),
+        np.ascontiguousarray(keypoints, dtype=_STORED_DTYPE).tobytes(),
+    ))
+    return zlib.compress(buffer, 6)
+
+
+def decode_chunk(payload, frame_count, version=FORMAT_VERSION):
+    """Unpack a chunk written by encode_chunk (in format `version`) into PoseFrames."""
+    buffer = zlib.decompress(bytes(payload))
+    id_dtype = _FRAME_ID_DTYPES[version]
+    ids_end = frame_count * np.dtype(id_dtype).itemsize
+    conf_end = ids_end + frame_count * 2
+    frame_ids = np.frombuffer(buffer, dtype=id_dtype, count=frame_count).astype(np.int64)
+    confidence = np.frombuffer(buffer[ids_end:conf_end], dtype=_STORED_DTYPE).astype(np.float32)
+    keypoints = (
+        np.frombuffer(buffer[conf_end:], dtype=_STORED_DTYPE)
+        .astype(np.float32)
+        .reshape(frame_count, len(JOINTS), len(CHANNELS))
+    )
+    return PoseFrames(frame_ids, keypoints, confidence)
+
+
+def merge_frames(parts):
+    """
+    Concatenate PoseFrames parts into a single frame-ordered PoseFrames.
+    When a frame_id appears twice, the first part wins.
+    """
+    parts = [part for part in parts if len(part[0])]
+    if not parts:
+        return empty_frames()
+
+    frame_ids = np.concatenate([p[0] for p in parts])
+    keypoints = np.concatenate([p[1] for p in parts])
+    confidence = np.concatenate([p[2] for p in parts])
+
+    frame_ids, first = np.unique(frame_ids, return_index=True)
+    return PoseFrames(frame_ids, keypoints[first], confidence[first])
+
+
+def slice_frames(frames, start_frame=None, end_frame=None):
+    """Restrict PoseFrames to start_frame <= frame_id <= end_frame."""
+    mask = np.ones(len(frames.frame_ids), dtype=bool)
+    if start_frame is not None:
+        mask &= frames.frame_ids >= start_frame
+    if end_frame is not None:
+        mask &= frames.frame_ids <= end_frame
+    if mask.all():
+        return frames
+    return PoseFrames(frames.frame_ids[mask], frames.keypoints[mask], frames.confidence[mask])
+
+
+def stream_header():
+    return (json.dumps({
+        'format': 'fithub-pose-frames',
+        'version': FORMAT_VERSION,
+        'joints': JOINTS,
+        'channels': CHANNELS,
+        'dtype': 'float32',
+        'byteorder': 'little',
+    }) + '\n').encode()
+
+
+def encode_stream_block(frames):
+    return b''.join((
+        struct.pack('<I', len(frames.frame_ids)),
+        np.ascontiguousarray(frames.frame_ids, dtype='<i8').tobytes(),
+        np.ascontiguousarray(frames.confidence, dtype='<f4').tobytes(),
+        np.ascontiguousarray(frames.keypoints, dtype='<f4').tobytes(),
+    ))
@@ -0,0 +1,114 @@
+"""
+Process-wide lookup table for PoseType rows.
+
+The registry is read from the database once per process and kept as an
+immutable mapping of normalized pose name -> PoseTypeInfo, so calorie
+calculation, rep scoring and reporting resolve a pose type with a dict
+lookup instead of a query.
+
+Saving or deleting a PoseType (or an Exercise, whose MET a pose type may
+inherit) bumps PoseRegistryVersion in the same transaction and drops the
+local table once it commits. Other processes compare the stored version
+at most every POSE_REGISTRY_RECHECK_SECONDS and reload when it has moved.
+The version lives in the database rather than a cache so that it is
+shared by every process whatever cache backend is configured.
+"""
+import time
+from collections import namedtuple
+from types import MappingProxyType
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+
+from FitHub.utils.poseAnalysis import POSE_ANALYSIS, normalize_pose_type
+
+PoseTypeInfo = namedtuple('PoseTypeInfo', [
+    'name',         # normalized name, e.g. 'squat'
+    'label',        # display name, e.g. 'Squat'
+    'exercise_id',  # linked Exercise or None
+    'met',          # PoseType.met, else the linked exercise's MET, else None
+    'analysis',     # read-only poseAnalysis config, or None without an analyzer
+])
+
+_registry = None
+_version = None
+_checked_at = 0.0
+
+
+def _analysis_config(pose_type):
+    if not pose_type.analyzer:
+        return None
+    config = dict(POSE_ANALYSIS.get(pose_type.analyzer, {}), analyzer=pose_type.analyzer)
+    for field in ('down_angle', 'up_angle', 'target_angle', 'tolerance', 'torso_min_angle'):
+        value = getattr(pose_type, field)
+        if value is not None:
+            config[field] = value
+    return MappingProxyType(config)
+
+
+def _load():
+    from FitHub.models import PoseType
+
+    entries = {}
+    for pose_type in PoseType.objects.select_related('exercise'):
+        met = pose_type.met
+        if met is None and pose_type.exercise:
+            met = pose_type.exercise.met
+        entries[pose_type.name] = PoseTypeInfo(
+            name=pose_type.name,
+            label=pose_type.label or pose_type.name.title(),
+            exercise_id=pose_type.exercise_id,
+            met=met,
+            analysis=_analysis_config(pose_type),
+        )
+    return MappingProxyType(entries)
+
+
+def _stored_version():
+    from FitHub.models import PoseRegistryVersion
+    return PoseRegistryVersion.current()
+
+
+def get_registry():
+    global _registry, _version, _checked_at
+
+    if _registry is not None:
+        interval = getattr(settings, 'POSE_REGISTRY_RECHECK_SECONDS', 30)
+        if time.monotonic() - _checked_at < interval:
+            return _registry
+        _checked_at = time.monotonic()
+        try:
+            if _stored_version() == _version:
+                return _registry
+        except DatabaseError:
+            return _registry
+
+    try:
+        # Read before loading: a change racing the load is picked up on the next check
+        version = _stored_version()
+        registry = _load()
+    except DatabaseError:
+        # Table not migrated yet (e.g. during migrate itself): nothing to cache
+        return MappingProxyType({})
+    _registry, _version, _checked_at = registry, version, time.monotonic()
+    return _registry
+
+
+def lookup(pose_type):
+    """PoseTypeInfo for a raw pose type string ('Squats ') or None."""
+    return get_registry().get(normalize_pose_type(pose_type))
+
+
+def _drop():
+    global _registry
+    _registry = None
+
+
+def invalidate():
+    """
+    Tell every process to reload its table. Call inside the transaction
+    that changes pose types; this process drops its own once it commits.
+    """
+    from FitHub.models import PoseRegistryVersion
+    PoseRegistryVersion.bump()
+    transaction.on_commit(_drop)
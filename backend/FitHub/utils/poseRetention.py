@@ -0,0 +1,86 @@
+"""
+Keyframe retention for ingested pose frames.
+
+settings.POSE_FRAME_RETENTION maps a normalized pose type ('squat') or
+'default' to a policy dict. Modes:
+
+    {'mode': 'all'}                           keep every frame
+    {'mode': 'every_nth', 'n': 10}            keep frames whose frame_id % n == 0
+    {'mode': 'angle_delta', 'degrees': 15}    keep frames where the tracked joint
+                                              angle moves into another
+                                              `degrees`-wide band
+    {'mode': 'rep_boundary'}                  keep only the rep keyframes below
+
+Angle-based modes keep everything for pose types without a tracked angle.
+
+For pose types that poseAnalysis can grade, the rep keyframes are always
+kept on top of the mode: every frame where the up/down phase changes plus
+the deepest frame of every "down" stretch. Analysing the kept frames
+therefore gives the same rep count and form scores as the full stream,
+including across batch boundaries, since the first and last frame of every
+batch are kept too.
+"""
+import numpy as np
+from django.conf import settings
+
+from FitHub.utils.poseAnalysis import ANGLE_BUILDERS, get_config, normalize_pose_type, rep_phases, segment_argmin
+
+DEFAULT_POLICY = {'mode': 'all'}
+
+
+def get_policy(pose_type):
+    policies = getattr(settings, 'POSE_FRAME_RETENTION', {})
+    return policies.get(normalize_pose_type(pose_type)) or policies.get('default') or DEFAULT_POLICY
+
+
+def rep_keyframes(angle, down_angle, up_angle):
+    """Mask of phase changes and of the minimum of every below-down_angle run."""
+    raw = rep_phases(angle, down_angle, up_angle)
+    keep = np.ones(len(raw), dtype=bool)
+    keep[1:] = raw[1:] != raw[:-1]
+
+    below = np.concatenate(([False], raw == -1, [False])).astype(np.int8)
+    edges = np.diff(below)
+    keep[segment_argmin(angle, np.flatnonzero(edges == 1), np.flatnonzero(edges == -1))] = True
+    return keep
+
+
+def angle_band_changes(angle, degrees):
+    # Unknown angles share one band so a run of missing joints is not kept frame by frame
+    band = np.nan_to_num(np.floor(angle / degrees), nan=-1.0)
+    keep = np.ones(len(angle), dtype=bool)
+    keep[1:] = band[1:] != band[:-1]
+    return keep
+
+
+def keyframe_mask(pose_type, frames, policy=None):
+    """Boolean mask over poseCodec.PoseFrames of the frames worth storing."""
+    policy = policy or get_policy(pose_type)
+    mode = policy.get('mode', 'all')
+    count = len(frames.frame_ids)
+    if mode == 'all' or count <= 2:
+        return np.ones(count, dtype=bool)
+
+    config = get_config(pose_type)
+    angle = None
+    if config and config.get('analyzer') in ANGLE_BUILDERS:
+        angles, primary = ANGLE_BUILDERS[config['analyzer']](frames.keypoints)
+        angle = angles[primary]
+
+    if mode == 'every_nth':
+        keep = frames.frame_ids % max(int(policy.get('n', 10)), 1) == 0
+    elif mode in ('angle_delta', 'rep_boundary'):
+        if angle is None:
+            # No tracked angle for this pose type, so nothing can be dropped safely
+            return np.ones(count, dtype=bool)
+        if mode == 'angle_delta':
+            keep = angle_band_changes(angle, float(policy.get('degrees', 10.0)))
+        else:
+            keep = np.zeros(count, dtype=bool)
+    else:
+        raise ValueError(f"Unknown pose frame retention mode: {mode}")
+
+    if angle is not None:
+        keep |= rep_keyframes(angle, config['down_angle'], config['up_angle'])
+    keep[0] = keep[-1] = True
+    return keep
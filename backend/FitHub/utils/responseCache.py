@@ -0,0 +1,78 @@
+"""
+Per-user cache for read-only dashboard responses.
+
+Cached responses are keyed by user, a per-user version number, the
+request path, its query string and today's date. Any write to the user's
+meals, workouts, pose sets or profile calls bump_user_version, which
+increments CustomUser.response_version once the transaction commits, and
+from then on every old key is unreachable. So a read after a write never
+sees a stale response, and nothing has to be deleted.
+
+The version lives on the user row, so bumps from any process (web
+workers, the pose job worker, management commands) are seen by all of
+them at the cost of one primary-key lookup per request. The cache itself
+only holds response bodies; the alias comes from
+settings.DASHBOARD_CACHE_ALIAS. With local memory each process simply
+keeps its own copies.
+"""
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from rest_framework.response import Response
+
+DEFAULT_TIMEOUT = 300
+
+
+def get_cache():
+    return caches[getattr(settings, 'DASHBOARD_CACHE_ALIAS', 'default')]
+
+
+def user_version(user_id):
+    """Current response version of a user, read from the database."""
+    from FitHub.models import CustomUser
+
+    return CustomUser.objects.filter(pk=user_id).values_list('response_version', flat=True).first() or 0
+
+
+def bump_user_version(user_id):
+    """Invalidate every cached response of a user once the current transaction commits."""
+    from FitHub.models import CustomUser
+
+    def bump():
+        CustomUser.objects.filter(pk=user_id).update(response_version=F('response_version') + 1)
+    transaction.on_commit(bump)
+
+
+def response_key(request, version):
+    query = request.GET.urlencode()
+    digest = hashlib.md5(f'{request.path}?{query}'.encode()).hexdigest()
+    return f'fithub:response:{request.user.pk}:{version}:{timezone.localdate().isoformat()}:{digest}'
+
+
+def cache_per_user(timeout=DEFAULT_TIMEOUT):
+    """Cache the 200 responses of an APIView GET handler per user (see module docstring)."""
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            if not request.user.is_authenticated:
+                return method(self, request, *args, **kwargs)
+
+            # Read the version before computing, so a write that lands
+            # meanwhile leaves this response under an already outdated key
+            cache = get_cache()
+            key = response_key(request, user_version(request.user.pk))
+            data = cache.get(key)
+            if data is not None:
+                return Response(data)
+
+            response = method(self, request, *args, **kwargs)
+            if isinstance(response, Response) and response.status_code == 200:
+                cache.set(key, response.data, timeout)
+            return response
+        return wrapper
+    return decorator
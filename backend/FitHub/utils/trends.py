@@ -0,0 +1,90 @@
+"""
+Daily calorie and workout trends.
+
+Each source is read with one grouped query. The rows are spread onto a
+dense day index (days without data are 0), and rolling means and an
+exponential moving average are added as whole-column pandas operations.
+Enough history before the window is fetched that the first day of the
+window gets a full rolling average instead of a partial one.
+"""
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+from django.db.models import Count, Sum
+
+ROLLING_WINDOWS = (7, 28)
+EMA_SPAN = 7
+
+CALORIE_SERIES = ('calories_consumed', 'calories_burned', 'net_calories')
+WORKOUT_SERIES = ('workout_count', 'calories_burned')
+
+
+def lookback_days(windows=ROLLING_WINDOWS, ema_span=EMA_SPAN):
+    """Extra history needed before a window for warmed-up rolling statistics."""
+    return max(max(windows, default=1), 3 * ema_span if ema_span else 1) - 1
+
+
+def dense_daily(rows, start, end, columns):
+    """
+    DataFrame with one float row per day from start to end (inclusive) out
+    of (date, *values) rows; repeated dates are summed, missing days are 0.
+    """
+    index = pd.date_range(start, end, freq='D')
+    frame = pd.DataFrame.from_records(list(rows), columns=['date', *columns])
+    if frame.empty:
+        return pd.DataFrame(0.0, index=index, columns=list(columns))
+    frame['date'] = pd.to_datetime(frame['date'])
+    frame[list(columns)] = frame[list(columns)].astype(float)
+    return frame.groupby('date').sum().reindex(index, fill_value=0.0).fillna(0.0)
+
+
+def add_rolling(frame, columns, windows=ROLLING_WINDOWS, ema_span=EMA_SPAN):
+    """Add <column>_avg_<n>d rolling means and a <column>_ema column for each column."""
+    for column in columns:
+        series = frame[column]
+        for window in windows:
+            frame[f'{column}_avg_{window}d'] = series.rolling(window, min_periods=1).mean()
+        if ema_span:
+            frame[f'{column}_ema'] = series.ewm(span=ema_span, adjust=False).mean()
+    return frame
+
+
+def to_records(frame, start=None, decimals=2):
+    """List of {'date': date, <column>: value} dicts from `start` on."""
+    if start is not None:
+        frame = frame.loc[pd.Timestamp(start):]
+    values = np.round(frame.to_numpy(dtype=float), decimals)
+    columns = list(frame.columns)
+    return [
+        dict(zip(columns, row), date=day)
+        for day, row in zip(frame.index.date, values.tolist())
+    ]
+
+
+def calorie_trend(user, start, end, rolling=True, windows=ROLLING_WINDOWS, ema_span=EMA_SPAN):
+    """Consumed / burned / net per day from the user's DailyCalorieSummary rows."""
+    fetch_from = start - timedelta(days=lookback_days(windows, ema_span)) if rolling else start
+    rows = user.daily_summaries.filter(date__range=(fetch_from, end)).values_list('date', *CALORIE_SERIES)
+    frame = dense_daily(rows, fetch_from, end, CALORIE_SERIES)
+    if rolling:
+        add_rolling(frame, CALORIE_SERIES, windows, ema_span)
+    return to_records(frame, start)
+
+
+def workout_trend(user, start, end, rolling=False, windows=ROLLING_WINDOWS, ema_span=EMA_SPAN):
+    """Workout count and calories burned per day."""
+    fetch_from = start - timedelta(days=lookback_days(windows, ema_span)) if rolling else start
+    rows = (
+        user.workouts.filter(workout_date__range=(fetch_from, end))
+        .values_list('workout_date')
+        .annotate(workout_count=Count('id'), calories_burned=Sum('total_calories'))
+        .order_by()
+    )
+    frame = dense_daily(rows, fetch_from, end, WORKOUT_SERIES)
+    if rolling:
+        add_rolling(frame, WORKOUT_SERIES, windows, ema_span)
+    records = to_records(frame, start)
+    for record in records:
+        record['workout_count'] = int(record['workout_count'])
+    return records
@@ -0,0 +1,51 @@
+"""
+Single-statement counter upserts.
+
+    INSERT ... ON CONFLICT (<lookup columns>) DO UPDATE
+        SET <field> = <field> + excluded.<field> ...
+    RETURNING ...
+
+The row is created or incremented atomically in one round trip, and the
+conflicting row stays locked until the surrounding transaction ends, so
+concurrent callers are serialized on that row only. The lookup fields must
+be covered by a unique constraint. Supported by PostgreSQL and SQLite 3.35+.
+"""
+from django.db import connections, models, router
+
+
+def upsert_increment(model, lookup, increments, defaults=None, returning=()):
+    """
+    Add `increments` ({field: amount}) to the row matching `lookup`
+    ({field: value}), inserting it with those amounts and `defaults` when it
+    does not exist yet. Returns the `returning` fields of the resulting row
+    as a tuple, or None when nothing is requested.
+    """
+    connection = connections[router.db_for_write(model)]
+    quote = connection.ops.quote_name
+    meta = model._meta
+    table = quote(meta.db_table)
+
+    def column(name):
+        return quote(meta.get_field(name).column)
+
+    columns, params = [], []
+    for name, value in {**lookup, **(defaults or {}), **increments}.items():
+        field = meta.get_field(name)
+        if isinstance(value, models.Model):
+            value = value.pk
+        columns.append(quote(field.column))
+        params.append(field.get_db_prep_save(value, connection))
+
+    updates = ', '.join(
+        f'{column(name)} = {table}.{column(name)} + excluded.{column(name)}' for name in increments
+    )
+    sql = (
+        f'INSERT INTO {table} ({", ".join(columns)}) VALUES ({", ".join(["%s"] * len(columns))}) '
+        f'ON CONFLICT ({", ".join(column(name) for name in lookup)}) DO UPDATE SET {updates}'
+    )
+    if returning:
+        sql += f' RETURNING {", ".join(column(name) for name in returning)}'
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchone() if returning else None
@@ -1,16 +1,22 @@
+import json
+import re
 from calendar import monthrange
 from time import timezone
 from django.forms import model_to_dict
 from django.utils.dateparse import parse_date
-from django.http import JsonResponse
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework import status
 from rest_framework.response import Response
 from django.core.mail import send_mail
 from django.shortcuts import get_object_or_404
 from django.conf import settings
-from .serializers import PoseEstimationSessionSerializer, PoseExerciseSetSummarySerializer, PoseFeedbackSerializer, UserRegistrationSerializer, WorkoutLibrarySerializer, WorkoutLibraryExerciseSerializer, UserProfileSerializer, ExerciseSerializer, FavoriteExerciseSerializer, ToggleFavoriteExerciseSerializer, MealPlanSerializer
-from .models import CustomUser, PoseEstimationSession, PoseExerciseSet, WorkoutExercise, ExercisePerformance, Workout, OTP, WorkoutLibrary, WorkoutLibraryExercise, Exercise, FavoriteExercise, MealPlan, DailyCalorieSummary, ExerciseHistory, get_top_exercises, get_top_meals_with_avg_calories
+from .serializers import PoseEstimationSessionSerializer, PoseExerciseSetSummarySerializer, PoseFeedbackSerializer, PoseFeedbackBatchSerializer, LogPerformanceBatchSerializer, WorkoutSyncSerializer, UserRegistrationSerializer, WorkoutLibrarySerializer, WorkoutLibraryExerciseSerializer, UserProfileSerializer, ExerciseSerializer, FavoriteExerciseSerializer, ToggleFavoriteExerciseSerializer, MealPlanSerializer, MealConsumedSerializer
+from .models import CustomUser, DailyPoseCalories, ProgressRollup, PoseEstimationSession, PoseExerciseSet, PoseFeedback, PoseKeypointChunk, WorkoutExercise, ExercisePerformance, Workout, OTP, WorkoutLibrary, WorkoutLibraryExercise, Exercise, FavoriteExercise, MealPlan, DailyCalorieSummary, ExerciseHistory, get_top_exercises, get_top_meals_with_avg_calories
+from .utils import downsample, poseCodec, poseRegistry, trends
+from .utils.responseCache import cache_per_user
 import logging
 from django.contrib.auth import authenticate
 from rest_framework_simplejwt.tokens import RefreshToken
@@ -22,7 +28,8 @@ from rest_framework.generics import ListAPIView
 from rest_framework.pagination import PageNumberPagination
 from django.db.models import Index
 from django.core.paginator import Paginator
-from django.db.models import Sum, Count
+from django.db.models import Sum, Count, Min, Q
+from django.db.models.functions import Lower
 from collections import defaultdict
 
 logger = logging.getLogger(__name__)
@@ -382,6 +389,7 @@ class CalorieGoalView(APIView):
 class WorkoutStatsView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @cache_per_user()
     def get(self, request):
         user = request.user
         data = user.get_workout_stats()
@@ -432,18 +440,20 @@ class EndExerciseView(APIView):
         total_time_seconds = request.data.get('total_time_seconds', 0)
         calories_burned = request.data.get('calories_burned', 0)
 
-        workout_exercise = get_object_or_404(WorkoutExercise, id=workout_exercise_id)
-
-        # Update workout exercise duration and calories
-        workout_exercise.total_time = timedelta(seconds=total_time_seconds)
-        workout_exercise.total_calories += float(calories_burned)
-        workout_exercise.save()
+        workout_exercise = get_object_or_404(
+            WorkoutExercise.objects.select_related('workout'),
+            id=workout_exercise_id,
+            workout__user=request.user,
+        )
 
-        # Update total workout time and calories
-        workout = workout_exercise.workout
-        workout.total_time += timedelta(seconds=total_time_seconds)
-        workout.total_calories += float(calories_burned)
-        workout.save()
+        # Duration and calories are added to the exercise and its workout with F() updates
+        if not workout_exercise.finish(float(total_time_seconds), float(calories_burned)):
+            workout_exercise.refresh_from_db(fields=['total_time', 'total_calories'])
+            return Response({
+                "message": "Exercise already ended.",
+                "total_time_seconds": workout_exercise.total_time.total_seconds(),
+                "calories_burned": workout_exercise.total_calories,
+            }, status=status.HTTP_200_OK)
 
         return Response({
             "message": "Exercise ended successfully.",
@@ -457,22 +467,65 @@ class LogExercisePerformanceView(APIView):
     
     def post(self, request):
         """Log performance details for an exercise."""
-        workout_exercise_id = int(request.data.get('workout_exercise_id'))  # If it's numeric
-
-        set_data = request.data.get('sets', [])
-
-        workout_exercise = get_object_or_404(WorkoutExercise, id=workout_exercise_id)
+        serializer = LogPerformanceBatchSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-        for set_info in set_data:
-            ExercisePerformance.objects.create(
-                workout_exercise=workout_exercise,
-                set_number=set_info.get('set_number'),
-                reps=set_info.get('reps'),
-                weight=set_info.get('weight')
-            )
+        data = serializer.validated_data
+        workout_exercise = get_object_or_404(
+            WorkoutExercise.objects.select_related('workout', 'exercise'),
+            id=data['workout_exercise_id'],
+            workout__user=request.user,
+        )
+        ExercisePerformance.log_sets(workout_exercise, data['sets'])
 
         return Response({'message': 'Exercise performance logged successfully.'}, status=status.HTTP_201_CREATED)
     
+class WorkoutSyncView(APIView):
+    """
+    Upload one or more workouts recorded offline in a single request.
+    Every exercise carries a client-generated UUID; exercises already
+    synced are reported as duplicates instead of being applied again, so
+    the app can safely retry an upload that timed out.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = WorkoutSyncSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        workouts = serializer.validated_data['workouts']
+        names = {exercise['exercise_name'].lower() for workout in workouts for exercise in workout['exercises']}
+        exercises = {
+            exercise.name.lower(): exercise
+            for exercise in Exercise.objects.annotate(lower_name=Lower('name')).filter(lower_name__in=names)
+        }
+        missing = sorted(names - set(exercises))
+        if missing:
+            return Response({"error": f"Exercise not found: {', '.join(missing)}."}, status=status.HTTP_400_BAD_REQUEST)
+
+        results = Workout.sync(request.user, workouts, exercises)
+
+        synced = []
+        for workout in workouts:
+            synced.append({
+                "workout_date": workout['workout_date'],
+                "exercises": [
+                    {
+                        "client_id": exercise['client_id'],
+                        "workout_exercise_id": results[exercise['client_id']][0],
+                        "status": "created" if results[exercise['client_id']][1] else "duplicate",
+                    }
+                    for exercise in workout['exercises']
+                ],
+            })
+        created = any(created for _, created in results.values())
+        return Response(
+            {"workouts": synced},
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
+        )
+
 class RecommendExercisesView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -703,6 +756,7 @@ class ExerciseEquipmentView(APIView):
 class CalorieProgressSummaryView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @cache_per_user()
     def get(self, request, format=None):
         user = request.user
         today = timezone.now().date()
@@ -725,6 +779,59 @@ class CalorieProgressSummaryView(APIView):
             'data': data,
         })
 
+
+class CalorieTrendView(APIView):
+    """
+    Daily consumed / burned / net calories with 7- and 28-day rolling means
+    and an EMA. ?days=N (default 30) ending today, or ?start=&end=.
+    ?max_points=N thins the days out with ?downsample=lttb (default) or minmax.
+    """
+    permission_classes = [IsAuthenticated]
+    MAX_DAYS = 3660
+
+    def get(self, request, format=None):
+        try:
+            if request.query_params.get('start') and request.query_params.get('end'):
+                start_date = date.fromisoformat(request.query_params['start'])
+                end_date = date.fromisoformat(request.query_params['end'])
+            else:
+                end_date = timezone.localdate()
+                start_date = end_date - timedelta(days=int(request.query_params.get('days', 30)) - 1)
+        except ValueError:
+            return Response({'error': 'Use YYYY-MM-DD dates or an integer days value.'}, status=400)
+
+        if start_date > end_date:
+            return Response({'error': 'start date must be before end date'}, status=400)
+        if (end_date - start_date).days >= self.MAX_DAYS:
+            return Response({'error': f'At most {self.MAX_DAYS} days per request.'}, status=400)
+        try:
+            max_points, method = downsample.parse_params(request.query_params, len(trends.CALORIE_SERIES))
+        except ValueError as e:
+            return Response({'error': str(e)}, status=400)
+
+        # Rolling means are computed over every day before the points are thinned out
+        data = trends.calorie_trend(request.user, start_date, end_date)
+        return Response({
+            'start': start_date,
+            'end': end_date,
+            'rolling_windows': list(trends.ROLLING_WINDOWS),
+            'ema_span': trends.EMA_SPAN,
+            'data': downsample.downsample_records(data, trends.CALORIE_SERIES, max_points, method),
+        })
+
+class WeightForecastView(APIView):
+    """Projected date of reaching goal_weight from the energy balance of the last ?days= days (default 28)."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, format=None):
+        try:
+            days = int(request.query_params.get('days', 28))
+        except ValueError:
+            return Response({'error': 'days must be an integer.'}, status=400)
+        if not 7 <= days <= 365:
+            return Response({'error': 'days must be between 7 and 365.'}, status=400)
+        return Response(request.user.get_weight_forecast(days=days))
+
 class ToggleFavoriteExercise(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -930,7 +1037,7 @@ class MealPlanCreateView(APIView):
                 meal=meal.get('meal'),
                 name=meal.get('name'),
                 ingredients=meal.get('ingredients'),
-                created_at__date=now().date()  # Check for the same date
+                plan_date=timezone.localdate()  # Check for the same date
             ).first()
 
             if existing_meal:
@@ -965,16 +1072,13 @@ class BulkUpdateMealConsumedStatusView(APIView):
             return Response({"error": "No updates provided."}, status=status.HTTP_400_BAD_REQUEST)
 
         for update in updates:
-            meal_id = update.get('id')
-            is_consumed = update.get('is_consumed')
-
-            if meal_id is None or is_consumed is None:
+            serializer = MealConsumedSerializer(data=update)
+            if not serializer.is_valid() or 'id' not in serializer.validated_data:
                 continue
 
             try:
-                meal = MealPlan.objects.get(id=meal_id, user=user)
-                meal.is_consumed = is_consumed
-                meal.save()
+                meal = MealPlan.objects.get(id=serializer.validated_data['id'], user=user)
+                meal.set_consumed(serializer.validated_data['is_consumed'])
             except MealPlan.DoesNotExist:
                 continue
 
@@ -990,7 +1094,7 @@ class MealPlanListView(APIView):
         # Filter meal plans by user and optionally by start_date
         meal_plans = MealPlan.objects.filter(user=user)
         if start_date:
-            meal_plans = meal_plans.filter(created_at__date__gte=start_date)
+            meal_plans = meal_plans.filter(plan_date__gte=start_date)
 
         serializer = MealPlanSerializer(meal_plans, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
@@ -1007,7 +1111,7 @@ class BackendMealsView(APIView):
         start_date = request.query_params.get('start_date')  # e.g., '2025-04-21'
 
         if start_date:
-            meals = MealPlan.objects.filter(user=user, created_at__date=start_date)
+            meals = MealPlan.objects.filter(user=user, plan_date=start_date)
         else:
             meals = MealPlan.objects.filter(user=user)
 
@@ -1025,10 +1129,10 @@ class UpdateMealConsumedStatusView(APIView):
         """
         try:
             # Get today's date
-            today = now().date()
+            today = timezone.localdate()
 
             # Fetch the meal for the authenticated user and ensure it matches today's date
-            meal = MealPlan.objects.get(id=meal_id, user=request.user, created_at__date=today)
+            meal = MealPlan.objects.get(id=meal_id, user=request.user, plan_date=today)
 
             # Get the is_consumed value from the request
             is_consumed = request.data.get('is_consumed', None)
@@ -1036,9 +1140,12 @@ class UpdateMealConsumedStatusView(APIView):
             if is_consumed is None:
                 return Response({"error": "is_consumed field is required."}, status=status.HTTP_400_BAD_REQUEST)
 
-            # Update the is_consumed status
-            meal.is_consumed = is_consumed
-            meal.save()
+            serializer = MealConsumedSerializer(data={'is_consumed': is_consumed})
+            if not serializer.is_valid():
+                return Response({"error": "is_consumed must be true or false."}, status=status.HTTP_400_BAD_REQUEST)
+
+            # Update the is_consumed status and the day's calorie summary
+            meal.set_consumed(serializer.validated_data['is_consumed'])
 
             return Response({"message": "Meal status updated successfully.", "is_consumed": meal.is_consumed}, status=status.HTTP_200_OK)
         except MealPlan.DoesNotExist:
@@ -1096,7 +1203,7 @@ class MealPlanRangeView(APIView):
 
         meals = MealPlan.objects.filter(
             user=request.user,
-            created_at__date__range=(start_date, end_date)
+            plan_date__range=(start_date, end_date)
         ).order_by('created_at')
 
         serializer = MealPlanSerializer(meals, many=True)
@@ -1112,33 +1219,19 @@ class DailyCalorieSummaryView(APIView):
         user = request.user
         today = now().date()
 
-        # Step 1: Calculate calories consumed from meals
-        calories_consumed = MealPlan.objects.filter(user=user, created_at__date=today).aggregate(
-            total=Sum('calories')
-        )['total'] or 0
-
-        # Step 2: Calculate calories burned from workouts
-        calories_burned = Workout.objects.filter(user=user, workout_date=today).aggregate(
-            total=Sum('total_calories')
-        )['total'] or 0
-
-        # Step 3: Get daily calorie requirements
-        calorie_data = user.calculate_calories(activity_level=user.activity_level)
-        daily_required_calories = (
-            calorie_data.get('weight_loss') or calorie_data.get('weight_gain')
-        )
-
-        # Step 4: Calculate net calories
-        net_calories = calories_consumed - calories_burned - daily_required_calories
-
-        # Step 5: Save or update the daily summary
-        summary, created = DailyCalorieSummary.objects.get_or_create(user=user, date=today)
-        summary.calories_consumed = calories_consumed
-        summary.calories_burned = calories_burned
-        summary.net_calories = net_calories
-        summary.save()
+        # The summary row is kept current as meals, workouts and pose sets change
+        summary = DailyCalorieSummary.objects.filter(user=user, date=today).first()
+        if summary:
+            calories_consumed = summary.calories_consumed
+            calories_burned = summary.calories_burned
+            daily_required_calories = summary.calorie_target
+            net_calories = summary.net_calories
+        else:
+            # Nothing recorded yet today
+            calories_consumed = calories_burned = 0
+            daily_required_calories = DailyCalorieSummary.target_for(user, today)
+            net_calories = -daily_required_calories
 
-        # Step 6: Return the summary
         return Response({
             "date": today,
             "calories_consumed": calories_consumed,
@@ -1161,14 +1254,15 @@ class WorkoutDatesView(APIView):
 class CalorieGoalView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @cache_per_user()
     def get(self, request):
         """
         Get the calorie goal for the authenticated user.
         """
         user = request.user
 
-        # Calculate calorie goals using the user's method
-        calorie_data = user.calculate_calories(activity_level=user.activity_level)
+        # Target in effect today, from the user's calorie target history
+        calorie_data = user.get_calorie_target()
 
         if not calorie_data:
             return Response({"error": "Unable to calculate calorie goals."}, status=status.HTTP_400_BAD_REQUEST)
@@ -1188,8 +1282,18 @@ class ProgressVisualizationAPIView(APIView):
     - week: last 7 days
     - month: whole selected month (or specific week if week param is provided)
     - 3months: last 90 days
+    - year: last 365 days
+
+    ?granularity=day (default, except for year) returns daily_data grouped in
+    the database. week, month and quarter return `buckets` read from the
+    ProgressRollup table, with the range widened to whole buckets.
+    ?max_points=N thins the points out with ?downsample=lttb (default) or
+    minmax; the summary totals still cover every day.
     """
+    CHART_SERIES = ('workout_calories_burned', 'meal_calories_consumed')
+    GRANULARITIES = ('day', 'week', 'month', 'quarter')
 
+    @cache_per_user()
     def get(self, request, *args, **kwargs):
         user = request.user
         period = request.query_params.get('period', 'week')
@@ -1229,6 +1333,10 @@ class ProgressVisualizationAPIView(APIView):
             start_date = today - timedelta(days=90)
             end_date = today
 
+        elif period == 'year':
+            start_date = today - timedelta(days=365)
+            end_date = today
+
         elif period == 'week':
             start_date = today - timedelta(days=7)
             end_date = today
@@ -1237,56 +1345,111 @@ class ProgressVisualizationAPIView(APIView):
             start_date = today - timedelta(days=7)
             end_date = today
 
-        # --- Aggregate Workout Data ---
-        workouts = Workout.objects.filter(user=user, workout_date__range=[start_date, end_date])
-        workout_data = defaultdict(lambda: {'calories_burned': 0, 'workout_count': 0})
-
-        for w in workouts:
-            workout_data[w.workout_date]['calories_burned'] += w.total_calories or 0
-            workout_data[w.workout_date]['workout_count'] += 1
-
-        # --- Aggregate Meal Data ---
-        meals = MealPlan.objects.filter(user=user, is_consumed=True, created_at__date__range=[start_date, end_date])
-        meal_data = defaultdict(int)
-        for m in meals:
-            meal_date = m.created_at.date()
-            meal_data[meal_date] += m.calories
+        granularity = request.query_params.get('granularity', 'month' if period == 'year' else 'day')
+        if granularity not in self.GRANULARITIES:
+            return Response({"error": f"granularity must be one of {', '.join(self.GRANULARITIES)}"}, status=400)
+        try:
+            max_points, method = downsample.parse_params(request.query_params, len(self.CHART_SERIES))
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
 
-        # --- Compile Daily Results ---
-        num_days = (end_date - start_date).days + 1
-        results = []
-        for i in range(num_days):
-            day = start_date + timedelta(days=i)
-            results.append({
-                'date': day.isoformat(),
-                'workout_calories_burned': workout_data[day]['calories_burned'],
-                'workout_count': workout_data[day]['workout_count'],
-                'meal_calories_consumed': meal_data[day],
-            })
+        if granularity == 'day':
+            key, results = 'daily_data', self.daily_data(user, start_date, end_date)
+        else:
+            key, results = 'buckets', self.bucket_data(user, granularity, start_date, end_date)
+            if results:
+                start_date = date.fromisoformat(results[0]['period_start'])
+                end_date = date.fromisoformat(results[-1]['period_end'])
 
         total_workout_calories = sum(item['workout_calories_burned'] for item in results)
         total_meal_calories = sum(item['meal_calories_consumed'] for item in results)
 
         return Response({
             'period': period,
+            'granularity': granularity,
             'start_date': start_date.isoformat(),
             'end_date': end_date.isoformat(),
-            'daily_data': results,
+            key: downsample.downsample_records(results, self.CHART_SERIES, max_points, method),
             'summary': {
                 'total_workout_calories': total_workout_calories,
                 'total_meal_calories': total_meal_calories,
             }
         })
 
+    @staticmethod
+    def daily_data(user, start_date, end_date):
+        workout_data = {
+            day: (calories or 0, count)
+            for day, calories, count in Workout.objects.filter(user=user, workout_date__range=[start_date, end_date])
+            .values_list('workout_date')
+            .annotate(calories=Sum('total_calories'), count=Count('id'))
+            .order_by()
+        }
+        meal_data = dict(
+            MealPlan.objects.filter(user=user, is_consumed=True, plan_date__range=[start_date, end_date])
+            .values_list('plan_date')
+            .annotate(calories=Sum('calories'))
+            .order_by()
+        )
+
+        results = []
+        for i in range((end_date - start_date).days + 1):
+            day = start_date + timedelta(days=i)
+            calories, count = workout_data.get(day, (0, 0))
+            results.append({
+                'date': day.isoformat(),
+                'workout_calories_burned': calories,
+                'workout_count': count,
+                'meal_calories_consumed': meal_data.get(day, 0),
+            })
+        return results
+
+    @staticmethod
+    def bucket_data(user, granularity, start_date, end_date):
+        """Week / month / quarter totals; quarters are summed from monthly rows."""
+        source = ProgressRollup.WEEK if granularity == 'week' else ProgressRollup.MONTH
+        first = ProgressRollup.bucket_start(source, start_date)
+        if granularity == 'quarter':
+            first = first.replace(month=(first.month - 1) // 3 * 3 + 1)
+        rows = ProgressRollup.objects.filter(
+            user=user, granularity=source, period_start__range=[first, end_date]
+        ).values_list('period_start', 'workout_calories', 'workout_count', 'meal_calories')
+        totals = {period_start: (calories, count, meals) for period_start, calories, count, meals in rows}
+
+        buckets = []
+        bucket_start = first
+        while bucket_start <= end_date:
+            if granularity == 'week':
+                bucket_end = bucket_start + timedelta(days=6)
+                keys = [bucket_start]
+            else:
+                span = 3 if granularity == 'quarter' else 1
+                keys = [
+                    date(bucket_start.year + (bucket_start.month - 1 + i) // 12, (bucket_start.month - 1 + i) % 12 + 1, 1)
+                    for i in range(span + 1)
+                ]
+                bucket_end = keys.pop() - timedelta(days=1)
+            parts = [totals.get(key, (0, 0, 0)) for key in keys]
+            buckets.append({
+                'period_start': bucket_start.isoformat(),
+                'period_end': bucket_end.isoformat(),
+                'workout_calories_burned': sum(part[0] for part in parts),
+                'workout_count': sum(part[1] for part in parts),
+                'meal_calories_consumed': sum(part[2] for part in parts),
+            })
+            bucket_start = bucket_end + timedelta(days=1)
+        return buckets
+
 class DailySummaryView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @cache_per_user()
     def get(self, request):
         user = request.user
         today = date.today()
 
         # Get meals eaten
-        meals_eaten = MealPlan.objects.filter(user=user, is_consumed=True, created_at__date=today).count()
+        meals_eaten = MealPlan.objects.filter(user=user, is_consumed=True, plan_date=today).count()
 
         # Fetch all workout IDs for the user today
         workout_ids = Workout.objects.filter(user=user, workout_date=today).values_list('id', flat=True)
@@ -1301,6 +1464,113 @@ class DailySummaryView(APIView):
             "workouts_done": workouts_done,
         })
 
+class TodayDashboardView(APIView):
+    """
+    Everything the app shows on launch in one response: profile, calorie
+    target, today's calories, meals, workouts and pose sets, and the
+    workout streak. ?fields=calories,meals limits the response to those
+    sections. Each section costs at most one query (profile none); target
+    and calories share one lookup of the CalorieTargetHistory row in effect.
+    """
+    permission_classes = [IsAuthenticated]
+
+    SECTIONS = ('profile', 'target', 'calories', 'meals', 'workouts', 'pose_sets', 'streak')
+    _calorie_target = None
+
+    @cache_per_user()
+    def get(self, request):
+        requested = request.query_params.get('fields')
+        if requested:
+            fields = [name.strip() for name in requested.split(',') if name.strip()]
+            unknown = sorted(set(fields) - set(self.SECTIONS))
+            if unknown:
+                return Response(
+                    {"error": f"Unknown fields: {', '.join(unknown)}. Choose from {', '.join(self.SECTIONS)}."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        else:
+            fields = self.SECTIONS
+
+        user = request.user
+        today = timezone.localdate()
+        data = {"date": today}
+        for name in self.SECTIONS:
+            if name in fields:
+                data[name] = getattr(self, f'get_{name}')(request, user, today)
+        return Response(data)
+
+    def calorie_target(self, user, today):
+        # A view instance serves a single request, so this is per request
+        if self._calorie_target is None:
+            self._calorie_target = user.get_calorie_target(as_of=today)
+        return self._calorie_target
+
+    def get_profile(self, request, user, today):
+        return {
+            "id": user.id,
+            "email": user.email,
+            "first_name": user.first_name,
+            "last_name": user.last_name,
+            "profile_photo": request.build_absolute_uri(user.profile_photo.url) if user.profile_photo else None,
+            "weight": user.weight,
+            "estimated_weight": user.get_estimated_current_weight(),
+            "goal": user.goal,
+            "goal_weight": user.goal_weight,
+        }
+
+    def get_target(self, request, user, today):
+        calorie_data = self.calorie_target(user, today)
+        return {
+            "daily_calorie_goal": calorie_data.get('weight_loss') or calorie_data.get('weight_gain'),
+            "goal_type": user.goal,
+            "goal_duration_days": int(user.goal_duration.split()[0]) * 30 if user.goal_duration else 90,
+        }
+
+    def get_calories(self, request, user, today):
+        summary = DailyCalorieSummary.objects.filter(user=user, date=today).first()
+        if summary is None:
+            calorie_data = self.calorie_target(user, today)
+            target = calorie_data.get('weight_loss') or calorie_data.get('weight_gain') or 0
+            return {"consumed": 0, "burned": 0, "target": target, "net": -target}
+        return {
+            "consumed": summary.calories_consumed,
+            "burned": summary.calories_burned,
+            "target": summary.calorie_target,
+            "net": summary.net_calories,
+        }
+
+    def get_meals(self, request, user, today):
+        meals = list(
+            MealPlan.objects.filter(user=user, plan_date=today)
+            .order_by('id')
+            .values('id', 'meal', 'name', 'calories', 'is_consumed')
+        )
+        return {
+            "planned": len(meals),
+            "eaten": sum(1 for meal in meals if meal['is_consumed']),
+            "items": meals,
+        }
+
+    def get_workouts(self, request, user, today):
+        # Counted from Workout so a workout without exercises still counts; the
+        # exercise counts skip the NULL row its LEFT JOIN produces
+        return Workout.objects.filter(user=user, workout_date=today).aggregate(
+            workouts=Count('id', distinct=True),
+            exercises_done=Count('exercises', filter=Q(exercises__total_time__isnull=False)),
+            exercises_in_progress=Count('exercises', filter=Q(exercises__total_time__isnull=True)),
+        )
+
+    def get_pose_sets(self, request, user, today):
+        pose_sets = (
+            PoseExerciseSet.objects.filter(user=user, date=today)
+            .select_related('exercise', 'session')
+            .order_by('id')
+        )
+        return PoseExerciseSetSummarySerializer(pose_sets, many=True).data
+
+    def get_streak(self, request, user, today):
+        return user.get_workout_streak()
+
 class PoseEstimationSessionCreateView(APIView):
     def post(self, request):
         serializer = PoseEstimationSessionSerializer(data=request.data)
@@ -1310,19 +1580,161 @@ class PoseEstimationSessionCreateView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 class PoseFeedbackCreateView(APIView):
+    permission_classes = [IsAuthenticated]
+
     def post(self, request):
+        """
+        Store one frame. It goes through PoseFeedback.ingest_frames like a
+        batch, so retries are idempotent and the retention policy applies;
+        policies that compare neighbouring frames can only thin out frames
+        uploaded together, so clients should prefer the batch endpoint or
+        the frame stream.
+        """
         serializer = PoseFeedbackSerializer(data=request.data)
-        if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        frame = dict(serializer.validated_data)
+        session = get_object_or_404(PoseEstimationSession, id=frame.pop('session'), user=request.user)
+        result = PoseFeedback.ingest_frames(session, [frame])
+        return Response({"session": session.id, **result._asdict()}, status=status.HTTP_201_CREATED)
+
+class PoseFeedbackBatchCreateView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        """
+        Store up to a few hundred frames of one session in a single request.
+
+        Expected payload:
+        {
+            "session": 12,
+            "frames": [
+                {"frame_id": 1, "keypoints_json": {...}, "feedback_notes": "", "confidence_score": 0.9},
+                ...
+            ]
+        }
+        """
+        serializer = PoseFeedbackBatchSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        data = serializer.validated_data
+        session = get_object_or_404(PoseEstimationSession, id=data['session'], user=request.user)
+        result = PoseFeedback.ingest_frames(session, data['frames'])
+
+        # collided > 0 means the client sends frames faster than the
+        # frame_id resolution (POSE_FRAME_ID_SECONDS) and those were lost
+        return Response({
+            "session": session.id,
+            "received": len(data['frames']),
+            **result._asdict(),
+        }, status=status.HTTP_201_CREATED)
+
+class PoseFrameExportView(APIView):
+    """
+    Stream one session's frames back for replay or analysis.
+
+    GET pose-session/<id>/frames/?encoding=ndjson|binary&start=<frame_id>&end=<frame_id>
+
+    A "Range: frames=<start>-<end>" header can be used instead of start/end and
+    is answered with 206. ndjson returns one {"frame_id", "confidence_score",
+    "keypoints"} object per line; binary is the block format described in
+    FitHub.utils.poseCodec. Frames are read in blocks through server-side
+    cursors, so memory use does not grow with session length.
+
+    Under ASGI a synchronous iterator would be consumed whole before the
+    first byte is sent, so there each block is fetched, decoded and encoded
+    in the sync thread and handed out through an async generator.
+    """
+    permission_classes = [IsAuthenticated]
+    RANGE_HEADER = re.compile(r'^frames=(\d*)-(\d*)$')
+
+    def get(self, request, session_id):
+        session = get_object_or_404(PoseEstimationSession, id=session_id, user=request.user)
+
+        encoding = request.query_params.get('encoding', 'ndjson')
+        if encoding not in ('ndjson', 'binary'):
+            return Response({"error": "encoding must be 'ndjson' or 'binary'."}, status=status.HTTP_400_BAD_REQUEST)
+
+        start = request.query_params.get('start')
+        end = request.query_params.get('end')
+        range_header = request.headers.get('Range')
+        if range_header:
+            match = self.RANGE_HEADER.match(range_header.strip())
+            if not match:
+                return Response({"error": "Range must look like 'frames=<start>-<end>'."},
+                                status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+            start, end = match.groups()
+
+        try:
+            start = int(start) if start else None
+            end = int(end) if end else None
+        except ValueError:
+            return Response({"error": "start and end must be frame ids."}, status=status.HTTP_400_BAD_REQUEST)
+
+        blocks = PoseKeypointChunk.iter_session_frames(session, start, end)
+        content = self._encode_blocks(blocks, encoding)
+        content_type = 'application/octet-stream' if encoding == 'binary' else 'application/x-ndjson'
+        if isinstance(request._request, ASGIRequest):
+            content = self._aiter_blocks(content)
+
+        response = StreamingHttpResponse(
+            content,
+            content_type=content_type,
+            status=status.HTTP_206_PARTIAL_CONTENT if range_header else status.HTTP_200_OK,
+        )
+        response['Accept-Ranges'] = 'frames'
+        if range_header:
+            response['Content-Range'] = f"frames {'' if start is None else start}-{'' if end is None else end}/*"
+        return response
+
+    @staticmethod
+    async def _aiter_blocks(content):
+        # thread_sensitive keeps every step, and the server-side cursors, on one thread
+        next_block = sync_to_async(next, thread_sensitive=True)
+        try:
+            while True:
+                block = await next_block(content, None)
+                if block is None:
+                    return
+                yield block
+        finally:
+            await sync_to_async(content.close, thread_sensitive=True)()
+
+    @classmethod
+    def _encode_blocks(cls, blocks, encoding):
+        # A generator, so both encodings have the close() the response and
+        # _aiter_blocks call to release the cursors early
+        try:
+            if encoding == 'binary':
+                yield poseCodec.stream_header()
+                for block in blocks:
+                    yield poseCodec.encode_stream_block(block)
+            else:
+                for block in blocks:
+                    yield cls._ndjson_block(block)
+        finally:
+            blocks.close()
+
+    @staticmethod
+    def _ndjson_block(block):
+        return ''.join(
+            json.dumps({
+                'frame_id': frame_id,
+                'confidence_score': float(confidence),
+                'keypoints': poseCodec.array_to_landmarks(keypoints),
+            }) + '\n'
+            for frame_id, keypoints, confidence in zip(block.frame_ids.tolist(), block.keypoints, block.confidence)
+        )
 
 class PoseEstimationSessionCompleteView(APIView):
     def post(self, request, session_id):
         session = get_object_or_404(PoseEstimationSession, id=session_id, user=request.user)
         session.completed = True
         session.ended_at = timezone.now()
-        session.save()
+        # Saving queues a PoseSessionJob (see signals); the worker does the rest
+        session.save(update_fields=['completed', 'ended_at'])
         return Response({"message": "Session marked as completed."}, status=status.HTTP_200_OK)
 
 
@@ -1350,13 +1762,24 @@ class MealHistoryView(APIView):
 
 
 class DailyFitnessSummaryView(APIView):
+    """
+    Per-day calories and pose sets, newest day first.
+
+    ?date=YYYY-MM-DD for one day, ?start=&end= for a range, or nothing for
+    the user's whole history. Long ranges are paged: at most `days` days
+    (capped at MAX_DAYS) come back per response, and when older days remain
+    the X-Next-Cursor / Link headers carry the ?cursor= for the next page.
+    The body stays a plain list. Each page costs one grouped query per source.
+    """
     permission_classes = [IsAuthenticated]
+    MAX_DAYS = 366
 
     def get(self, request, format=None):
         user = request.user
         start_date_str = request.query_params.get('start')
         end_date_str = request.query_params.get('end')
         single_date_str = request.query_params.get('date')
+        cursor_str = request.query_params.get('cursor')
 
         try:
             if start_date_str and end_date_str:
@@ -1364,59 +1787,86 @@ class DailyFitnessSummaryView(APIView):
                 end_date = date.fromisoformat(end_date_str)
                 if start_date > end_date:
                     return Response({'error': 'start date must be before end date'}, status=400)
-                date_range = sorted(
-    [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)],
-    reverse=True
-)
-
             elif single_date_str:
-                date_range = [date.fromisoformat(single_date_str)]
+                start_date = end_date = date.fromisoformat(single_date_str)
             else:
-               
-                earliest_pose_date = PoseExerciseSet.objects.filter(user=user).order_by('date').values_list('date', flat=True).first()
-                earliest_workout_date = Workout.objects.filter(user=user).order_by('workout_date').values_list('workout_date', flat=True).first()
-                earliest_meal_date = MealPlan.objects.filter(user=user).order_by('created_at').values_list('created_at', flat=True).first()
-
-                all_dates = [d for d in [earliest_pose_date, earliest_workout_date, earliest_meal_date] if d]
-                if not all_dates:
+                start_date = self.earliest_activity_date(user)
+                if not start_date:
                     return Response([])  # No history available
-
-                start_date = min(d.date() if hasattr(d, 'date') else d for d in all_dates)
                 end_date = date.today()
 
-                date_range = sorted(
-    [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)],
-    reverse=True
-)
-
+            if cursor_str:
+                end_date = min(end_date, date.fromisoformat(cursor_str))
         except ValueError:
             return Response({'error': 'Invalid date format. Use YYYY-MM-DD.'}, status=400)
 
-        summary_list = []
-
-        for target_date in date_range:
-            pose_sets = PoseExerciseSet.objects.filter(user=user, date=target_date)
-            pose_burned = PoseExerciseSet.get_daily_calories(user, target_date)
-
-            workout_burned = Workout.objects.filter(
-                user=user, workout_date=target_date
-            ).aggregate(total=Sum('total_calories'))['total'] or 0
-
-            consumed = MealPlan.objects.filter(
-                user=user, is_consumed=True, created_at__date=target_date
-            ).aggregate(total=Sum('calories'))['total'] or 0
-
-            serializer = PoseExerciseSetSummarySerializer(pose_sets, many=True)
+        try:
+            days = min(int(request.query_params.get('days', self.MAX_DAYS)), self.MAX_DAYS)
+        except ValueError:
+            return Response({'error': 'days must be an integer.'}, status=400)
+        if days < 1:
+            return Response({'error': 'days must be positive.'}, status=400)
+
+        if end_date < start_date:
+            return Response([])
+        page_start = max(start_date, end_date - timedelta(days=days - 1))
+
+        response = Response(self.summarize(user, page_start, end_date))
+        if page_start > start_date:
+            next_cursor = (page_start - timedelta(days=1)).isoformat()
+            query = request.query_params.copy()
+            query['cursor'] = next_cursor
+            response['X-Next-Cursor'] = next_cursor
+            response['Link'] = f'<{request.build_absolute_uri(request.path)}?{query.urlencode()}>; rel="next"'
+        return response
+
+    @staticmethod
+    def earliest_activity_date(user):
+        firsts = [
+            PoseExerciseSet.objects.filter(user=user).aggregate(first=Min('date'))['first'],
+            Workout.objects.filter(user=user).aggregate(first=Min('workout_date'))['first'],
+            MealPlan.objects.filter(user=user).aggregate(first=Min('plan_date'))['first'],
+        ]
+        firsts = [d for d in firsts if d]
+        return min(firsts) if firsts else None
+
+    @staticmethod
+    def summarize(user, start_date, end_date):
+        pose_sets = list(
+            PoseExerciseSet.objects.filter(user=user, date__range=(start_date, end_date))
+            .select_related('exercise', 'session')
+            .order_by('id')
+        )
+        sets_by_date = defaultdict(list)
+        pose_burned = defaultdict(float)
+        for pose_set, data in zip(pose_sets, PoseExerciseSetSummarySerializer(pose_sets, many=True).data):
+            sets_by_date[pose_set.date].append(data)
+            pose_burned[pose_set.date] += pose_set.calories_burned
+
+        workout_burned = dict(
+            Workout.objects.filter(user=user, workout_date__range=(start_date, end_date))
+            .values_list('workout_date')
+            .annotate(total=Sum('total_calories'))
+        )
+        consumed = dict(
+            MealPlan.objects.filter(user=user, is_consumed=True, plan_date__range=(start_date, end_date))
+            .values_list('plan_date')
+            .annotate(total=Sum('calories'))
+        )
 
+        summary_list = []
+        for offset in range((end_date - start_date).days + 1):
+            target_date = end_date - timedelta(days=offset)
+            burned = pose_burned[target_date] + (workout_burned.get(target_date) or 0)
+            eaten = consumed.get(target_date) or 0
             summary_list.append({
                 "date": target_date,
-                "calories_burned": round(pose_burned + workout_burned, 2),
-                "calories_consumed": consumed,
-                "net_calories": round(consumed - (pose_burned + workout_burned), 2),
-                "pose_sets": serializer.data
+                "calories_burned": round(burned, 2),
+                "calories_consumed": eaten,
+                "net_calories": round(eaten - burned, 2),
+                "pose_sets": sets_by_date[target_date],
             })
-
-        return Response(summary_list)
+        return summary_list
 
 
 class CaloriesByPoseView(APIView):
@@ -1436,17 +1886,18 @@ class CaloriesByPoseView(APIView):
         except ValueError:
             return JsonResponse({"error": "Invalid date format. Use YYYY-MM-DD."}, status=400)
 
-        # Filter pose exercise sets by user and date range
-        queryset = PoseExerciseSet.objects.filter(
+        # One pre-aggregated row per pose type and day (see DailyPoseCalories)
+        rows = DailyPoseCalories.objects.filter(
             user=user,
-            date__range=(start_date, end_date)
-        ).select_related('session')
+            date__range=(start_date, end_date),
+            set_count__gt=0,
+        ).values_list('pose_type', 'date', 'calories')
 
-        # Aggregate calories burned per pose_type per date
         data = {}
-        for set_obj in queryset:
-            key = (set_obj.session.pose_type, set_obj.date.isoformat())
-            data[key] = data.get(key, 0) + set_obj.calories_burned
+        for pose_type, day, calories in rows:
+            pose = poseRegistry.lookup(pose_type)
+            key = (pose.label if pose else pose_type.title(), day.isoformat())
+            data[key] = data.get(key, 0) + calories
 
         # Format response as a list of objects
         response_data = [
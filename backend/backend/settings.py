@@ -141,6 +141,41 @@ SIMPLE_JWT = {
     'BLACKLIST_AFTER_ROTATION': True,
 }
 
+# Live pose frame stream (FitHub.consumers)
+POSE_STREAM = {
+    'FLUSH_FRAMES': 120,
+    'FLUSH_INTERVAL': 1.0,
+    'MAX_PENDING_BATCHES': 4,
+}
+
+# Which pose frames are stored on the batch/stream ingest path (FitHub.utils.poseRetention)
+POSE_FRAME_RETENTION = {
+    'default': {'mode': 'every_nth', 'n': 10},
+    'squat': {'mode': 'rep_boundary'},
+    'lunge': {'mode': 'rep_boundary'},
+}
+
+# Pose frames: client frame_id unit (PoseScreen uses Date.now() / 100) and
+# the age after which compact_pose_frames replaces frames with rep summaries
+POSE_FRAME_ID_SECONDS = 0.1
+POSE_FRAME_MAX_AGE_DAYS = 30
+
+# Per-user dashboard response cache (FitHub.utils.responseCache). The
+# per-user versions are kept in the database, so local memory is correct
+# with several workers too; a shared cache (e.g.
+# django.core.cache.backends.redis.RedisCache) only raises the hit rate.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'dashboard': {
+        'BACKEND': os.getenv('DASHBOARD_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('DASHBOARD_CACHE_LOCATION', 'fithub-dashboard'),
+        'TIMEOUT': 300,
+    },
+}
+DASHBOARD_CACHE_ALIAS = 'dashboard'
+
 # Django Allauth
 ACCOUNT_EMAIL_REQUIRED = True
 ACCOUNT_AUTHENTICATION_METHOD = 'email'